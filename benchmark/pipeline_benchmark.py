@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+파이프라인 벤치마크
+
+합성 입력(손글씨 폰트로 채운 템플릿)으로 각 단계를 컨테이너 없이 CPU에서 차례로 실행하고
+단계별 소요 시간, 초당 글리프 수, 최대 메모리, 출력 파일 수를 JSON으로 기록합니다.
+각 단계 스크립트가 출력하는 @@metric 측정값(resource/stage_metrics.py)을 그대로 사용합니다.
+
+  python benchmark/pipeline_benchmark.py --output bench.json
+  python benchmark/pipeline_benchmark.py --baseline bench.json   # 기준 결과 대비 느려지면 종료 코드 2
+
+앞 단계가 실패하거나 건너뛴 경우(예: potrace 미설치), 또는 추론이 스텁 생성기로 실행된 경우
+다음 단계는 손글씨 폰트로 만든 합성 입력을 사용하며 결과의 "input" 값이 "synthetic"이 됩니다.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+import samples
+
+PROJECT_ROOT = samples.PROJECT_ROOT
+INFERENCE_DIR = os.path.join(PROJECT_ROOT, "inference")
+DEFAULT_CHECKPOINT = os.path.join(INFERENCE_DIR, "resources", "checkpoints", "last.pth")
+GEN_ALL_CHARS_PATH = os.path.join(INFERENCE_DIR, "resources", "gen_all_chars.json")
+STAGES = ("crop", "inference", "svg", "ttf", "webfont")
+FONT_NAME = "bench"
+METRIC_PREFIX = "@@metric "
+# 실패한 단계의 출력 중 결과에 남길 마지막 줄 수
+OUTPUT_TAIL_LINES = 20
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(message)s',
+    handlers=[logging.StreamHandler(sys.stderr)]
+)
+
+
+def count_files(directory, extensions):
+    if not os.path.isdir(directory):
+        return 0, 0
+    files = [os.path.join(directory, name) for name in os.listdir(directory)
+             if os.path.splitext(name)[1].lower() in extensions]
+    return len(files), sum(os.path.getsize(path) for path in files)
+
+
+def run_stage(stage, cmd, env, output_dir, extensions):
+    """단계 프로세스를 실행하고 측정값을 모읍니다."""
+    logging.info(f"[{stage}] 실행: {' '.join(cmd)}")
+    events = {}
+    tail = deque(maxlen=OUTPUT_TAIL_LINES)
+    start = time.perf_counter()
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+                               env={**os.environ, **env}, cwd=PROJECT_ROOT)
+    for line in process.stdout:
+        line = line.rstrip()
+        if line.startswith(METRIC_PREFIX):
+            event = json.loads(line[len(METRIC_PREFIX):])
+            if event.get("event") == "finished":
+                events[event["stage"]] = event
+        elif line:
+            tail.append(line)
+    # wait4로 이 단계 프로세스(와 그 자식)의 최대 RSS를 얻음
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    wall = time.perf_counter() - start
+
+    finished = events.get(stage, {})
+    output_files, output_bytes = count_files(output_dir, extensions)
+    glyphs = finished.get("glyphs")
+    result = {
+        "status": "ok" if process.returncode == 0 else "failed",
+        "wall_seconds": round(wall, 4),
+        "duration_seconds": finished.get("duration"),
+        "glyphs": glyphs,
+        "glyphs_per_sec": round(glyphs / wall, 2) if glyphs and wall > 0 else None,
+        "peak_rss_bytes": max(finished.get("peak_rss_bytes") or 0, usage.ru_maxrss * 1024),
+        "peak_gpu_bytes": finished.get("peak_gpu_bytes"),
+        "output_files": output_files,
+        "output_bytes": output_bytes,
+    }
+    sub_stages = {name: event.get("duration") for name, event in events.items() if name != stage}
+    if sub_stages:
+        result["sub_stages"] = sub_stages
+    if process.returncode != 0:
+        result["exit_code"] = process.returncode
+        result["output_tail"] = list(tail)
+        logging.warning(f"[{stage}] 실패 (종료 코드: {process.returncode})")
+    else:
+        logging.info(f"[{stage}] 완료: {wall:.2f}초, 글리프 {glyphs}, 출력 파일 {output_files}개")
+    return result
+
+
+def skipped(reason):
+    logging.warning(f"건너뜀: {reason}")
+    return {"status": "skipped", "reason": reason}
+
+
+def has_output(result, key="output_files"):
+    return result.get("status") == "ok" and result.get(key, 0) > 0
+
+
+def run_pipeline(work_dir, args, checkpoint, gen_chars_path, gen_chars):
+    """모든 단계를 한 번 실행하고 {단계: 결과}를 반환합니다."""
+    dirs = {name: os.path.join(work_dir, name) for name in
+            ("written", "1_cropped", "2_inference", "3_svg", "4_fonts", "debug", "synthetic")}
+    for path in dirs.values():
+        os.makedirs(path, exist_ok=True)
+    python = sys.executable
+    resource_path = os.path.join(PROJECT_ROOT, "resource")
+    results = {}
+
+    # 1. 크롭
+    samples.generate_filled_templates(dirs["written"], args.font, seed=args.seed)
+    crop_dir = os.path.join(dirs["1_cropped"], FONT_NAME)
+    results["crop"] = run_stage(
+        "crop", [python, os.path.join(PROJECT_ROOT, "crop", "glyph_cropper.py"), dirs["written"], crop_dir],
+        {"PYTHONPATH": resource_path, "KOREAN_CHARS_PATH": samples.KOREAN_CHARS_PATH,
+         "TEMPLATE_GENERATOR_PATH": samples.TEMPLATE_GENERATOR_PATH, "CROP_DEBUG_DIR": dirs["debug"]},
+        crop_dir, {".jpg"})
+    results["crop"]["input"] = "synthetic"
+
+    # 2. 추론 (참조 이미지: 크롭 결과)
+    reference_dir, reference_input = dirs["1_cropped"], "pipeline"
+    if not has_output(results["crop"]):
+        reference_dir, reference_input = os.path.join(dirs["synthetic"], "1_cropped"), "synthetic"
+        samples.render_glyph_images(samples.load_reference_chars(), os.path.join(reference_dir, FONT_NAME),
+                                    ext="jpg", font_path=args.font, seed=args.seed)
+    inference_dir = os.path.join(dirs["2_inference"], FONT_NAME)
+    results["inference"] = run_stage(
+        "inference", [python, os.path.join(INFERENCE_DIR, "infer_dm_kor.py"),
+                      "--reference_dir", reference_dir, "--output_dir", dirs["2_inference"],
+                      "--font_name", FONT_NAME, "--device", "cpu", "--weight_path", checkpoint["path"],
+                      "--gen_chars_path", gen_chars_path, "--style_cache_size_mb", "0",
+                      "--check_glyphs", "0" if checkpoint["stub"] else os.getenv("INFERENCE_CHECK_GLYPHS", "1")],
+        {"PYTHONPATH": os.pathsep.join([os.path.join(INFERENCE_DIR, "resources"), resource_path])},
+        inference_dir, {".png"})
+    results["inference"]["input"] = reference_input
+
+    # 3. JPG/PNG → SVG (스텁 생성기 출력은 실제 글리프와 모양이 달라 합성 글리프를 사용)
+    svg_dir = os.path.join(dirs["3_svg"], FONT_NAME)
+    if shutil.which("potrace") is None:
+        results["svg"] = skipped("potrace를 찾을 수 없습니다")
+    else:
+        image_dir, image_input = inference_dir, "pipeline"
+        if checkpoint["stub"] or not has_output(results["inference"]):
+            image_dir, image_input = os.path.join(dirs["synthetic"], "2_inference"), "synthetic"
+            samples.render_glyph_images(gen_chars, image_dir, font_path=args.font, seed=args.seed)
+        results["svg"] = run_stage(
+            "svg", [python, os.path.join(PROJECT_ROOT, "jpg2svg", "jpg_to_svg_converter.py"), image_dir, svg_dir],
+            {"PYTHONPATH": resource_path}, svg_dir, {".svg"})
+        results["svg"]["input"] = image_input
+
+    # 4. SVG → TTF
+    font_path = os.path.join(dirs["4_fonts"], f"{FONT_NAME}.ttf")
+    svg_input_dir, svg_input = svg_dir, "pipeline"
+    if not has_output(results["svg"]):
+        svg_input_dir, svg_input = os.path.join(dirs["synthetic"], "3_svg"), "synthetic"
+        samples.write_glyph_svgs(gen_chars, svg_input_dir, font_path=args.font)
+    svg2ttf_dir = os.path.join(PROJECT_ROOT, "svg2ttf")
+    base_font = os.path.join(PROJECT_ROOT, "resource", "UhBee-dami.ttf")
+    if args.ttf_backend == "fontforge":
+        if shutil.which("fontforge") is None:
+            results["ttf"] = skipped("fontforge를 찾을 수 없습니다")
+        else:
+            cmd = ["fontforge", "-script", os.path.join(svg2ttf_dir, "svg_to_ttf_converter.py"),
+                   svg_input_dir, font_path, FONT_NAME, FONT_NAME, "Regular", base_font]
+    else:
+        cmd = [python, os.path.join(svg2ttf_dir, "ttf_builder.py"), svg_input_dir, font_path,
+               FONT_NAME, FONT_NAME, FONT_NAME, "Regular", base_font]
+    if "ttf" not in results:
+        results["ttf"] = run_stage("ttf", cmd, {"PYTHONPATH": resource_path, "SVG2TTF_WOFF2": "0"},
+                                   dirs["4_fonts"], {".ttf"})
+        results["ttf"]["input"] = svg_input
+
+    # 5. 웹폰트 (WOFF2, 서버의 build_webfonts와 같은 설정)
+    if not has_output(results["ttf"]):
+        results["webfont"] = skipped("TTF가 생성되지 않았습니다")
+    else:
+        webfont_dir = os.path.join(dirs["4_fonts"], "webfonts")
+        cmd = [python, os.path.join(svg2ttf_dir, "webfont.py"), font_path, "--output_dir", webfont_dir]
+        if os.getenv("WEBFONT_WOFF", "0") == "1":
+            cmd.append("--woff")
+        if os.getenv("WEBFONT_SUBSETS", "0") == "1":
+            cmd.append("--subsets")
+        results["webfont"] = run_stage("webfont", cmd, {"PYTHONPATH": svg2ttf_dir}, webfont_dir,
+                                       {".woff2", ".woff", ".json"})
+        results["webfont"]["input"] = "pipeline"
+
+    return results
+
+
+def summarize(runs):
+    """반복 실행 결과를 단계별 중앙값으로 요약합니다."""
+    summary = {}
+    for stage in STAGES:
+        stage_runs = [run[stage] for run in runs if run.get(stage, {}).get("status") == "ok"]
+        if not stage_runs:
+            summary[stage] = {"status": runs[-1].get(stage, {}).get("status", "skipped")}
+            continue
+        entry = {"status": "ok", "input": stage_runs[-1].get("input"), "runs": len(stage_runs)}
+        for key in ("wall_seconds", "glyphs_per_sec", "peak_rss_bytes", "output_files", "output_bytes", "glyphs"):
+            values = [run[key] for run in stage_runs if run.get(key) is not None]
+            if values:
+                entry[key] = statistics.median(values)
+        summary[stage] = entry
+    total = [sum(run[stage].get("wall_seconds", 0) for stage in STAGES if stage in run) for run in runs]
+    summary["pipeline"] = {"wall_seconds": round(statistics.median(total), 4),
+                           "ok": all(run[stage]["status"] != "failed" for run in runs for stage in run)}
+    return summary
+
+
+def compare(summary, baseline, tolerance):
+    """기준 결과보다 tolerance 비율 이상 느려진 단계를 찾습니다."""
+    regressions = []
+    for stage, entry in summary.items():
+        base = baseline.get(stage, {})
+        if not base.get("wall_seconds") or not entry.get("wall_seconds"):
+            continue
+        ratio = entry["wall_seconds"] / base["wall_seconds"]
+        if ratio > 1 + tolerance:
+            regressions.append({"stage": stage, "baseline_seconds": base["wall_seconds"],
+                                "wall_seconds": entry["wall_seconds"], "ratio": round(ratio, 3)})
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="합성 입력으로 파이프라인 단계별 성능 측정")
+    parser.add_argument("--output", default=None, help="결과 JSON 경로 (기본값: 표준 출력)")
+    parser.add_argument("--work_dir", default=None, help="중간 결과 디렉토리 (기본값: 임시 디렉토리, 종료 시 삭제)")
+    parser.add_argument("--repeat", type=int, default=1, help="반복 실행 횟수 (요약은 중앙값)")
+    parser.add_argument("--gen_chars", type=int, default=int(os.getenv("BENCH_GEN_CHARS", "256")),
+                        help="생성할 글자 수 (gen_all_chars.json 중 손글씨 폰트에 있는 글자에서 고르게 선택, 0이면 전체)")
+    parser.add_argument("--checkpoint", default=os.getenv("BENCH_CHECKPOINT", DEFAULT_CHECKPOINT),
+                        help="생성기 체크포인트 (없으면 무작위 초기화 스텁 사용)")
+    parser.add_argument("--stub", action="store_true", help="체크포인트가 있어도 스텁 생성기 사용")
+    parser.add_argument("--font", default=samples.HANDWRITING_FONT_PATH, help="합성 입력을 만들 손글씨 TTF")
+    parser.add_argument("--ttf_backend", choices=["builder", "fontforge"],
+                        default=os.getenv("SVG2TTF_BACKEND", "builder"), help="SVG → TTF 백엔드")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default=None, help="비교할 기준 결과 JSON")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="기준 대비 허용 소요 시간 증가 비율")
+    args = parser.parse_args()
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="fontory-bench-")
+    os.makedirs(work_dir, exist_ok=True)
+    logging.info(f"작업 디렉토리: {work_dir}")
+    try:
+        with open(GEN_ALL_CHARS_PATH, encoding="utf-8") as f:
+            # 합성 입력을 만들 수 있도록 손글씨 폰트에 있는 글자 중에서 선택
+            all_chars = samples.covered_chars(json.load(f), args.font)
+        gen_chars = all_chars
+        if 0 < args.gen_chars < len(all_chars):
+            step = len(all_chars) / args.gen_chars
+            gen_chars = [all_chars[int(i * step)] for i in range(args.gen_chars)]
+        gen_chars_path = os.path.join(work_dir, "gen_chars.json")
+        with open(gen_chars_path, "w", encoding="utf-8") as f:
+            json.dump(gen_chars, f, ensure_ascii=False)
+
+        checkpoint = {"path": args.checkpoint, "stub": args.stub or not os.path.exists(args.checkpoint)}
+        if checkpoint["stub"]:
+            checkpoint["path"] = os.path.join(work_dir, "stub", "last.pth")
+            subprocess.run([sys.executable, os.path.abspath(samples.__file__), checkpoint["path"], str(args.seed)],
+                           check=True)
+
+        runs = []
+        for index in range(args.repeat):
+            logging.info(f"--- 실행 {index + 1}/{args.repeat} ---")
+            run_dir = os.path.join(work_dir, f"run_{index + 1}")
+            shutil.rmtree(run_dir, ignore_errors=True)
+            runs.append(run_pipeline(run_dir, args, checkpoint, gen_chars_path, gen_chars))
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    summary = summarize(runs)
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "generator": "stub" if checkpoint["stub"] else os.path.abspath(checkpoint["path"]),
+            "gen_chars": len(gen_chars),
+            "ttf_backend": args.ttf_backend,
+            "repeat": args.repeat,
+            "benchmark_peak_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        },
+        "summary": summary,
+        "runs": runs,
+    }
+    exit_code = 0 if summary["pipeline"]["ok"] else 1
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["summary"]
+        report["regressions"] = compare(summary, baseline, args.tolerance)
+        for regression in report["regressions"]:
+            logging.warning(f"성능 저하: {regression['stage']} {regression['baseline_seconds']}초 → "
+                            f"{regression['wall_seconds']}초 ({regression['ratio']}배)")
+        if report["regressions"]:
+            exit_code = 2
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        logging.info(f"결과 저장: {args.output}")
+    else:
+        print(text)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+"""
+벤치마크 입력 생성
+
+손글씨 느낌의 TTF(기본값: resource/UhBee-dami.ttf)로 다음 입력을 만듭니다.
+  * 채워진 템플릿 페이지: make_template/template_generator.py로 만든 빈 템플릿의 쓰기 영역에 글자를 그림
+  * 글리프 이미지: 추론 결과/크롭 결과를 대신하는 128x128 이미지
+  * 글리프 SVG: JPG → SVG 단계 결과를 대신하는 potrace 형식 SVG
+  * 생성기 스텁 체크포인트: 학습된 가중치가 없을 때 사용하는 무작위 초기화 가중치
+"""
+
+import importlib.util
+import logging
+import os
+import random
+import sys
+
+from PIL import Image, ImageDraw, ImageFont
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+RESOURCE_DIR = os.path.join(PROJECT_ROOT, "resource")
+TEMPLATE_GENERATOR_PATH = os.path.join(PROJECT_ROOT, "make_template", "template_generator.py")
+KOREAN_CHARS_PATH = os.path.join(RESOURCE_DIR, "korean_reference_chars.py")
+HANDWRITING_FONT_PATH = os.path.join(RESOURCE_DIR, "UhBee-dami.ttf")
+GLYPH_SIZE = 128        # 크로퍼/추론 결과 글리프 크기
+TEMPLATE_PADDING = 10   # 크로퍼의 TEMPLATE_BLANK_PADDING과 동일
+
+
+def load_module(name, path):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_reference_chars():
+    return load_module("bench_korean_reference_chars", KOREAN_CHARS_PATH).korean_chars
+
+
+def blank_box(tg, row, col):
+    """쓰기 영역 좌표 (크로퍼의 calculate_crop_coordinates와 같은 계산)"""
+    grid_start_y = tg.MARGIN // 2 + tg.TITLE_FONT_SIZE + tg.HEADER_SPACING
+    left = tg.MARGIN + col * tg.GRID_SIZE_WIDTH + (tg.GRID_SIZE_WIDTH - tg.BLANK_SIZE) // 2
+    top = int(grid_start_y + row * tg.GRID_SIZE_HEIGHT + tg.CHAR_SECTION_HEIGHT + TEMPLATE_PADDING)
+    return left, top
+
+
+def covered_chars(chars, font_path=HANDWRITING_FONT_PATH):
+    """폰트에 글리프가 있는 문자만 남깁니다."""
+    from fontTools.ttLib import TTFont
+
+    cmap = TTFont(font_path, lazy=True).getBestCmap()
+    return [char for char in chars if ord(char) in cmap]
+
+
+def render_glyph(font, char, size, jitter=0.0, rng=None):
+    """글자 하나를 흰 바탕 흑백 이미지로 그립니다. jitter > 0이면 위치와 기울기를 조금씩 흔듭니다."""
+    img = Image.new("L", (size, size), 255)
+    draw = ImageDraw.Draw(img)
+    left, top, right, bottom = draw.textbbox((0, 0), char, font=font)
+    x = (size - (right - left)) / 2 - left
+    y = (size - (bottom - top)) / 2 - top
+    if jitter and rng is not None:
+        x += rng.uniform(-jitter, jitter) * size
+        y += rng.uniform(-jitter, jitter) * size
+    draw.text((x, y), char, fill=0, font=font)
+    if jitter and rng is not None:
+        img = img.rotate(rng.uniform(-4, 4), resample=Image.Resampling.BICUBIC, fillcolor=255)
+    return img
+
+
+def generate_filled_templates(output_dir, font_path=HANDWRITING_FONT_PATH, seed=0, pages=1):
+    """빈 템플릿 페이지를 생성하고 앞의 pages장의 쓰기 영역을 손글씨 폰트로 채웁니다.
+    생성 요청에는 템플릿 이미지가 한 장만 들어오므로 기본값은 1장이며, 나머지 페이지는 지웁니다.
+    채운 페이지 경로 목록을 반환합니다."""
+    tg = load_module("bench_template_generator", TEMPLATE_GENERATOR_PATH)
+    tg.FONT_PATH = font_path
+    tg.OUTPUT_DIR = output_dir
+    tg.KOREAN_CHARS_PATH = KOREAN_CHARS_PATH
+    tg.generate_template_pages()
+
+    chars = load_reference_chars()
+    chars_per_page = tg.CHARS_PER_ROW * tg.ROWS_PER_PAGE
+    font = ImageFont.truetype(font_path, int(tg.BLANK_SIZE * 0.75))
+    rng = random.Random(seed)
+    filled = []
+    for page_index in range((len(chars) + chars_per_page - 1) // chars_per_page):
+        page_path = os.path.join(output_dir, f"template_page_{page_index + 1}.jpg")
+        if page_index >= pages:
+            os.remove(page_path)
+            continue
+        page = Image.open(page_path).convert("RGB")
+        for i, char in enumerate(chars[page_index * chars_per_page:(page_index + 1) * chars_per_page]):
+            glyph = render_glyph(font, char, tg.BLANK_SIZE, jitter=0.04, rng=rng)
+            page.paste(glyph.convert("RGB"), blank_box(tg, i // tg.CHARS_PER_ROW, i % tg.CHARS_PER_ROW))
+        page.save(page_path, "JPEG", quality=95)
+        filled.append(page_path)
+    logging.info(f"채워진 템플릿 {len(filled)}장 생성: {output_dir}")
+    return filled
+
+
+def render_glyph_images(chars, output_dir, ext="png", font_path=HANDWRITING_FONT_PATH, seed=0):
+    """글자마다 <문자>.<ext> 글리프 이미지를 만듭니다."""
+    os.makedirs(output_dir, exist_ok=True)
+    font = ImageFont.truetype(font_path, int(GLYPH_SIZE * 0.8))
+    rng = random.Random(seed)
+    for char in chars:
+        img = render_glyph(font, char, GLYPH_SIZE, jitter=0.02, rng=rng)
+        img.save(os.path.join(output_dir, f"{char}.{ext}"), quality=95)
+    return len(chars)
+
+
+def write_glyph_svgs(chars, output_dir, font_path=HANDWRITING_FONT_PATH):
+    """글자마다 potrace 출력과 같은 형식(y축 뒤집기 그룹 transform + path)의 <문자>.svg를 만듭니다."""
+    from fontTools.pens.svgPathPen import SVGPathPen
+    from fontTools.ttLib import TTFont
+
+    os.makedirs(output_dir, exist_ok=True)
+    font = TTFont(font_path)
+    cmap = font.getBestCmap()
+    glyph_set = font.getGlyphSet()
+    ascent = font["hhea"].ascent
+    written = 0
+    for char in chars:
+        glyph_name = cmap.get(ord(char))
+        if glyph_name is None:
+            continue
+        pen = SVGPathPen(glyph_set)
+        glyph_set[glyph_name].draw(pen)
+        svg = (f'<svg xmlns="http://www.w3.org/2000/svg" width="{GLYPH_SIZE}pt" height="{GLYPH_SIZE}pt">'
+               f'<g transform="translate(0,{ascent}) scale(1,-1)"><path d="{pen.getCommands()}"/></g></svg>')
+        with open(os.path.join(output_dir, f"{char}.svg"), "w", encoding="utf-8") as f:
+            f.write(svg)
+        written += 1
+    return written
+
+
+def make_stub_checkpoint(path, seed=0):
+    """학습된 가중치 대신 쓸 무작위 초기화 생성기 체크포인트를 저장합니다 (구조는 실제 모델과 동일).
+    torch를 불러오므로 벤치마크 프로세스에서는 별도 프로세스로 실행합니다 (단계 프로세스의 최대 RSS 측정 보호)."""
+    sys.path.insert(0, os.path.join(PROJECT_ROOT, "inference", "resources"))
+    import torch
+    from DM.models import Generator
+
+    torch.manual_seed(seed)
+    gen = Generator(n_heads=3, n_comps=68).eval()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    torch.save({"generator_ema": gen.state_dict()}, path)
+    logging.info(f"생성기 스텁 체크포인트 저장: {path}")
+    return path
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    make_stub_checkpoint(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 0)
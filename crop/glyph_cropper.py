@@ -7,15 +7,20 @@ Fontory용 글리프 크로퍼
 import os
 import sys
 import glob
+import time
 import logging
 from PIL import Image, ImageDraw, ImageFont
 import importlib.util
+import numpy as np
+from binarize import binarize, ink_ratio
+from stage_metrics import emit_started, emit_finished, install_log_rate_limit, start_profiling, ProgressReporter
 
 logging.basicConfig(
     level=logging.DEBUG,  
     format='%(message)s',  
     handlers=[logging.StreamHandler()]
 )
+install_log_rate_limit()
 
 # --- 템플릿 설정 --- 
 EXPECTED_TEMPLATE_WIDTH = 2480  # 예상 템플릿 너비
@@ -39,10 +44,14 @@ TEMPLATE_BLANK_PADDING = 10     # 템플릿 구분선 아래 패딩
 DIVIDER_LINE_THICKNESS = 2      # 템플릿 구분선 두께
 DEBUG_MODE = True               # 디버그 이미지 생성 여부
 TARGET_SIZE = 128               # 최종 글리프 크기
+GLYPH_ARRAY_FILE = "glyphs.npz" # 추론 단계에 넘겨줄 글리프 배열 파일 (JPEG 재디코딩 생략용)
+MIN_INK_RATIO = 0.005           # 이보다 잉크가 적으면 빈 칸으로 판단
+MAX_INK_RATIO = 0.5             # 이보다 잉크가 많으면 번짐·얼룩으로 판단
 
-# --- 경로 (컨테이너 내부) --- 
-TEMPLATE_GENERATOR_PATH = "/app/make_template/template_generator.py"
-KOREAN_CHARS_PATH = "/app/korean_reference_chars.py"
+# --- 경로 (컨테이너 내부, 환경 변수로 변경 가능) --- 
+TEMPLATE_GENERATOR_PATH = os.getenv("TEMPLATE_GENERATOR_PATH", "/app/make_template/template_generator.py")
+KOREAN_CHARS_PATH = os.getenv("KOREAN_CHARS_PATH", "/app/korean_reference_chars.py")
+DEBUG_OUTPUT_DIR = os.getenv("CROP_DEBUG_DIR", "/app/debug_output")
 
 def create_directory_if_not_exists(directory):
     """디렉토리가 없으면 생성합니다."""
@@ -130,8 +139,9 @@ def create_debug_image(img, debug_save_path):
         logging.error(f"디버그 이미지 저장 오류: {save_err}")
         sys.exit(1)
 
-def crop_glyphs_from_image(image_path, base_output_dir, verbose=True):
-    """이미지에서 글리프를 추출하고 저장합니다."""
+def crop_glyphs_from_image(image_path, base_output_dir, verbose=True, glyph_arrays=None, progress=None):
+    """이미지에서 글리프를 추출하고 저장합니다. glyph_arrays가 주어지면 {문자: uint8 배열}도 채웁니다.
+    progress(ProgressReporter)가 주어지면 글리프마다 진행 상황을 보고합니다."""
     try:
         # 이미지 로드 및 기본 정보 획득
         img = Image.open(image_path)
@@ -142,7 +152,7 @@ def crop_glyphs_from_image(image_path, base_output_dir, verbose=True):
         
         # 출력 디렉토리 설정
         glyph_output_dir = base_output_dir
-        debug_output_dir = "/app/debug_output"
+        debug_output_dir = DEBUG_OUTPUT_DIR
         create_directory_if_not_exists(glyph_output_dir)
         if DEBUG_MODE:
             create_directory_if_not_exists(debug_output_dir)
@@ -202,13 +212,21 @@ def crop_glyphs_from_image(image_path, base_output_dir, verbose=True):
                     char_path = os.path.join(glyph_output_dir, char_filename)
                     try: 
                         final_glyph.save(char_path, "JPEG", quality=95)
-                        logging.info(f"저장: {char_filename} (문자 '{char}' | 행={row}, 열={col})")
+                        logging.debug(f"저장: {char_filename} (문자 '{char}' | 행={row}, 열={col})")
                         num_glyphs += 1
+                        if progress is not None:
+                            progress.advance()
+                        if glyph_arrays is not None:
+                            glyph_arrays[char] = np.asarray(final_glyph, dtype=np.uint8)
                     except Exception as save_err: 
                         logging.error(f"글리프 저장 오류: {save_err}")
+                        if progress is not None:
+                            progress.fail(char, save_err)
                         sys.exit(1)
                 else: 
                     logging.warning(f"  크롭 건너뜀: 범위 벗어남 ({left},{top})-({right},{bottom}) for '{char}'")
+                    if progress is not None:
+                        progress.fail(char, "크롭 범위 벗어남")
             else:
                 continue  # 내부 루프가 정상적으로 완료된 경우
             break  # 내부 루프가 중단된 경우 외부 루프도 중단
@@ -224,6 +242,7 @@ def process_all_templates(input_dir, output_dir, verbose=True):
     """입력 디렉토리의 모든 템플릿 이미지를 처리합니다."""
     logging.info("\n템플릿 처리 시작...")
     logging.info(f"디버그 모드: {DEBUG_MODE}")
+    start_time = time.time()
         
     # 입력 디렉토리에서 이미지 파일 찾기
     template_paths = glob.glob(os.path.join(input_dir, "*.jpg"))
@@ -240,13 +259,20 @@ def process_all_templates(input_dir, output_dir, verbose=True):
     total_glyphs_processed = 0
     total_files_skipped = 0
     processed_files_count = 0
+    glyph_arrays = {}
+    progress = ProgressReporter("crop", len(korean_chars))
     
     # 각 템플릿 파일 처리
     for template_path in template_paths:
         processed_files_count += 1
-        num_glyphs, skipped = crop_glyphs_from_image(template_path, output_dir, verbose)
+        num_glyphs, skipped = crop_glyphs_from_image(template_path, output_dir, verbose, glyph_arrays, progress)
         total_glyphs_processed += num_glyphs
         total_files_skipped += skipped
+    progress.report()
+
+    check_glyph_quality(glyph_arrays)
+    save_glyph_arrays(glyph_arrays, output_dir)
+    emit_finished("crop", time.time() - start_time, glyphs=total_glyphs_processed)
     
     # 최종 결과 출력
     logging.info(f"\n--- 처리 완료 ---")
@@ -261,9 +287,37 @@ def process_all_templates(input_dir, output_dir, verbose=True):
         logging.warning("한글 문자 목록을 사용할 수 없습니다.")
         
     if DEBUG_MODE: 
-        logging.info(f"디버그 이미지: '/app/debug_output'")
+        logging.info(f"디버그 이미지: '{DEBUG_OUTPUT_DIR}'")
     logging.info("---------------------------")
 
+def check_glyph_quality(glyph_arrays):
+    """추출한 글리프 전체를 한 번에 이진화하여 빈 칸이나 번진 칸을 경고합니다."""
+    if not glyph_arrays:
+        return
+    chars = sorted(glyph_arrays)
+    # 스캔 밝기가 템플릿마다 다르므로 전체 히스토그램 기준 임계값 사용
+    ratios = ink_ratio(binarize(np.stack([glyph_arrays[c] for c in chars]), "adaptive"))
+    blank = [c for c, r in zip(chars, ratios) if r < MIN_INK_RATIO]
+    smeared = [c for c, r in zip(chars, ratios) if r > MAX_INK_RATIO]
+    if blank:
+        logging.warning(f"빈 칸으로 보이는 글리프 {len(blank)}개: {''.join(blank)}")
+    if smeared:
+        logging.warning(f"잉크가 과도한 글리프 {len(smeared)}개: {''.join(smeared)}")
+    logging.info(f"글리프 품질 검사: 평균 잉크 비율 {ratios.mean():.3f} (빈 칸 {len(blank)}개, 과도 {len(smeared)}개)")
+
+def save_glyph_arrays(glyph_arrays, output_dir):
+    """추출한 글리프를 손실 없는 배열로 저장하여 추론 단계가 JPEG를 다시 디코딩하지 않도록 합니다."""
+    if not glyph_arrays:
+        return
+    chars = sorted(glyph_arrays)
+    array_path = os.path.join(output_dir, GLYPH_ARRAY_FILE)
+    try:
+        np.savez(array_path, chars=np.array(chars), glyphs=np.stack([glyph_arrays[c] for c in chars]))
+        logging.info(f"글리프 배열 저장: {array_path} ({len(chars)}개)")
+    except Exception as e:
+        # 배열은 최적화 용도이므로 실패해도 JPEG 글리프로 추론 가능
+        logging.warning(f"글리프 배열 저장 실패: {e}")
+
 def load_korean_chars():
     """한글 문자 목록을 로드합니다."""
     global korean_chars
@@ -300,6 +354,8 @@ def load_korean_chars():
         sys.exit(1)
 
 if __name__ == "__main__":
+    emit_started("crop")
+    start_profiling("crop")
     if len(sys.argv) < 3:
         print("사용법: python glyph_cropper.py <입력_템플릿_디렉토리> <출력_글리프_디렉토리> [--no-verbose] [--debug]")
         sys.exit(1)
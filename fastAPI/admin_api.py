@@ -0,0 +1,14 @@
+from fastapi import APIRouter, Query
+from fastAPI.profiling import PROFILE_TRIGGER
+
+router = APIRouter()
+
+@router.post("/admin/profile")
+def arm_profiling(count: int = Query(1, ge=1, le=100)):
+    """다음 count개의 요청을 프로파일링하도록 예약합니다."""
+    armed = PROFILE_TRIGGER.arm(count)
+    return {"armed": armed, "sample_rate": PROFILE_TRIGGER.sample_rate}
+
+@router.get("/admin/profile")
+def profiling_status():
+    return {"armed": PROFILE_TRIGGER.armed, "sample_rate": PROFILE_TRIGGER.sample_rate}
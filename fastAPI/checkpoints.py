@@ -0,0 +1,131 @@
+import json
+import os
+import shutil
+import time
+import logging
+from fastAPI.config import RESULT_DIR, CHECKPOINT_DIR, CHECKPOINT_TTL_HOURS
+
+# 체크포인트를 남기는 단계 (파이프라인 순서)
+CHECKPOINT_STAGES = ("download", "crop", "inference", "svg", "ttf")
+
+def stage_output(stage, font_name, written_dir):
+    """단계의 결과물 경로. 다음 단계는 이 결과물만 있으면 이어서 실행할 수 있습니다."""
+    if stage == "download":
+        return written_dir
+    if stage == "crop":
+        return os.path.join(RESULT_DIR, "1_cropped", font_name)
+    if stage == "inference":
+        return os.path.join(RESULT_DIR, "2_inference", font_name)
+    if stage == "svg":
+        return os.path.join(RESULT_DIR, "3_svg", font_name)
+    if stage == "ttf":
+        return os.path.join(RESULT_DIR, "4_fonts", f"{font_name}.ttf")
+    raise ValueError(f"체크포인트가 없는 단계입니다: {stage}")
+
+def _remove(path):
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+
+class PipelineCheckpoint:
+    """requestUUID별 단계 완료 표시와 보관한 결과물 (CHECKPOINT_DIR/<requestUUID>/).
+
+    처리가 끝나면(성공, 실패 모두) 마지막으로 완료한 단계의 결과물을 체크포인트로 옮겨 두고,
+    같은 요청이 다시 오면(SQS 재전송) 결과물을 되돌려 놓은 뒤 다음 단계부터 실행합니다.
+    TTF까지 만든 요청은 업로드와 백엔드 결과 전송만 다시 합니다."""
+    def __init__(self, request_id, font_name, written_dir, logger):
+        self.request_id = request_id
+        self.font_name = font_name
+        self.written_dir = written_dir
+        self.logger = logger
+        self.dir = os.path.join(CHECKPOINT_DIR, request_id)
+        self.state_path = os.path.join(self.dir, "state.json")
+        self.completed = []
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        if state.get("font_name") != self.font_name:
+            self.logger.warning(f"폰트 이름이 다른 체크포인트를 무시합니다: {state.get('font_name')}")
+            self.clear()
+            return
+        self.completed = [stage for stage in state.get("completed", []) if stage in CHECKPOINT_STAGES]
+
+    def _save(self):
+        os.makedirs(self.dir, exist_ok=True)
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"font_name": self.font_name, "completed": self.completed, "updated_at": time.time()}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.state_path)
+
+    @property
+    def last_stage(self):
+        return self.completed[-1] if self.completed else None
+
+    def is_done(self, stage):
+        return stage in self.completed
+
+    def mark_done(self, stage):
+        if stage not in self.completed:
+            self.completed.append(stage)
+            self._save()
+            self.logger.info(f"[CHECKPOINT] '{stage}' 단계 완료 기록")
+
+    def _stash_path(self, stage):
+        return os.path.join(self.dir, stage, os.path.basename(stage_output(stage, self.font_name, self.written_dir)))
+
+    def restore(self):
+        """보관한 결과물을 원래 위치로 되돌립니다. 결과물이 없으면 처음부터 다시 실행하도록 체크포인트를 지웁니다."""
+        stage = self.last_stage
+        if stage is None:
+            return False
+        stash_path = self._stash_path(stage)
+        if not os.path.exists(stash_path):
+            self.logger.warning(f"[CHECKPOINT] '{stage}' 단계 결과물이 없어 처음부터 다시 실행합니다.")
+            self.clear()
+            return False
+        target = stage_output(stage, self.font_name, self.written_dir)
+        _remove(target)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.move(stash_path, target)
+        # 재개한 체크포인트가 처리 중에 만료되지 않도록 갱신 시각을 새로 기록
+        self._save()
+        self.logger.info(f"[CHECKPOINT] 이전 실행에서 완료한 단계: {', '.join(self.completed)} ('{stage}' 다음 단계부터 재개)")
+        return True
+
+    def stash(self):
+        """마지막으로 완료한 단계의 결과물을 체크포인트로 옮깁니다 (중간 결과물 정리 전에 호출)."""
+        stage = self.last_stage
+        if stage is None:
+            return
+        source = stage_output(stage, self.font_name, self.written_dir)
+        if not os.path.exists(source):
+            return
+        stash_path = self._stash_path(stage)
+        _remove(os.path.dirname(stash_path))
+        os.makedirs(os.path.dirname(stash_path), exist_ok=True)
+        shutil.move(source, stash_path)
+        self.logger.info(f"[CHECKPOINT] '{stage}' 단계 결과물 보관: {stash_path}")
+
+    def clear(self):
+        self.completed = []
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+def sweep_expired_checkpoints(ttl_hours=CHECKPOINT_TTL_HOURS):
+    """CHECKPOINT_TTL_HOURS 동안 갱신되지 않은 체크포인트를 지웁니다."""
+    if not os.path.isdir(CHECKPOINT_DIR):
+        return
+    expire_before = time.time() - ttl_hours * 3600
+    for entry in os.scandir(CHECKPOINT_DIR):
+        if not entry.is_dir():
+            continue
+        state_path = os.path.join(entry.path, "state.json")
+        updated_at = os.path.getmtime(state_path if os.path.exists(state_path) else entry.path)
+        if updated_at < expire_before:
+            shutil.rmtree(entry.path, ignore_errors=True)
+            logging.info(f"[CHECKPOINT] 만료된 체크포인트 삭제: {entry.name}")
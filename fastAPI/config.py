@@ -1,6 +1,7 @@
 import os
+import logging
 from dotenv import load_dotenv
-from logging_loki import LokiHandler
+from fastAPI.prometheus_loki.loki_shipper import BatchedLokiHandler
 from enum import Enum
 
 load_dotenv()  # .env 파일 로드
@@ -18,6 +19,42 @@ QUEUE_URL = os.getenv("QUEUE_URL")
 FONT_BUCKET_NAME = os.getenv("FONT_BUCKET_NAME")
 FONT_CREATE_LOG_BUCKET_NAME = os.getenv("FONT_CREATE_LOG_BUCKET_NAME")
 
+# 웹폰트 패키징 (TTF 업로드와 병렬로 생성)
+WOFF2_QUALITY = int(os.getenv("WOFF2_QUALITY", "11"))
+WEBFONT_WOFF = os.getenv("WEBFONT_WOFF", "0") == "1"
+WEBFONT_SUBSETS = os.getenv("WEBFONT_SUBSETS", "0") == "1"
+# 단계 스크립트 출력을 요청 로그로 전달할 때 초당 최대 줄 수 (0이면 제한 없음)
+SCRIPT_LOG_LINES_PER_SEC = int(os.getenv("SCRIPT_LOG_LINES_PER_SEC", "20"))
+# 요청별 프로파일링: 메시지 플래그나 관리자 API 외에 무작위로 프로파일링할 요청 비율 (0이면 사용 안 함)
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = os.path.join(LOG_DIR, "profiles")
+# 단계 실행 방식: docker (단계마다 컨테이너 실행) | native (서버와 같은 환경에서 단계 프로세스를 직접 실행)
+PIPELINE_BACKEND = os.getenv("PIPELINE_BACKEND", "docker")
+# 폰트 조립 백엔드: fontforge | fonttools (native 실행에서 사용, docker 실행은 scripts/4_run_svg2ttf.sh가 같은 값을 읽음)
+SVG2TTF_BACKEND = os.getenv("SVG2TTF_BACKEND", "fontforge")
+# 상주 폰트 조립 워커(scripts/svg2ttf_worker.sh) 소켓과 워커 기준 result 경로 (native 실행에서 소켓이 있으면 워커로 요청)
+SVG2TTF_WORKER_SOCKET = os.getenv("SVG2TTF_WORKER_SOCKET", os.path.join(RESULT_DIR, ".svg2ttf_worker", "worker.sock"))
+SVG2TTF_WORKER_RESULT_DIR = os.getenv("SVG2TTF_WORKER_RESULT_DIR", "/app/result")
+# 동시에 진행할 폰트 생성 작업 수 (HTTP 요청과 SQS 메시지가 공유)와 그 외에 받아 둘 대기 작업 수
+PIPELINE_WORKERS = int(os.getenv("PIPELINE_WORKERS", "4"))
+PIPELINE_MAX_QUEUED = int(os.getenv("PIPELINE_MAX_QUEUED", "16"))
+# 단계별 워커 수 (0이면 추론은 GPU 메모리, 나머지는 CPU 코어 수 기준으로 자동 설정)
+SCHEDULER_STAGE_SLOTS = {stage: int(os.getenv(f"SCHEDULER_{stage.upper()}_SLOTS", "0")) for stage in ("crop", "inference", "svg", "ttf")}
+# 단계 대기열에서 한 번에 묶어 실행할 최대 작업 수 (추론은 여러 폰트를 한 번의 실행에서 디코딩 배치로 묶음)
+SCHEDULER_STAGE_BATCH = {"inference": int(os.getenv("SCHEDULER_INFERENCE_BATCH", "4"))}
+# 추론 작업 하나에 필요한 GPU 메모리 (MB, 추론 슬롯 자동 설정에 사용)
+INFERENCE_GPU_MEMORY_MB = int(os.getenv("INFERENCE_GPU_MEMORY_MB", "8192"))
+# 처리 중인 SQS 메시지의 가시성 제한 시간 (초). 작업이 끝날 때까지 절반 주기로 연장합니다.
+SQS_VISIBILITY_TIMEOUT = int(os.getenv("SQS_VISIBILITY_TIMEOUT", "300"))
+# SQS 재전송(재시도) 메시지에 더할 우선순위
+SCHEDULER_RETRY_PRIORITY = int(os.getenv("SCHEDULER_RETRY_PRIORITY", "1"))
+# SQS 요청별 단계 체크포인트 (재전송된 메시지는 마지막으로 완료한 단계 다음부터 재개)와 보관 시간
+CHECKPOINT_DIR = os.path.join(RESULT_DIR, "checkpoints")
+CHECKPOINT_TTL_HOURS = float(os.getenv("CHECKPOINT_TTL_HOURS", "24"))
+# GET /jobs로 조회할 수 있는 최근 작업 수와 HTTP 작업의 결과 파일 디렉토리 (result/jobs/<job_id>/, 작업 기록이 지워질 때 함께 삭제)
+JOB_HISTORY_SIZE = int(os.getenv("JOB_HISTORY_SIZE", "1000"))
+JOB_RESULT_DIR = os.path.join(RESULT_DIR, "jobs")
+
 MEMBER_ID_KEY = "memberId"
 AUTHOR_KEY = "author"
 FONT_ID_KEY = "fontId"
@@ -28,12 +65,15 @@ REQUEST_UUID_KEY = "requestUUID"
 
 LOKI_URL = "http://localhost:3100/loki/api/v1/push"
 
-# LokiHandler 생성 (필요한 옵션 설정)
-LOKI_HANDLER = LokiHandler(
+# Loki 로그 전송 핸들러 (큐에 모아 백그라운드에서 일괄 전송)
+LOKI_HANDLER = BatchedLokiHandler(
     url=LOKI_URL,
     tags={"application": "fastapi"},
-    version="1"
+    batch_size=int(os.getenv("LOKI_BATCH_SIZE", "500")),
+    flush_interval=float(os.getenv("LOKI_FLUSH_INTERVAL", "1.0")),
+    max_queue_size=int(os.getenv("LOKI_MAX_QUEUE_SIZE", "10000")),
 )
+LOKI_HANDLER.setFormatter(logging.Formatter('%(levelname)s - %(message)s'))
 
 BACKEND_URL = os.getenv("BACKEND_URL")
 CDN_URL = os.getenv("CDN_URL")
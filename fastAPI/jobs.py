@@ -0,0 +1,168 @@
+import logging
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from fastAPI.config import JOB_HISTORY_SIZE, JOB_RESULT_DIR
+from fastAPI.scheduler import SCHEDULER, SchedulerFull
+from fastAPI.prometheus_loki.stage_metrics import describe_progress
+
+class JobStatus:
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+class Job:
+    """폰트 생성 작업 하나의 상태. GET /jobs/{id}로 조회합니다.
+    job_id는 요청의 requestUUID이며, source는 요청 경로(http, sqs)입니다.
+    priority가 높은 작업이 스케줄러의 작업/단계 슬롯을 먼저 받습니다."""
+    def __init__(self, job_id, font_name, source, priority=0):
+        self.id = job_id
+        self.font_name = font_name
+        self.source = source
+        self.priority = priority
+        self.status = JobStatus.QUEUED
+        self.stage = None
+        self.waiting = False
+        self.progress = None
+        self.stage_durations = {}
+        self.wait_durations = {}
+        self.artifacts = {}
+        self.files = {}
+        self.error = None
+        self.log_file = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self):
+        return self.status in (JobStatus.SUCCEEDED, JobStatus.FAILED)
+
+    def set_waiting(self, stage):
+        """단계 슬롯을 기다리는 중임을 표시합니다."""
+        with self._lock:
+            self.stage = stage
+            self.waiting = True
+            self.progress = None
+
+    def set_stage(self, stage, waited=None):
+        with self._lock:
+            self.stage = stage
+            self.waiting = False
+            self.progress = None
+            if waited is not None:
+                self.wait_durations[stage] = round(waited, 3)
+
+    def record_event(self, event):
+        """run_script가 전달한 단계 스크립트 측정값으로 진행 상황을 갱신합니다."""
+        with self._lock:
+            if event.get("event") == "progress":
+                self.progress = {
+                    "done": event.get("done"),
+                    "total": event.get("total"),
+                    "failed": event.get("failed", 0),
+                    "message": describe_progress(event),
+                }
+            elif event.get("event") == "finished" and event.get("duration") is not None:
+                self.stage_durations[event["stage"]] = event["duration"]
+
+    def add_artifact(self, name, url, path=None):
+        """결과물을 등록합니다. path가 주어지면 GET /jobs/{id}/files/{name}으로 내려받을 수 있습니다."""
+        with self._lock:
+            self.artifacts[name] = url
+            if path:
+                self.files[name] = path
+
+    def to_dict(self):
+        with self._lock:
+            now = self.finished_at or time.time()
+            return {
+                "job_id": self.id,
+                "font_name": self.font_name,
+                "source": self.source,
+                "status": self.status,
+                "priority": self.priority,
+                "stage": self.stage,
+                "waiting": self.waiting,
+                "progress": self.progress,
+                "stage_durations": dict(self.stage_durations),
+                "wait_durations": dict(self.wait_durations),
+                "artifacts": dict(self.artifacts),
+                "error": self.error,
+                "log_file": self.log_file,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "queued_seconds": round((self.started_at or now) - self.created_at, 3),
+                "elapsed_seconds": round(now - self.started_at, 3) if self.started_at else None,
+            }
+
+class JobStore:
+    """최근 작업을 보관합니다. max_jobs를 넘으면 끝난 작업부터 오래된 순으로 작업의 결과 파일 디렉토리와 함께 지웁니다."""
+    def __init__(self, max_jobs=JOB_HISTORY_SIZE):
+        self.max_jobs = max_jobs
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, job):
+        """작업을 등록합니다. 같은 id의 작업이 아직 끝나지 않았으면 ValueError를 발생시킵니다."""
+        evicted = []
+        with self._lock:
+            existing = self._jobs.get(job.id)
+            if existing is not None and not existing.finished:
+                raise ValueError(f"이미 진행 중인 작업입니다: {job.id}")
+            self._jobs.pop(job.id, None)
+            self._jobs[job.id] = job
+            for job_id in [job_id for job_id, old in self._jobs.items() if old.finished]:
+                if len(self._jobs) <= self.max_jobs:
+                    break
+                evicted.append(self._jobs.pop(job_id))
+        # 결과 파일 디렉토리는 HTTP 작업(UUID로 검증된 id)에만 있음
+        for old in evicted:
+            if old.source == "http":
+                shutil.rmtree(os.path.join(JOB_RESULT_DIR, old.id), ignore_errors=True)
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def remove(self, job_id):
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+    def list(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+JOB_STORE = JobStore()
+
+def _run_job(job, fn, args):
+    job.status = JobStatus.RUNNING
+    job.started_at = time.time()
+    try:
+        fn(job, *args)
+        job.status = JobStatus.SUCCEEDED
+    except Exception as e:
+        job.error = str(e)
+        job.status = JobStatus.FAILED
+        logging.error(f"[JOB] 작업 실패 ({job.id}): {e}")
+        raise
+    finally:
+        job.finished_at = time.time()
+
+def submit_job(job, fn, *args, exclusive=()):
+    """작업을 등록하고 스케줄러에서 fn(job, *args)를 실행합니다. concurrent.futures.Future를 반환합니다.
+    HTTP 요청과 SQS 메시지가 같은 스케줄러를 공유합니다. exclusive 키가 같은 작업은 동시에 실행하지 않으며,
+    대기 작업이 가득 차면 SchedulerFull을 발생시킵니다."""
+    JOB_STORE.add(job)
+    try:
+        future = SCHEDULER.submit(job, _run_job, job, fn, args, exclusive=exclusive)
+    except SchedulerFull:
+        JOB_STORE.remove(job.id)
+        raise
+    logging.info(f"[JOB] 작업 등록: {job.id} ({job.source}, {job.font_name}, 우선순위 {job.priority})")
+    return future
@@ -0,0 +1,30 @@
+import os
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import FileResponse
+from fastAPI.jobs import JOB_STORE
+
+router = APIRouter()
+
+def _get_job(job_id):
+    job = JOB_STORE.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"작업을 찾을 수 없습니다: {job_id}")
+    return job
+
+@router.get("/jobs")
+async def list_jobs(limit: int = Query(50, ge=1, le=1000)):
+    """최근 작업 목록 (최신순)"""
+    return [job.to_dict() for job in reversed(JOB_STORE.list()[-limit:])]
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """작업 상태, 현재 단계와 진행 상황, 단계별 소요 시간, 결과물 URL을 반환합니다."""
+    return _get_job(job_id).to_dict()
+
+@router.get("/jobs/{job_id}/files/{name}")
+async def get_job_file(job_id: str, name: str):
+    """HTTP 요청으로 생성한 결과 파일을 내려받습니다."""
+    path = _get_job(job_id).files.get(name)
+    if path is None or not os.path.exists(path):
+        raise HTTPException(status_code=404, detail=f"파일을 찾을 수 없습니다: {name}")
+    return FileResponse(path, filename=name)
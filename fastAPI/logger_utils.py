@@ -1,6 +1,7 @@
 import logging
 import os
 from fastAPI.config import LOG_DIR, LOKI_HANDLER
+from fastAPI.prometheus_loki.loki_shipper import RequestLabelFilter
 
 class RequestIdFormatter(logging.Formatter):
     def __init__(self, fmt=None, datefmt=None, style='%', request_id=''):
@@ -25,13 +26,16 @@ def setup_logger(request_id: str, member_id: str, font_id: str, font_name: str):
     
     if logger.hasHandlers():
         logger.handlers.clear()
+    for log_filter in list(logger.filters):
+        logger.removeFilter(log_filter)
+    # 공유 Loki 핸들러의 포매터를 바꾸지 않고 요청 정보를 Loki 라벨로 전달
+    logger.addFilter(RequestLabelFilter(requestUUID=request_id, fontId=font_id))
     
     file_handler = logging.FileHandler(log_file_path)
     file_formatter = RequestIdFormatter('%(asctime)s - %(levelname)s - %(message)s', request_id=short_id)
     file_handler.setFormatter(file_formatter)
     logger.addHandler(file_handler)
     
-    LOKI_HANDLER.setFormatter(file_formatter)
     logger.addHandler(LOKI_HANDLER)
     console_handler = logging.StreamHandler()
     console_formatter = RequestIdFormatter('%(asctime)s - %(levelname)s - %(message)s', request_id=short_id)
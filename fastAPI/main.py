@@ -4,6 +4,8 @@ import logging
 from fastAPI.config import RESULT_DIR, LOG_DIR, PROJECT_ROOT, LOKI_HANDLER
 from fastAPI.test_api import router as font_router
 from fastAPI.prometheus_loki.prometheus_api import router as metrics_router
+from fastAPI.admin_api import router as admin_router
+from fastAPI.jobs_api import router as jobs_router
 from fastAPI.sqs_utils import start_sqs_polling
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
@@ -37,6 +39,8 @@ async def lifespan(app: FastAPI):
 app = FastAPI(lifespan=lifespan)
 app.include_router(font_router)
 app.include_router(metrics_router)
+app.include_router(admin_router)
+app.include_router(jobs_router)
 
 if __name__ == "__main__":
     # 필요한 디렉토리 생성
@@ -1,10 +1,15 @@
+import uuid
 import fastAPI.config as config
 from pydantic import BaseModel, Field
 
 class FontRequest(BaseModel):
     font_name: str = Field(..., alias=config.FONT_NAME_KEY)
+    font_eng_name: str = Field(..., alias=config.FONT_ENG_NAME)
     member_id: int = Field(..., alias=config.MEMBER_ID_KEY)
     font_id: int = Field(..., alias=config.FONT_ID_KEY)
     template_url: str = Field(..., alias=config.TEMPLATE_URL_KEY)
     author: str = Field(..., alias=config.AUTHOR_KEY)
-    request_uuid: str = Field(..., alias=config.REQUEST_UUID_KEY)
\ No newline at end of file
+    # 작업 id로 결과·로그 디렉토리 경로에 쓰이므로 UUID만 받음
+    request_uuid: uuid.UUID = Field(..., alias=config.REQUEST_UUID_KEY)
+    profile: bool = False
+    priority: int = 0
\ No newline at end of file
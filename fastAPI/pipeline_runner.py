@@ -1,38 +1,217 @@
 import os
+import shutil
+import sys
+from contextlib import nullcontext
+from fastAPI.config import PROJECT_ROOT, SCRIPTS_DIR, WRITTEN_DIR, RESULT_DIR, WOFF2_QUALITY, WEBFONT_WOFF, WEBFONT_SUBSETS, PIPELINE_BACKEND, SVG2TTF_BACKEND, SVG2TTF_WORKER_SOCKET, SVG2TTF_WORKER_RESULT_DIR, INFERENCE_GPU_MEMORY_MB
 from fastAPI.script_utils import run_script
+from fastAPI.scheduler import SCHEDULER
+from fastAPI.prometheus_loki.stage_metrics import stage_timer
+from svg2ttf.webfont import package_webfonts, generated_files
 
-def run_font_pipeline(font_name: str, font_eng_name:str, request_id: str, logger):
-    logger.info(f"폰트 생성 파이프라인 시작...")
-    
-    crop_script = os.path.join(os.getcwd(), "scripts", "1_crop_glyphs.sh")
-    logger.info("글리프 크롭 스크립트 실행 중...")
-    success, error = run_script(crop_script, [font_name], logger, "CROP")
-    if not success:
-        logger.error(f"글리프 크롭 실패: {error}")
-        raise Exception(f"글리프 크롭 실패: {error}")
-    
-    inference_script = os.path.join(os.getcwd(), "scripts", "2_run_inference.sh")
-    logger.info("추론 스크립트 실행 중...")
-    success, error = run_script(inference_script, [font_name], logger, "INFERENCE")
-    if not success:
-        logger.error(f"추론 실패: {error}")
-        raise Exception(f"추론 실패: {error}")
-    
-    jpg2svg_script = os.path.join(os.getcwd(), "scripts", "3_run_jpg2svg.sh")
-    logger.info("JPG에서 SVG 변환 스크립트 실행 중...")
-    success, error = run_script(jpg2svg_script, [font_name], logger, "SVG")
-    if not success:
-        logger.error(f"JPG에서 SVG 변환 실패: {error}")
-        raise Exception(f"JPG에서 SVG 변환 실패: {error}")
-    
-    svg2ttf_script = os.path.join(os.getcwd(), "scripts", "4_run_svg2ttf.sh")
-    logger.info("SVG에서 TTF/WOFF 변환 스크립트 실행 중...")
-    success, error = run_script(svg2ttf_script, ["-f", font_name, "-e", font_eng_name], logger, "TTF/WOFF")
-    if not success:
-        logger.error(f"SVG에서 TTF/WOFF 변환 실패: {error}")
-        raise Exception(f"SVG에서 TTF/WOFF 변환 실패: {error}")
+# (단계, 로그 접두어, 설명) - 파이프라인 순서
+PIPELINE_STEPS = [
+    ("crop", "CROP", "글리프 크롭"),
+    ("inference", "INFERENCE", "추론"),
+    ("svg", "SVG", "JPG에서 SVG 변환"),
+    ("ttf", "TTF/WOFF", "SVG에서 TTF/WOFF 변환"),
+]
+
+def inference_env():
+    """추론 단계에 넘길 GPU 메모리 예산. 스케줄러가 GPU 하나에 여러 추론을 배치하므로 배치 크기 탐색도 슬롯 크기 안에서 합니다."""
+    return {"INFERENCE_GPU_MEMORY_MB": str(INFERENCE_GPU_MEMORY_MB)}
+
+def docker_commands(font_name, font_eng_name, written_dir):
+    """단계별 (명령, 추가 환경 변수). 단계 스크립트가 단계마다 Docker 컨테이너를 실행합니다."""
+    crop_env = {"CROP_INPUT_DIR": written_dir} if written_dir else {}
+    return {
+        "crop": ([os.path.join(SCRIPTS_DIR, "1_crop_glyphs.sh"), font_name], crop_env),
+        "inference": ([os.path.join(SCRIPTS_DIR, "2_run_inference.sh"), font_name], inference_env()),
+        "svg": ([os.path.join(SCRIPTS_DIR, "3_run_jpg2svg.sh"), font_name], {}),
+        # WOFF2는 TTF 업로드와 병렬로 build_webfonts에서 생성
+        "ttf": ([os.path.join(SCRIPTS_DIR, "4_run_svg2ttf.sh"), "-f", font_name, "-e", font_eng_name, "--no-woff2"], {}),
+    }
+
+def _pythonpath(*paths):
+    existing = os.environ.get("PYTHONPATH")
+    return os.pathsep.join([*paths, existing] if existing else paths)
+
+def _worker_path(path):
+    """result 아래 호스트 경로를 상주 폰트 조립 워커(컨테이너) 기준 경로로 바꿉니다."""
+    return os.path.join(SVG2TTF_WORKER_RESULT_DIR, os.path.relpath(path, RESULT_DIR))
+
+def native_commands(font_name, font_eng_name, written_dir):
+    """단계별 (명령, 추가 환경 변수). Docker 없이 서버와 같은 환경에서 단계 진입점을 프로세스로 실행합니다.
+    컨테이너 안의 /app 경로 대신 프로젝트 경로를 인자와 환경 변수로 넘깁니다.
+    없어지는 것은 컨테이너 시작 비용뿐이며 단계마다 새 프로세스를 실행합니다 (추론은 실행마다 모델을 다시 불러옴).
+    fontforge 백엔드는 상주 폰트 조립 워커가 실행 중이면(소켓이 있으면) 4_run_svg2ttf.sh와 같이 워커에 요청합니다."""
+    python = sys.executable
+    resource_dir = os.path.join(PROJECT_ROOT, "resource")
+    crop_dir = os.path.join(RESULT_DIR, "1_cropped", font_name)
+    inference_dir = os.path.join(RESULT_DIR, "2_inference")
+    svg_dir = os.path.join(RESULT_DIR, "3_svg", font_name)
+    ttf_path = os.path.join(RESULT_DIR, "4_fonts", f"{font_name}.ttf")
+    for directory in (os.path.join(crop_dir, "debug"), os.path.join(inference_dir, font_name), svg_dir, os.path.dirname(ttf_path)):
+        os.makedirs(directory, exist_ok=True)
+
+    ttf_args = [svg_dir, ttf_path, font_name, font_eng_name, font_name, "Regular",
+                os.path.join(resource_dir, "UhBee-dami.ttf")]
+    if SVG2TTF_BACKEND == "fonttools":
+        ttf_cmd = [python, os.path.join(PROJECT_ROOT, "svg2ttf", "ttf_builder.py")] + ttf_args
+    elif SVG2TTF_BACKEND == "fontforge" and os.path.exists(SVG2TTF_WORKER_SOCKET):
+        # 워커가 스켈레톤 폰트로 조립 (기본 폰트는 워커가 시작할 때 병합)
+        ttf_cmd = [python, os.path.join(PROJECT_ROOT, "svg2ttf", "worker_client.py"), "--socket", SVG2TTF_WORKER_SOCKET,
+                   "--no_woff2", _worker_path(svg_dir), _worker_path(ttf_path), font_name, font_eng_name, font_name, "Regular"]
+    elif SVG2TTF_BACKEND == "fontforge":
+        fontforge = shutil.which("fontforge")
+        if fontforge is None:
+            raise Exception("fontforge를 찾을 수 없습니다 (SVG2TTF_BACKEND=fonttools로 fontforge 없이 실행할 수 있습니다)")
+        ttf_cmd = [fontforge, "-script", os.path.join(PROJECT_ROOT, "svg2ttf", "svg_to_ttf_converter.py")] + ttf_args
+    else:
+        raise ValueError(f"지원하지 않는 SVG2TTF_BACKEND입니다: {SVG2TTF_BACKEND} (fontforge | fonttools)")
+
+    return {
+        "crop": ([python, os.path.join(PROJECT_ROOT, "crop", "glyph_cropper.py"), written_dir, crop_dir], {
+            "PYTHONPATH": _pythonpath(resource_dir),
+            "KOREAN_CHARS_PATH": os.path.join(resource_dir, "korean_reference_chars.py"),
+            "TEMPLATE_GENERATOR_PATH": os.path.join(PROJECT_ROOT, "make_template", "template_generator.py"),
+            "CROP_DEBUG_DIR": os.path.join(crop_dir, "debug"),
+        }),
+        "inference": ([python, os.path.join(PROJECT_ROOT, "inference", "infer_dm_kor.py"),
+                       "--reference_dir", os.path.join(RESULT_DIR, "1_cropped"), "--output_dir", inference_dir,
+                       "--font_name", font_name], {
+            "PYTHONPATH": _pythonpath(PROJECT_ROOT, os.path.join(PROJECT_ROOT, "inference", "resources"), resource_dir),
+            "APP_BASE_PATH": PROJECT_ROOT,
+            "PYTORCH_CUDA_ALLOC_CONF": os.getenv("PYTORCH_CUDA_ALLOC_CONF", "expandable_segments:True"),
+            **inference_env(),
+        }),
+        "svg": ([python, os.path.join(PROJECT_ROOT, "jpg2svg", "jpg_to_svg_converter.py"),
+                 os.path.join(inference_dir, font_name), svg_dir], {
+            "PYTHONPATH": _pythonpath(resource_dir),
+        }),
+        # WOFF2는 TTF 업로드와 병렬로 build_webfonts에서 생성
+        "ttf": (ttf_cmd, {
+            "PYTHONPATH": _pythonpath(resource_dir),
+            "SVG2TTF_WOFF2": "0",
+        }),
+    }
+
+class FanoutLogger:
+    """여러 작업을 묶어 실행한 단계의 출력을 각 작업의 요청 로그에 함께 남깁니다."""
+    def __init__(self, loggers):
+        self.loggers = loggers
+
+    def __getattr__(self, name):
+        def log(*args, **kwargs):
+            for logger in self.loggers:
+                getattr(logger, name)(*args, **kwargs)
+        return log
+
+class StageCommand:
+    """단계 명령을 실행하는 단계 함수. 실패하면 예외를 발생시킵니다.
+
+    batch_key가 있는 단계(추론)는 스케줄러가 같은 키로 대기 중인 다른 작업과 묶어 run_batch로 실행합니다.
+    명령의 마지막 인자가 폰트 이름이므로, 묶어 실행할 때는 마지막 인자 자리에 모든 폰트 이름을 넘깁니다."""
+    def __init__(self, stage, cmd, logger, prefix, description, env, on_event, batchable=False):
+        self.stage = stage
+        self.cmd = cmd
+        self.logger = logger
+        self.prefix = prefix
+        self.description = description
+        self.env = env
+        self.on_event = on_event
+        self.after = []
+        # 명령(폰트 이름 제외)과 환경 변수가 같아야 묶을 수 있음 (프로파일링 요청은 STAGE_PROFILE_DIR가 달라 따로 실행)
+        self.batch_key = (tuple(cmd[:-1]), tuple(sorted(env.items()))) if batchable else None
+
+    def then(self, fn):
+        """단계가 성공한 뒤 실행할 함수를 추가합니다 (예: 체크포인트 기록)."""
+        self.after.append(fn)
+        return self
+
+    def _finish(self):
+        for fn in self.after:
+            fn()
+
+    def __call__(self):
+        self.logger.info(f"{self.description} 실행 중...")
+        success, error = run_script(self.cmd[0], self.cmd[1:], self.logger, self.prefix, stage=self.stage, env=self.env, on_event=self.on_event)
+        if not success:
+            self.logger.error(f"{self.description} 실패: {error}")
+            raise Exception(f"{self.description} 실패: {error}")
+        self._finish()
+
+    @staticmethod
+    def run_batch(commands):
+        """같은 batch_key의 단계를 한 번의 명령으로 실행하고 단계별 예외(성공이면 None) 목록을 반환합니다.
+        묶어 실행한 명령이 실패하면 한 폰트의 문제로 다른 작업까지 실패하지 않도록 작업별로 따로 다시 실행합니다."""
+        first = commands[0]
+        font_names = [command.cmd[-1] for command in commands]
+        logger = FanoutLogger([command.logger for command in commands])
+        on_events = [command.on_event for command in commands if command.on_event]
+        def on_event(event):
+            for callback in on_events:
+                callback(event)
+        logger.info(f"{first.description} 실행 중... (폰트 {len(font_names)}개 함께 실행: {', '.join(font_names)})")
+        cmd = first.cmd[:-1] + font_names
+        success, error = run_script(cmd[0], cmd[1:], logger, first.prefix, stage=first.stage, env=first.env, on_event=on_event)
+        if not success and len(commands) == 1:
+            logger.error(f"{first.description} 실패: {error}")
+            return [Exception(f"{first.description} 실패: {error}")]
+        if not success:
+            logger.warning(f"{first.description} 묶음 실행 실패: {error} (작업별로 다시 실행합니다)")
+        errors = []
+        for command in commands:
+            try:
+                if success:
+                    command._finish()
+                else:
+                    command()
+                errors.append(None)
+            except Exception as e:
+                errors.append(e)
+        return errors
+
+def run_font_pipeline(font_name: str, font_eng_name:str, request_id: str, logger, profile=None, job=None, written_dir=None, checkpoint=None, backend=PIPELINE_BACKEND):
+    """폰트 생성 단계를 실행하고 TTF 경로를 반환합니다.
+    backend가 docker면 단계 스크립트(scripts/1~4)가 컨테이너를 실행하고, native면 단계 진입점을 직접 실행합니다."""
+    logger.info(f"폰트 생성 파이프라인 시작 (실행 방식: {backend})...")
+    if backend == "docker":
+        commands = docker_commands(font_name, font_eng_name, written_dir)
+    elif backend == "native":
+        commands = native_commands(font_name, font_eng_name, written_dir or WRITTEN_DIR)
+    else:
+        raise ValueError(f"지원하지 않는 PIPELINE_BACKEND입니다: {backend} (docker | native)")
+    # 프로파일링 요청이면 단계가 프로파일을 저장할 디렉토리를 전달
+    script_env = profile.env() if profile else {}
+    # 작업(GET /jobs/{id})으로 조회할 수 있도록 단계와 진행 상황을 갱신
+    on_event = job.record_event if job else None
+
+    # 각 단계는 스케줄러의 단계별 워커 풀에서 실행되고, 끝나면 다음 단계 대기열로 넘어갑니다.
+    # 여러 작업의 서로 다른 단계(예: 한 작업의 추론과 다른 작업의 크롭)가 동시에 진행됩니다.
+    # 추론은 대기 중인 다른 작업과 묶어 한 번의 실행에서 여러 폰트를 디코딩 배치로 처리할 수 있음
+    steps = []
+    for stage, prefix, description in PIPELINE_STEPS:
+        cmd, stage_env = commands[stage]
+        command = StageCommand(stage, cmd, logger, prefix, description, {**script_env, **stage_env}, on_event,
+                               batchable=(stage == "inference"))
+        steps.append((stage, command))
+    if checkpoint is not None:
+        # 이전 실행(SQS 재전송 전)에서 완료한 단계는 건너뛰고, 단계가 끝날 때마다 완료를 기록
+        steps = [(stage, command.then(lambda stage=stage: checkpoint.mark_done(stage)))
+                 for stage, command in steps if not checkpoint.is_done(stage)]
+    SCHEDULER.run_stages(job, steps).result()
     
     logger.info(f"폰트 '{font_name}' 생성 파이프라인이 성공적으로 완료되었습니다.")
-    result_ttf_path = os.path.join(os.getcwd(), "result", "4_fonts", f"{font_name}.ttf")
-    result_woff_path = os.path.join(os.getcwd(), "result", "4_fonts", f"{font_name}.woff2")
-    return result_ttf_path, result_woff_path
\ No newline at end of file
+    result_ttf_path = os.path.join(RESULT_DIR, "4_fonts", f"{font_name}.ttf")
+    return result_ttf_path
+
+def build_webfonts(ttf_path: str, basename: str, logger, profile=None, output_dir=None):
+    """TTF로부터 WOFF2(및 설정에 따라 WOFF, unicode-range 서브셋)를 output_dir(기본값 result/4_fonts/webfonts)에 생성하고
+    (경로, 크기) 목록을 반환합니다. 첫 번째 항목은 항상 전체 WOFF2 파일입니다."""
+    logger.info(f"웹폰트 패키징 시작 (brotli 품질 {WOFF2_QUALITY}, WOFF: {WEBFONT_WOFF}, 서브셋: {WEBFONT_SUBSETS})")
+    output_dir = output_dir or os.path.join(RESULT_DIR, "4_fonts", "webfonts")
+    with stage_timer("woff2"), profile.section("woff2") if profile else nullcontext():
+        result = package_webfonts(ttf_path, output_dir, WOFF2_QUALITY, WEBFONT_WOFF, WEBFONT_SUBSETS, basename=basename)
+    files = generated_files(result)
+    logger.info("웹폰트 패키징 완료: " + ', '.join(f"{os.path.basename(p)} ({s:,} 바이트)" for p, s in files))
+    return files
\ No newline at end of file
@@ -0,0 +1,92 @@
+import cProfile
+import os
+import pstats
+import random
+import shutil
+import tarfile
+import threading
+from contextlib import contextmanager
+from fastAPI.config import PROFILE_DIR, PROFILE_SAMPLE_RATE
+from fastAPI.prometheus_loki.prometheus_config import PIPELINE_PROFILED_REQUESTS
+
+class ProfileTrigger:
+    """요청을 프로파일링할지 결정합니다.
+    메시지에 profile 플래그가 있거나, 관리자 API로 예약된 횟수가 남아 있거나, sample_rate 확률에 당첨되면 프로파일링합니다."""
+    def __init__(self, sample_rate=PROFILE_SAMPLE_RATE):
+        self.sample_rate = sample_rate
+        self._armed = 0
+        self._lock = threading.Lock()
+
+    def arm(self, count):
+        with self._lock:
+            self._armed += count
+            return self._armed
+
+    @property
+    def armed(self):
+        return self._armed
+
+    def decide(self, requested=False):
+        """프로파일링 사유(message, admin, sampled) 또는 None을 반환합니다."""
+        if requested:
+            return "message"
+        with self._lock:
+            if self._armed > 0:
+                self._armed -= 1
+                return "admin"
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return "sampled"
+        return None
+
+PROFILE_TRIGGER = ProfileTrigger()
+
+class RequestProfile:
+    """요청 하나의 프로파일 결과 디렉토리.
+    단계 스크립트에는 STAGE_PROFILE_DIR 환경 변수로 디렉토리를 넘기고, 서버 안에서 실행하는 구간은 section()으로 측정합니다."""
+    def __init__(self, request_id, trigger, logger):
+        self.request_id = request_id
+        self.trigger = trigger
+        self.logger = logger
+        self.dir = os.path.join(PROFILE_DIR, request_id)
+        os.makedirs(self.dir, exist_ok=True)
+        PIPELINE_PROFILED_REQUESTS.labels(trigger=trigger).inc()
+        logger.info(f"요청 프로파일링 활성화 (사유: {trigger}): {self.dir}")
+
+    def env(self):
+        return {"STAGE_PROFILE_DIR": self.dir}
+
+    @contextmanager
+    def section(self, name):
+        """현재 스레드에서 실행되는 구간을 cProfile로 측정하여 <name>.prof, <name>.txt로 저장합니다."""
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError as e:
+            # 같은 프로세스에서 다른 프로파일러가 이미 동작 중인 경우
+            self.logger.warning(f"'{name}' 구간 프로파일링 건너뜀: {e}")
+            yield
+            return
+        try:
+            yield
+        finally:
+            profiler.disable()
+            base = os.path.join(self.dir, name)
+            profiler.dump_stats(base + ".prof")
+            with open(base + ".txt", "w", encoding="utf-8") as f:
+                pstats.Stats(profiler, stream=f).sort_stats("cumulative").print_stats(50)
+
+    def archive(self):
+        """프로파일 디렉토리를 tar.gz 하나로 묶고 디렉토리를 지운 뒤 아카이브 경로를 반환합니다."""
+        archive_path = self.dir + ".tar.gz"
+        with tarfile.open(archive_path, "w:gz") as tar:
+            tar.add(self.dir, arcname=self.request_id)
+        shutil.rmtree(self.dir, ignore_errors=True)
+        self.logger.info(f"프로파일 결과 압축 완료: {archive_path} ({os.path.getsize(archive_path):,} 바이트)")
+        return archive_path
+
+def start_request_profile(request_id, logger, requested=False):
+    """프로파일링 대상 요청이면 RequestProfile을, 아니면 None을 반환합니다."""
+    trigger = PROFILE_TRIGGER.decide(requested)
+    if trigger is None:
+        return None
+    return RequestProfile(request_id, trigger, logger)
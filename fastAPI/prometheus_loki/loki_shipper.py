@@ -0,0 +1,126 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+import requests
+from prometheus_client import Counter
+
+# 큐가 가득 차 버려진 로그 레코드 수
+LOKI_DROPPED_RECORDS = Counter(
+    'loki_dropped_records_total',
+    'Number of log records dropped before being shipped to Loki',
+    ['reason']
+)
+
+# 전송에 실패한 Loki push 요청 수
+LOKI_PUSH_ERRORS = Counter(
+    'loki_push_errors_total',
+    'Number of failed Loki push requests'
+)
+
+# 로그 레코드에 이 속성으로 dict를 붙이면 Loki 라벨로 전송 (RequestLabelFilter 참고)
+LABELS_ATTR = "loki_labels"
+
+
+class RequestLabelFilter(logging.Filter):
+    """요청별 로거에 붙여 requestUUID, fontId 등을 Loki 라벨로 전달합니다."""
+    def __init__(self, **labels):
+        super().__init__()
+        self.labels = {key: str(value) for key, value in labels.items() if value is not None}
+
+    def filter(self, record):
+        setattr(record, LABELS_ATTR, {**getattr(record, LABELS_ATTR, {}), **self.labels})
+        return True
+
+
+class BatchedLokiHandler(logging.Handler):
+    """로그를 큐에 넣고 백그라운드 스레드가 모아서 Loki push API로 전송하는 핸들러.
+
+    emit은 큐에 넣기만 하므로 로깅이 파이프라인 진행을 막지 않습니다.
+    큐 사용량이 sample_watermark를 넘으면 INFO 이하 레코드는 sample_rate 중 하나만 남기고,
+    큐가 가득 차면 새 레코드를 버립니다. WARNING 이상은 샘플링하지 않고, 큐가 가득 차면 가장 오래된 레코드를 대신 버립니다.
+    """
+    def __init__(self, url, tags=None, batch_size=500, flush_interval=1.0, max_queue_size=10000,
+                 sample_watermark=0.8, sample_rate=10, timeout=5.0):
+        super().__init__()
+        self.url = url
+        self.tags = dict(tags or {})
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.sample_watermark = int(max_queue_size * sample_watermark)
+        self.sample_rate = sample_rate
+        self.timeout = timeout
+        self.queue = queue.Queue(maxsize=max_queue_size)
+        self.session = requests.Session()
+        self._sample_counter = 0
+        self._stopped = threading.Event()
+        self._worker = threading.Thread(target=self._run, name="loki-shipper", daemon=True)
+        self._worker.start()
+        atexit.register(self.close)
+
+    def emit(self, record):
+        try:
+            if record.levelno < logging.WARNING and self.queue.qsize() >= self.sample_watermark:
+                self._sample_counter += 1
+                if self._sample_counter % self.sample_rate:
+                    LOKI_DROPPED_RECORDS.labels(reason="sampled").inc()
+                    return
+            labels = {**self.tags, "level": record.levelname.lower(), **getattr(record, LABELS_ATTR, {})}
+            self._put((int(record.created * 1e9), self.format(record), labels), record.levelno >= logging.WARNING)
+        except Exception:
+            self.handleError(record)
+
+    def _put(self, entry, important):
+        try:
+            self.queue.put_nowait(entry)
+            return
+        except queue.Full:
+            pass
+        LOKI_DROPPED_RECORDS.labels(reason="queue_full").inc()
+        if important:
+            # WARNING 이상은 가장 오래된 레코드를 버리고 자리를 만듦
+            try:
+                self.queue.get_nowait()
+                self.queue.put_nowait(entry)
+            except (queue.Empty, queue.Full):
+                pass
+
+    def _drain(self):
+        """최대 batch_size개 또는 flush_interval 동안 모인 레코드를 꺼냅니다."""
+        entries = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(entries) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                entries.append(self.queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return entries
+
+    def _push(self, entries):
+        streams = {}
+        for timestamp, line, labels in entries:
+            key = tuple(sorted(labels.items()))
+            streams.setdefault(key, []).append([str(timestamp), line])
+        payload = {"streams": [{"stream": dict(key), "values": values} for key, values in streams.items()]}
+        try:
+            response = self.session.post(self.url, json=payload, timeout=self.timeout)
+            response.raise_for_status()
+        except Exception:
+            # 로그 전송 실패를 다시 로깅하면 재귀가 되므로 메트릭으로만 기록
+            LOKI_PUSH_ERRORS.inc()
+
+    def _run(self):
+        while not self._stopped.is_set() or not self.queue.empty():
+            entries = self._drain()
+            if entries:
+                self._push(entries)
+
+    def close(self):
+        if not self._stopped.is_set():
+            self._stopped.set()
+            self._worker.join(timeout=self.timeout + self.flush_interval)
+        super().close()
@@ -1,4 +1,4 @@
-from prometheus_client import Counter, Histogram
+from prometheus_client import Counter, Gauge, Histogram
 
 # SQS 폴링 시도 횟수를 기록
 SQS_POLL_TOTAL = Counter(
@@ -29,4 +29,95 @@ SQS_PROCESSING_DURATION = Histogram(
     'sqs_processing_duration_seconds', 
     'Time spent processing an SQS message',
     buckets=(30, 60, 90, 120, 150, 180, 210, 240, 270, 300, 360, 420, 480) 
-)
\ No newline at end of file
+)
+
+# 파이프라인 단계별 소요 시간 (stage: download, crop, inference, inference_encode, inference_decode, svg, ttf, woff2, upload)
+PIPELINE_STAGE_DURATION = Histogram(
+    'pipeline_stage_duration_seconds',
+    'Time spent in each font pipeline stage',
+    ['stage', 'outcome'],
+    buckets=(0.5, 1, 2, 5, 10, 20, 30, 45, 60, 90, 120, 180, 240, 300, 420, 600)
+)
+
+# 단계별 글리프 처리량 (마지막 요청 기준, 글리프/초)
+PIPELINE_GLYPH_THROUGHPUT = Gauge(
+    'pipeline_glyph_throughput',
+    'Glyphs processed per second in the last run of each stage',
+    ['stage']
+)
+
+# 단계별 최대 메모리 사용량 (마지막 요청 기준, 바이트)
+PIPELINE_STAGE_PEAK_RSS = Gauge(
+    'pipeline_stage_peak_rss_bytes',
+    'Peak resident set size of the stage process in its last run',
+    ['stage']
+)
+
+PIPELINE_STAGE_PEAK_GPU_MEMORY = Gauge(
+    'pipeline_stage_peak_gpu_memory_bytes',
+    'Peak GPU memory allocated by the stage in its last run',
+    ['stage']
+)
+
+# 스크립트 실행부터 컨테이너 안의 단계 프로세스가 시작될 때까지 걸린 시간
+PIPELINE_CONTAINER_START_LATENCY = Histogram(
+    'pipeline_container_start_seconds',
+    'Time from launching a stage script until its process starts inside the container',
+    ['stage'],
+    buckets=(0.1, 0.25, 0.5, 1, 2, 3, 5, 10, 20, 30, 60)
+)
+
+# 단계 스크립트가 error 이벤트로 보고한 글리프 단위 실패 수
+PIPELINE_STAGE_ERRORS = Counter(
+    'pipeline_stage_errors_total',
+    'Per-item errors reported by pipeline stage scripts',
+    ['stage']
+)
+
+# 단계 스크립트 출력 줄 수 (disposition: logged, suppressed, event)
+PIPELINE_SCRIPT_OUTPUT_LINES = Counter(
+    'pipeline_script_output_lines_total',
+    'Lines read from pipeline stage scripts by how they were handled',
+    ['stage', 'disposition']
+)
+
+# 프로파일링한 요청 수 (trigger: message, admin, sampled)
+PIPELINE_PROFILED_REQUESTS = Counter(
+    'pipeline_profiled_requests_total',
+    'Requests run with per-request profiling enabled',
+    ['trigger']
+)
+
+# 스케줄러 작업 슬롯과 단계 대기열의 대기 작업 수 (stage: job, crop, inference, svg, ttf)
+SCHEDULER_QUEUE_DEPTH = Gauge(
+    'scheduler_queue_depth',
+    'Jobs waiting for a scheduler slot',
+    ['stage']
+)
+
+# 스케줄러 작업 슬롯이나 단계 워커를 얻기까지 기다린 시간
+SCHEDULER_WAIT_SECONDS = Histogram(
+    'scheduler_wait_seconds',
+    'Time jobs waited for a scheduler slot',
+    ['stage'],
+    buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600, 1200)
+)
+
+SCHEDULER_SLOTS = Gauge(
+    'scheduler_slots',
+    'Configured scheduler slots',
+    ['stage']
+)
+
+SCHEDULER_SLOTS_IN_USE = Gauge(
+    'scheduler_slots_in_use',
+    'Scheduler slots currently in use',
+    ['stage']
+)
+
+# 대기 작업이 가득 차 거절한 작업 수 (source: http, sqs)
+SCHEDULER_REJECTED_JOBS = Counter(
+    'scheduler_rejected_jobs_total',
+    'Jobs rejected by scheduler admission control',
+    ['source']
+)
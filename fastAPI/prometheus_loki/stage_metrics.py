@@ -0,0 +1,71 @@
+import json
+import time
+from contextlib import contextmanager
+from fastAPI.prometheus_loki.prometheus_config import (
+    PIPELINE_STAGE_DURATION, PIPELINE_GLYPH_THROUGHPUT, PIPELINE_STAGE_PEAK_RSS,
+    PIPELINE_STAGE_PEAK_GPU_MEMORY, PIPELINE_CONTAINER_START_LATENCY, PIPELINE_STAGE_ERRORS,
+)
+
+# 단계 스크립트가 측정값을 보고하는 줄의 접두어 (resource/stage_metrics.py와 동일)
+METRIC_PREFIX = "@@metric "
+
+def parse_metric_line(line):
+    """METRIC_PREFIX로 시작하는 줄이면 측정값 dict를, 아니면 None을 반환합니다."""
+    if not line.startswith(METRIC_PREFIX):
+        return None
+    try:
+        return json.loads(line[len(METRIC_PREFIX):])
+    except ValueError:
+        return None
+
+def observe_stage(stage, outcome, seconds):
+    PIPELINE_STAGE_DURATION.labels(stage=stage, outcome=outcome).observe(seconds)
+
+@contextmanager
+def stage_timer(stage):
+    """블록의 소요 시간을 성공/실패 결과와 함께 기록합니다."""
+    start_time = time.time()
+    outcome = "failure"
+    try:
+        yield
+        outcome = "success"
+    finally:
+        observe_stage(stage, outcome, time.time() - start_time)
+
+def record_stage_event(event, launch_time, script_stage=None):
+    """단계 스크립트가 보고한 측정값을 메트릭으로 기록합니다.
+
+    스크립트 전체 소요 시간은 run_script가 기록하므로, 스크립트 단계(script_stage)와 다른
+    세부 단계(예: inference_encode)의 소요 시간만 여기서 기록합니다.
+    """
+    stage = event.get("stage")
+    if not stage:
+        return
+    if event.get("event") == "started" and "started_at" in event:
+        PIPELINE_CONTAINER_START_LATENCY.labels(stage=stage).observe(max(0.0, event["started_at"] - launch_time))
+        return
+    if event.get("event") == "error":
+        PIPELINE_STAGE_ERRORS.labels(stage=stage).inc()
+        return
+    if event.get("event") != "finished":
+        return
+
+    duration = event.get("duration")
+    if duration is not None and stage != script_stage:
+        observe_stage(stage, "success", duration)
+    if duration and event.get("glyphs"):
+        PIPELINE_GLYPH_THROUGHPUT.labels(stage=stage).set(event["glyphs"] / duration)
+    if event.get("peak_rss_bytes"):
+        PIPELINE_STAGE_PEAK_RSS.labels(stage=stage).set(event["peak_rss_bytes"])
+    if event.get("peak_gpu_bytes"):
+        PIPELINE_STAGE_PEAK_GPU_MEMORY.labels(stage=stage).set(event["peak_gpu_bytes"])
+
+def describe_progress(event):
+    """progress 이벤트를 요청 로그용 한 줄로 바꿉니다. progress 이벤트가 아니면 None을 반환합니다.
+    (error 이벤트는 단계 스크립트가 같은 내용을 ERROR 로그로도 출력하므로 메트릭으로만 기록합니다.)"""
+    if event.get("event") != "progress":
+        return None
+    done, total = event.get("done", 0), event.get("total") or 0
+    percent = f" ({done * 100 // total}%)" if total else ""
+    failed = f", 실패 {event['failed']}개" if event.get("failed") else ""
+    return f"진행: {done}/{total}{percent}{failed}"
@@ -22,13 +22,13 @@ def is_s3_image_url(url: str) -> bool:
     # img_extensions = ['.jpg', '.jpeg', '.png']
     # return any(url.lower().endswith(ext) for ext in img_extensions)
 
-def download_image_from_s3(memberId: str, font_name:str, url: str, logger: logging.Logger) -> Tuple[bool, Optional[str]]:
+def download_image_from_s3(memberId: str, font_name:str, url: str, logger: logging.Logger, written_dir: Optional[str] = None) -> Tuple[bool, Optional[str]]:
     if not is_s3_image_url(url):
         logger.error(f"URL is not a valid S3 image URL: {url}")
         raise ValueError(f"URL is not a valid S3 image URL: {url}")
         
-    # Create 'written' directory if it doesn't exist
-    written_dir = os.path.join(PROJECT_ROOT, "written")
+    # Create 'written' directory (or the per-request directory) if it doesn't exist
+    written_dir = written_dir or os.path.join(PROJECT_ROOT, "written")
     os.makedirs(written_dir, exist_ok=True)
     
     try:
@@ -0,0 +1,324 @@
+import heapq
+import itertools
+import logging
+import os
+import subprocess
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from fastAPI.config import (
+    PIPELINE_WORKERS, PIPELINE_MAX_QUEUED, SCHEDULER_STAGE_SLOTS, INFERENCE_GPU_MEMORY_MB, SCHEDULER_STAGE_BATCH,
+)
+from fastAPI.prometheus_loki.prometheus_config import (
+    SCHEDULER_QUEUE_DEPTH, SCHEDULER_WAIT_SECONDS, SCHEDULER_SLOTS, SCHEDULER_SLOTS_IN_USE, SCHEDULER_REJECTED_JOBS,
+)
+
+# 작업 풀 자체도 하나의 슬롯 그룹으로 다룸 (메트릭 stage 라벨)
+JOB_STAGE = "job"
+# 전용 워커 풀에서 실행하는 단계 (파이프라인 순서)
+PIPELINE_STAGES = ("crop", "inference", "svg", "ttf")
+
+class SchedulerFull(Exception):
+    """대기 중인 작업이 가득 차 새 작업을 받을 수 없는 경우"""
+
+class PrioritySlots:
+    """동시 사용 수가 capacity로 제한된 슬롯.
+    비어 있는 슬롯이 없으면 우선순위가 높은 순, 같으면 먼저 요청한 순으로 슬롯을 넘겨받습니다."""
+    def __init__(self, stage, capacity):
+        self.stage = stage
+        self.capacity = max(1, capacity)
+        self.in_use = 0
+        self._waiters = []  # (-우선순위, 순번, Event)
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        SCHEDULER_SLOTS.labels(stage=stage).set(self.capacity)
+
+    @property
+    def waiting(self):
+        return len(self._waiters)
+
+    def _update_gauges(self):
+        SCHEDULER_QUEUE_DEPTH.labels(stage=self.stage).set(len(self._waiters))
+        SCHEDULER_SLOTS_IN_USE.labels(stage=self.stage).set(self.in_use)
+
+    def acquire(self, priority=0):
+        """슬롯을 얻을 때까지 기다리고 대기 시간(초)을 반환합니다."""
+        start_time = time.monotonic()
+        with self._lock:
+            if self.in_use < self.capacity and not self._waiters:
+                self.in_use += 1
+                self._update_gauges()
+                waiter = None
+            else:
+                waiter = (-priority, next(self._seq), threading.Event())
+                heapq.heappush(self._waiters, waiter)
+                self._update_gauges()
+        if waiter is not None:
+            waiter[2].wait()
+        waited = time.monotonic() - start_time
+        SCHEDULER_WAIT_SECONDS.labels(stage=self.stage).observe(waited)
+        return waited
+
+    def release(self):
+        with self._lock:
+            if self._waiters:
+                # 사용 중인 슬롯 수는 그대로 두고 가장 우선순위가 높은 대기자에게 넘김
+                heapq.heappop(self._waiters)[2].set()
+            else:
+                self.in_use -= 1
+            self._update_gauges()
+
+    @contextmanager
+    def hold(self, priority=0):
+        waited = self.acquire(priority)
+        try:
+            yield waited
+        finally:
+            self.release()
+
+def detect_inference_slots(gpu_memory_mb=INFERENCE_GPU_MEMORY_MB):
+    """GPU 메모리로 동시에 실행할 수 있는 추론 수를 계산합니다 (GPU가 없으면 1)."""
+    try:
+        output = subprocess.run(
+            ["nvidia-smi", "--query-gpu=memory.total", "--format=csv,noheader,nounits"],
+            capture_output=True, text=True, timeout=10, check=True,
+        ).stdout
+    except (OSError, subprocess.SubprocessError):
+        return 1
+    total_mb = sum(int(line) for line in output.split() if line.strip().isdigit())
+    return max(1, total_mb // max(1, gpu_memory_mb))
+
+def default_stage_workers():
+    """단계별 워커 수. SCHEDULER_<STAGE>_SLOTS가 0이면 추론은 GPU 메모리, 나머지는 CPU 코어 수로 정합니다."""
+    cores = os.cpu_count() or 1
+    slots = {}
+    for stage in PIPELINE_STAGES:
+        configured = SCHEDULER_STAGE_SLOTS.get(stage, 0)
+        if configured > 0:
+            slots[stage] = configured
+        elif stage == "inference":
+            slots[stage] = detect_inference_slots()
+        else:
+            slots[stage] = max(1, cores // 2)
+    return slots
+
+class PipelineRun:
+    """한 작업의 단계 목록 [(stage, fn), ...]을 순서대로 실행하는 상태.
+    단계가 끝나면 그 단계의 워커가 다음 단계 대기열로 넘기고, 마지막 단계가 끝나면 future를 완료합니다.
+
+    fn에 batch_key 속성(None이 아닌 값)과 run_batch(fns) 함수가 있으면, 같은 batch_key로 대기 중인
+    다른 작업의 단계와 묶어 run_batch로 한 번에 실행할 수 있습니다 (예: 여러 폰트를 한 번에 추론)."""
+    def __init__(self, scheduler, job, steps):
+        self.scheduler = scheduler
+        self.job = job
+        self.priority = job.priority if job is not None else 0
+        self.steps = list(steps)
+        self.index = 0
+        self.enqueued_at = None
+        self.future = Future()
+
+    def advance(self):
+        if self.index >= len(self.steps):
+            self.future.set_result(None)
+            return
+        stage, fn = self.steps[self.index]
+        pool = self.scheduler.stage_pools.get(stage)
+        if pool is None:
+            # 워커 풀이 없는 단계는 넘겨준 스레드에서 바로 실행
+            self.execute(stage, fn, 0.0)
+            return
+        if self.job is not None:
+            self.job.set_waiting(stage)
+        self.enqueued_at = time.monotonic()
+        pool.put(self)
+
+    @property
+    def current_fn(self):
+        return self.steps[self.index][1]
+
+    def start(self, stage, waited):
+        if self.job is not None:
+            self.job.set_stage(stage, waited)
+
+    def finish(self, error=None):
+        """현재 단계를 끝내고 다음 단계로 넘깁니다. error가 있으면 이후 단계는 실행하지 않습니다."""
+        if error is not None:
+            self.future.set_exception(error)
+            return
+        self.index += 1
+        self.advance()
+
+    def execute(self, stage, fn, waited):
+        self.start(stage, waited)
+        try:
+            fn()
+        except BaseException as e:
+            self.finish(e)
+            return
+        self.finish()
+
+class StagePool:
+    """단계 하나의 워커 풀과 대기열.
+    워커는 대기열에서 우선순위가 높은 순(같으면 먼저 들어온 순)으로 작업을 꺼내 단계를 실행하고
+    다음 단계 대기열로 넘깁니다. 단계마다 워커가 따로 있으므로 서로 다른 작업이 서로 다른 단계를 동시에 실행합니다.
+    max_batch가 2 이상이면 같은 batch_key로 대기 중인 작업을 최대 max_batch개까지 묶어 한 번에 실행합니다."""
+    def __init__(self, stage, workers, max_batch=1):
+        self.stage = stage
+        self.workers = max(1, workers)
+        self.max_batch = max(1, max_batch)
+        self.busy = 0
+        self._queue = []  # (-우선순위, 순번, PipelineRun)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        SCHEDULER_SLOTS.labels(stage=stage).set(self.workers)
+        for i in range(self.workers):
+            threading.Thread(target=self._work, name=f"stage-{stage}-{i}", daemon=True).start()
+
+    @property
+    def waiting(self):
+        return len(self._queue)
+
+    def _update_gauges(self):
+        SCHEDULER_QUEUE_DEPTH.labels(stage=self.stage).set(len(self._queue))
+        SCHEDULER_SLOTS_IN_USE.labels(stage=self.stage).set(self.busy)
+
+    def put(self, run):
+        with self._cond:
+            heapq.heappush(self._queue, (-run.priority, next(self._seq), run))
+            self._update_gauges()
+            self._cond.notify()
+
+    def _take_batch(self, run):
+        """run과 같은 batch_key로 대기 중인 작업을 우선순위 순으로 꺼내 함께 반환합니다 (_cond를 잡은 상태에서 호출)."""
+        batch_key = getattr(run.current_fn, "batch_key", None)
+        if batch_key is None or self.max_batch < 2:
+            return [run]
+        batch = [run]
+        for item in sorted(self._queue):
+            if len(batch) >= self.max_batch:
+                break
+            if getattr(item[2].current_fn, "batch_key", None) == batch_key:
+                batch.append(item[2])
+        if len(batch) > 1:
+            self._queue = [item for item in self._queue if item[2] not in batch]
+            heapq.heapify(self._queue)
+        return batch
+
+    def _run_batch(self, batch, now):
+        for run in batch:
+            waited = now - run.enqueued_at
+            SCHEDULER_WAIT_SECONDS.labels(stage=self.stage).observe(waited)
+            run.start(self.stage, waited)
+        logging.info(f"[SCHEDULER] {self.stage} 단계 작업 {len(batch)}개를 묶어 실행합니다: "
+                     + ', '.join(str(run.job.id) for run in batch if run.job is not None))
+        try:
+            errors = batch[0].current_fn.run_batch([run.current_fn for run in batch])
+        except BaseException as e:
+            errors = [e] * len(batch)
+        for run, error in zip(batch, errors):
+            run.finish(error)
+
+    def _work(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._queue)
+                _, _, run = heapq.heappop(self._queue)
+                batch = self._take_batch(run)
+                self.busy += 1
+                self._update_gauges()
+            try:
+                if len(batch) > 1:
+                    self._run_batch(batch, time.monotonic())
+                    continue
+                waited = time.monotonic() - run.enqueued_at
+                SCHEDULER_WAIT_SECONDS.labels(stage=self.stage).observe(waited)
+                run.execute(self.stage, run.current_fn, waited)
+            except BaseException as e:
+                logging.error(f"[SCHEDULER] {self.stage} 워커 오류: {e}")
+            finally:
+                with self._cond:
+                    self.busy -= 1
+                    self._update_gauges()
+
+class Scheduler:
+    """폰트 생성 작업의 입장 제어와 단계별 워커 풀을 관리합니다.
+
+    - 입장 제어: 실행 중(workers)과 대기 중(max_queued) 작업 수의 합이 가득 차면 SchedulerFull을 발생시킵니다.
+    - 우선순위: 작업 슬롯과 단계 대기열 모두 job.priority가 높은 작업이 먼저 받습니다.
+    - 단계 워커 풀: 파이프라인 단계마다 워커 풀과 대기열이 있고, 단계가 끝난 작업은 다음 단계 대기열로 넘어갑니다.
+      한 작업이 추론 중일 때 다른 작업의 크롭과 SVG 변환이 함께 실행됩니다.
+    - exclusive 키가 같은 작업(예: 같은 폰트 이름의 결과 디렉토리를 쓰는 작업)은 동시에 실행하지 않습니다.
+    """
+    def __init__(self, workers=PIPELINE_WORKERS, max_queued=PIPELINE_MAX_QUEUED, stage_workers=None):
+        self.max_jobs = max(1, workers) + max(0, max_queued)
+        self.job_slots = PrioritySlots(JOB_STAGE, workers)
+        self.stage_pools = {stage: StagePool(stage, workers, SCHEDULER_STAGE_BATCH.get(stage, 1))
+                            for stage, workers in (stage_workers or default_stage_workers()).items()}
+        self.admitted = 0
+        self._exclusive = {}  # 키 -> [Lock, 참조 수]
+        self._capacity = threading.Condition()
+        logging.info(f"[SCHEDULER] 작업 슬롯 {self.job_slots.capacity}개, 대기 {max_queued}개, 단계 워커: "
+                     + ', '.join(f"{stage} {pool.workers}" for stage, pool in self.stage_pools.items()))
+
+    def wait_for_worker(self, timeout=None):
+        """받아 둔 작업 수가 작업 슬롯 수보다 적어질 때까지 기다립니다.
+        SQS 폴링은 바로 실행할 수 있을 때만 메시지를 가져와, 대기열에서 기다리는 동안 메시지가 다시 보이지 않게 합니다."""
+        with self._capacity:
+            return self._capacity.wait_for(lambda: self.admitted < self.job_slots.capacity, timeout)
+
+    def submit(self, job, fn, *args, exclusive=()):
+        """작업을 받아 별도 스레드에서 작업 슬롯을 얻은 뒤 fn(*args)를 실행합니다. Future를 반환합니다."""
+        with self._capacity:
+            if self.admitted >= self.max_jobs:
+                SCHEDULER_REJECTED_JOBS.labels(source=job.source).inc()
+                raise SchedulerFull(f"대기 중인 작업이 가득 찼습니다 (최대 {self.max_jobs}개)")
+            self.admitted += 1
+        future = Future()
+        thread = threading.Thread(target=self._run, args=(job, fn, args, exclusive, future),
+                                  name=f"job-{job.id}", daemon=True)
+        thread.start()
+        return future
+
+    def _acquire_exclusive(self, keys):
+        # 교착을 피하도록 정렬된 순서로 잡음
+        with self._capacity:
+            entries = [self._exclusive.setdefault(key, [threading.Lock(), 0]) for key in keys]
+            for entry in entries:
+                entry[1] += 1
+        for entry in entries:
+            entry[0].acquire()
+
+    def _release_exclusive(self, keys):
+        with self._capacity:
+            for key in reversed(keys):
+                entry = self._exclusive[key]
+                entry[0].release()
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._exclusive[key]
+
+    def _run(self, job, fn, args, exclusive, future):
+        keys = sorted(set(exclusive))
+        try:
+            self._acquire_exclusive(keys)
+            try:
+                with self.job_slots.hold(job.priority):
+                    future.set_result(fn(*args))
+            finally:
+                self._release_exclusive(keys)
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._capacity:
+                self.admitted -= 1
+                self._capacity.notify_all()
+
+    def run_stages(self, job, steps):
+        """단계 목록 [(stage, fn), ...]을 단계 워커 풀에 넘겨 순서대로 실행하고 Future를 반환합니다.
+        단계가 실패하면 이후 단계는 실행하지 않고 Future에 예외를 설정합니다."""
+        run = PipelineRun(self, job, steps)
+        run.advance()
+        return run.future
+
+SCHEDULER = Scheduler()
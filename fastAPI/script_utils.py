@@ -2,9 +2,46 @@ import os
 import subprocess
 import shlex
 import shutil
-from fastAPI.config import PROJECT_ROOT, RESULT_DIR, WRITTEN_DIR
+import time
+from collections import deque
+from fastAPI.config import PROJECT_ROOT, RESULT_DIR, WRITTEN_DIR, SCRIPT_LOG_LINES_PER_SEC
+from fastAPI.prometheus_loki.prometheus_config import PIPELINE_SCRIPT_OUTPUT_LINES
+from fastAPI.prometheus_loki.stage_metrics import parse_metric_line, record_stage_event, observe_stage, describe_progress
 
-def run_script(script_path, args, logger, step_name):
+# 실패 시 함께 남길, 초당 줄 수 제한으로 생략된 마지막 출력 줄 수
+SUPPRESSED_TAIL_LINES = 20
+
+class LineRateLimiter:
+    """1초 창마다 최대 lines_per_sec줄만 통과시키고 생략된 줄 수와 마지막 줄들을 기억합니다."""
+    def __init__(self, lines_per_sec=SCRIPT_LOG_LINES_PER_SEC):
+        self.lines_per_sec = lines_per_sec
+        self.window_start = 0.0
+        self.window_count = 0
+        self.suppressed = 0
+        self.tail = deque(maxlen=SUPPRESSED_TAIL_LINES)
+
+    def allow(self, line):
+        if self.lines_per_sec <= 0:
+            return True
+        now = time.monotonic()
+        if now - self.window_start >= 1.0:
+            self.window_start, self.window_count = now, 0
+        if self.window_count < self.lines_per_sec:
+            self.window_count += 1
+            return True
+        self.suppressed += 1
+        self.tail.append(line)
+        return False
+
+def run_script(script_path, args, logger, step_name, stage=None, env=None, on_event=None):
+    """스크립트를 실행하고 출력을 요청 로그로 전달합니다.
+    stage가 주어지면 단계 소요 시간과 스크립트가 보고한 측정값(@@metric 줄)을 메트릭으로 기록합니다.
+    progress 이벤트는 요청 로그 한 줄로 요약하고, 일반 출력은 초당 SCRIPT_LOG_LINES_PER_SEC줄까지만 전달합니다.
+    env는 서버 환경 변수에 더해 스크립트에 넘길 환경 변수입니다 (예: 요청별 STAGE_PROFILE_DIR).
+    on_event가 주어지면 스크립트가 보고한 측정값 dict마다 호출합니다 (예: 작업 진행 상황 갱신)."""
+    launch_time = time.time()
+    limiter = LineRateLimiter()
+    line_counts = {"logged": 0, "suppressed": 0, "event": 0}
     try:
         cmd = [script_path]
         if args:
@@ -23,31 +60,64 @@ def run_script(script_path, args, logger, step_name):
             text=True,
             bufsize=1,
             universal_newlines=True,
-            cwd=PROJECT_ROOT
+            cwd=PROJECT_ROOT,
+            env={**os.environ, **env} if env else None
         )
         
         for line in process.stdout:
             line = line.strip()
-            if line:
+            if not line:
+                continue
+            event = parse_metric_line(line)
+            if event is not None:
+                line_counts["event"] += 1
+                record_stage_event(event, launch_time, stage)
+                if on_event:
+                    on_event(event)
+                progress = describe_progress(event)
+                if progress:
+                    logger.info(f"[{step_name}] {progress}")
+                continue
+            if limiter.allow(line):
+                line_counts["logged"] += 1
                 logger.info(f"[{step_name}] {line}")
+            else:
+                line_counts["suppressed"] += 1
         
         process.wait()
         exit_code = process.returncode
+        if stage:
+            observe_stage(stage, "success" if exit_code == 0 else "failure", time.time() - launch_time)
+            for disposition, count in line_counts.items():
+                PIPELINE_SCRIPT_OUTPUT_LINES.labels(stage=stage, disposition=disposition).inc(count)
+        if limiter.suppressed:
+            logger.info(f"[{step_name}] 출력 {limiter.suppressed}줄 생략 (초당 {limiter.lines_per_sec}줄 제한)")
         
         if exit_code != 0:
+            # 실패 원인이 생략된 줄에 있을 수 있으므로 마지막 생략 줄을 함께 남김
+            for line in limiter.tail:
+                logger.info(f"[{step_name}] {line}")
             logger.error(f"스크립트 실행 실패 (종료 코드: {exit_code})")
             return False, f"스크립트 {os.path.basename(script_path)} 실행 실패 (종료 코드: {exit_code})"
         
         logger.info(f"스크립트 성공적으로 실행됨 (종료 코드: {exit_code})")
         return True, None
     except Exception as e:
+        if stage:
+            observe_stage(stage, "failure", time.time() - launch_time)
         error_msg = f"스크립트 실행 중 예외 발생: {str(e)}"
         logger.error(error_msg, exc_info=True)
         return False, error_msg
 
-def cleanup_intermediate_results(font_name: str, logger):
+def cleanup_intermediate_results(font_name: str, logger, written_dir=None):
+    """폰트의 중간 결과물을 지웁니다. written_dir가 없으면 written/ 바로 아래의 템플릿 파일만 지우고
+    동시에 진행 중인 다른 작업의 요청별 디렉토리(written/<requestUUID>)는 남겨 둡니다."""
+    if written_dir is None and os.path.isdir(WRITTEN_DIR):
+        for entry in os.scandir(WRITTEN_DIR):
+            if entry.is_file():
+                os.remove(entry.path)
     dirs_to_delete = [
-        WRITTEN_DIR,
+        *([written_dir] if written_dir else []),
         os.path.join(RESULT_DIR, "1_cropped", font_name),
         os.path.join(RESULT_DIR, "2_inference", font_name),
         os.path.join(RESULT_DIR, "3_svg", font_name)
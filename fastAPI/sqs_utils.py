@@ -3,13 +3,20 @@ import logging
 import boto3
 import json
 import time
-from fastAPI.config import AWS_REGION, AWS_ACCESS_KEY, AWS_SECRET_KEY, QUEUE_URL, FONT_BUCKET_NAME, FONT_CREATE_LOG_BUCKET_NAME, FONT_STATUS
+import os
+from concurrent.futures import ThreadPoolExecutor
+from fastAPI.config import AWS_REGION, AWS_ACCESS_KEY, AWS_SECRET_KEY, QUEUE_URL, FONT_BUCKET_NAME, FONT_CREATE_LOG_BUCKET_NAME, FONT_STATUS, WRITTEN_DIR, SCHEDULER_RETRY_PRIORITY, SQS_VISIBILITY_TIMEOUT
 from fastAPI.s3_utils import download_image_from_s3, upload_file_to_s3
 from fastAPI.script_utils import cleanup_intermediate_results
-from fastAPI.pipeline_runner import run_font_pipeline
+from fastAPI.pipeline_runner import run_font_pipeline, build_webfonts
 from fastAPI.logger_utils import setup_logger
 from fastAPI.prometheus_loki.prometheus_config import SQS_POLL_TOTAL, SQS_PROCESSED_MESSAGES, SQS_PROCESSING_DURATION, SQS_PROCESSING_ERRORS, SQS_RECEIVED_MESSAGES
 from fastAPI.font_create_result_requests import send_font_progress_result
+from fastAPI.prometheus_loki.stage_metrics import stage_timer
+from fastAPI.profiling import start_request_profile
+from fastAPI.jobs import Job, submit_job
+from fastAPI.checkpoints import PipelineCheckpoint, sweep_expired_checkpoints
+from fastAPI.scheduler import SCHEDULER
 
 sqs = boto3.client(
     "sqs", 
@@ -20,6 +27,10 @@ sqs = boto3.client(
 
 no_message_logged = False
 
+# requestUUID -> 처리 중인 메시지 (다시 전달된 메시지의 수신 핸들로 교체해 삭제와 가시성 연장에 사용)
+inflight_messages = {}
+inflight_lock = threading.Lock()
+
 # 메시지 키 상수를 정의합니다.
 MEMBER_ID_KEY = "memberId"
 AUTHOR_KEY = "author"
@@ -29,6 +40,8 @@ FONT_NAME_KEY = "fontName"
 FONT_ENG_NAME_KEY= "fontEngName"
 TEMPLATE_URL_KEY = "templateURL"
 REQUEST_UUID_KEY = "requestUUID"
+PROFILE_KEY = "profile"
+PRIORITY_KEY = "priority"
 
 # SQS 메시지 형식
 # {
@@ -38,7 +51,9 @@ REQUEST_UUID_KEY = "requestUUID"
 #   "fontName": "testFontName",
 #   "templateURL": "https://....",
 #   "author": "author",
-#   "requestUUID": "sadsadsa"
+#   "requestUUID": "sadsadsa",
+#   "profile": true,           (선택, 요청 프로파일링)
+#   "priority": 10             (선택, 높을수록 먼저 처리)
 # }
 
 sqs_message_properties = [FONT_ID_KEY, FONT_FILE_KEY, MEMBER_ID_KEY, FONT_NAME_KEY, FONT_ENG_NAME_KEY, TEMPLATE_URL_KEY, AUTHOR_KEY, REQUEST_UUID_KEY]
@@ -62,16 +77,172 @@ def validation_SQS_message(msg):
         logging.error(f"[SQS] 원본 메시지: {msg}")
         raise
 
+@SQS_PROCESSING_DURATION.time()
+def process_sqs_message(job, msg, body):
+    """SQS 메시지 하나를 처리합니다 (템플릿 다운로드, 폰트 생성, S3 업로드, 백엔드 결과 전송). 작업 풀에서 실행됩니다."""
+    font_id = str(body.get(FONT_ID_KEY))
+    font_file_key = str(body.get(FONT_FILE_KEY))
+    font_name = body.get(FONT_NAME_KEY)
+    font_eng_name = body.get(FONT_ENG_NAME_KEY)
+    template_url = body.get(TEMPLATE_URL_KEY)
+    request_member_id = str(body.get(MEMBER_ID_KEY))
+    requestUUID = body.get(REQUEST_UUID_KEY)
+    # 동시에 처리 중인 다른 요청의 템플릿과 섞이지 않도록 요청별 디렉토리에 다운로드
+    written_dir = os.path.join(WRITTEN_DIR, requestUUID)
+
+    ttf_s3_url = ""
+    log_s3_url = ""
+
+    # for metadata
+    author = body.get(AUTHOR_KEY)
+
+    logger, log_file = setup_logger(requestUUID, request_member_id, font_id, font_name)
+    job.log_file = log_file
+    logger.info(f"폰트 생성 요청 수신: {font_name}")
+    profile = start_request_profile(requestUUID, logger, requested=bool(body.get(PROFILE_KEY)))
+    # 재전송된 메시지면 이전 실행에서 마지막으로 완료한 단계의 결과물을 되돌려 놓고 다음 단계부터 실행
+    sweep_expired_checkpoints()
+    checkpoint = PipelineCheckpoint(requestUUID, font_name, written_dir, logger)
+    checkpoint.restore()
+
+    # 전체 처리 로직 시작
+    try:
+        # 템플릿 다운로드
+        if not checkpoint.completed:
+            job.set_stage("download")
+            with stage_timer("download"):
+                _, image_path = download_image_from_s3(request_member_id, font_name, template_url, logger, written_dir)
+            logger.info(f"템플릿 다운로드 완료: {image_path}")
+            checkpoint.mark_done("download")
+
+        # 폰트 제작 로직 (TTF까지 만든 요청이 다시 오면 업로드와 결과 전송만 다시 실행)
+        result_ttf_path = run_font_pipeline(font_name, font_eng_name, requestUUID, logger, profile, job, written_dir, checkpoint)
+        logger.info(f"폰트 '{font_name}' 생성 성공")
+
+        # 웹폰트 압축은 TTF 업로드와 병렬로 진행
+        job.set_stage("upload")
+        with ThreadPoolExecutor(max_workers=1) as webfont_pool:
+            webfont_future = webfont_pool.submit(build_webfonts, result_ttf_path, font_file_key, logger, profile)
+
+            # 폰트 파일 S3업로드 
+            with stage_timer("upload"):
+                _, ttf_s3_url = upload_file_to_s3(result_ttf_path, "fonts/" + font_file_key + ".ttf", FONT_BUCKET_NAME, logger)
+            logger.info(f"폰트 파일 업로드 완료: {ttf_s3_url}")
+            job.add_artifact("ttf", ttf_s3_url)
+
+            webfont_files = webfont_future.result()
+
+        # 웹폰트 파일 이름은 fileKey 기준 (<fileKey>.woff2, <fileKey>.common.woff2, ...)
+        with stage_timer("upload"):
+            for webfont_path, _ in webfont_files:
+                _, webfont_s3_url = upload_file_to_s3(webfont_path, "fonts/" + os.path.basename(webfont_path), FONT_BUCKET_NAME, logger)
+                logger.info(f"웹폰트 파일 업로드 완료: {webfont_s3_url}")
+                job.add_artifact(os.path.basename(webfont_path), webfont_s3_url)
+
+        ## 백엔드 서버에 폰트 생성 결과 PATCH 요청
+        job.set_stage("callback")
+        try:
+            logger.info(f"백엔드 서버 폰트 생성 결과 PATCH 요청")
+            send_font_progress_result(font_id, FONT_STATUS.DONE, log_s3_url, logger)
+            logger.info(f"백엔드 서버 폰트 생성 결과 PATCH 요청 성공")
+        except Exception as e:
+            logger.info(f"백엔드 서버 폰트 생성 결과 PATCH 요청 실패: {e}")
+            raise
+
+        #정상 요청인 경우에만 SQS 메시지 삭제
+        logger.info(f"[SQS] 메시지 삭제 요청")
+        with inflight_lock:
+            receipt_handle = msg["ReceiptHandle"]
+        sqs.delete_message(
+            QueueUrl=QUEUE_URL,
+            ReceiptHandle=receipt_handle
+        )
+        logger.info(f"[SQS] 메시지 삭제 완료")
+        SQS_PROCESSED_MESSAGES.inc() # 정상 처리된 메시지 건수 증가
+        logger.info(f"폰트 생성 처리 완료")
+
+    # 성공 여부 상관없이 로그 파일 업로드, cleanup 실행    
+    # 마지막으로 완료한 단계의 결과물은 재전송된 메시지가 이어서 처리하도록 CHECKPOINT_TTL_HOURS 동안 보관
+    finally:
+        try:
+            _, log_s3_url = upload_file_to_s3(log_file, font_id + ".log", FONT_CREATE_LOG_BUCKET_NAME, logger)
+            logger.info(f"로그 파일 업로드 완료: {log_s3_url}")
+            job.add_artifact("log", log_s3_url)
+        except Exception as log_err:
+            logger.error(f"로그 파일 업로드 실패: {log_err}")
+        if profile:
+            # 프로파일 결과는 로그 파일과 같은 버킷에 <fontId>.profile.tar.gz로 업로드
+            try:
+                _, profile_s3_url = upload_file_to_s3(profile.archive(), font_id + ".profile.tar.gz", FONT_CREATE_LOG_BUCKET_NAME, logger)
+                logger.info(f"프로파일 업로드 완료: {profile_s3_url}")
+                job.add_artifact("profile", profile_s3_url)
+            except Exception as profile_err:
+                logger.error(f"프로파일 업로드 실패: {profile_err}")
+        try:
+            checkpoint.stash()
+        except Exception as checkpoint_err:
+            logger.error(f"체크포인트 보관 실패: {checkpoint_err}")
+        cleanup_intermediate_results(font_name, logger, written_dir)
+
+def message_priority(msg, body):
+    """메시지의 priority 필드에 재전송(재시도) 메시지면 SCHEDULER_RETRY_PRIORITY를 더한 우선순위"""
+    try:
+        priority = int(body.get(PRIORITY_KEY) or 0)
+    except (TypeError, ValueError):
+        priority = 0
+    if int(msg.get("Attributes", {}).get("ApproximateReceiveCount", "1")) > 1:
+        priority += SCHEDULER_RETRY_PRIORITY
+    return priority
+
+class VisibilityHeartbeat:
+    """작업이 대기하거나 실행되는 동안 메시지의 가시성 제한 시간을 SQS_VISIBILITY_TIMEOUT의 절반 주기로 연장합니다.
+    연장하지 않으면 처리 중인 메시지가 다시 보이게 되어 다른 폴링이 같은 요청을 받습니다."""
+    def __init__(self, msg, timeout=SQS_VISIBILITY_TIMEOUT):
+        self.msg = msg
+        self.timeout = timeout
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sqs-visibility", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(max(1, self.timeout // 2)):
+            try:
+                with inflight_lock:
+                    receipt_handle = self.msg["ReceiptHandle"]
+                sqs.change_message_visibility(QueueUrl=QUEUE_URL, ReceiptHandle=receipt_handle, VisibilityTimeout=self.timeout)
+            except Exception as e:
+                logging.warning(f"[SQS] 가시성 제한 시간 연장 실패: {e}")
+
+def on_sqs_job_done(future):
+    if future.exception() is not None:
+        SQS_PROCESSING_ERRORS.inc() # 에러 발생 건수 증가
+
+def finish_sqs_job(future, request_id, heartbeat):
+    heartbeat.stop()
+    with inflight_lock:
+        inflight_messages.pop(request_id, None)
+    on_sqs_job_done(future)
+
 def poll_sqs():
     global no_message_logged
     while True:
+        # 작업 슬롯이 비어 있을 때만 메시지를 가져옴 (바로 처리하지 못할 메시지는 다른 서버가 가져가도록 큐에 남김)
+        SCHEDULER.wait_for_worker()
         SQS_POLL_TOTAL.inc() # SQS 폴링 시도 횟수 증가
         
         try:
             response = sqs.receive_message(
                 QueueUrl=QUEUE_URL,
                 MaxNumberOfMessages=1,
-                WaitTimeSeconds=20
+                WaitTimeSeconds=20,
+                VisibilityTimeout=SQS_VISIBILITY_TIMEOUT,
+                AttributeNames=["ApproximateReceiveCount"]
             )
             
             messages = response.get("Messages", [])
@@ -89,70 +260,24 @@ def poll_sqs():
             body = validation_SQS_message(messages)
             logging.info(f"[SQS] Parsed message body: {body}")
             
-            # SQS 메시지 처리 시간을 측정
-            with SQS_PROCESSING_DURATION.time():
-                font_id = str(body.get(FONT_ID_KEY))
-                font_file_key = str(body.get(FONT_FILE_KEY))
-                font_name = body.get(FONT_NAME_KEY)
-                font_eng_name = body.get(FONT_ENG_NAME_KEY)
-                template_url = body.get(TEMPLATE_URL_KEY)
-                request_member_id = str(body.get(MEMBER_ID_KEY))
-                requestUUID = body.get(REQUEST_UUID_KEY)
-                
-                ttf_s3_url = ""
-                woff_s3_url = ""
-                log_s3_url = ""
-                
-                # for metadata
-                author = body.get(AUTHOR_KEY)
-                
-                logger, log_file = setup_logger(requestUUID, request_member_id, font_id, font_name)
-                logger.info(f"폰트 생성 요청 수신: {font_name}")
-            
-                # 전체 처리 로직 시작
-                try:
-                    # 템플릿 다운로드
-                    _, image_path = download_image_from_s3(request_member_id, font_name, template_url, logger)
-                    logger.info(f"템플릿 다운로드 완료: {image_path}")
-                
-                    # 폰트 제작 로직
-                    result_ttf_path, result_woff_path = run_font_pipeline(font_name, font_eng_name, requestUUID, logger)
-                    logger.info(f"폰트 '{font_name}' 생성 성공")
-                    
-                    # 폰트 파일 S3업로드 
-                    _, ttf_s3_url = upload_file_to_s3(result_ttf_path, "fonts/" + font_file_key + ".ttf", FONT_BUCKET_NAME, logger)
-                    logger.info(f"폰트 파일 업로드 완료: {ttf_s3_url}")
-                    
-                    _, woff_s3_url = upload_file_to_s3(result_woff_path, "fonts/" + font_file_key + ".woff2", FONT_BUCKET_NAME, logger)
-                    logger.info(f"웹폰트 파일 업로드 완료: {woff_s3_url}")
-                    
-                    ## 백엔드 서버에 폰트 생성 결과 PATCH 요청
-                    try:
-                        logger.info(f"백엔드 서버 폰트 생성 결과 PATCH 요청")
-                        send_font_progress_result(font_id, FONT_STATUS.DONE, log_s3_url, logger)
-                        logger.info(f"백엔드 서버 폰트 생성 결과 PATCH 요청 성공")
-                    except Exception as e:
-                        logger.info(f"백엔드 서버 폰트 생성 결과 PATCH 요청 실패: {e}")
-                        raise
-                    
-                    #정상 요청인 경우에만 SQS 메시지 삭제
-                    logger.info(f"[SQS] 메시지 삭제 요청")
-                    sqs.delete_message(
-                        QueueUrl=QUEUE_URL,
-                        ReceiptHandle=msg["ReceiptHandle"]
-                    )
-                    logger.info(f"[SQS] 메시지 삭제 완료")
-                    SQS_PROCESSED_MESSAGES.inc() # 정상 처리된 메시지 건수 증가
-                    logger.info(f"폰트 생성 처리 완료")
-                    
-                # 성공 여부 상관없이 로그 파일 업로드, cleanup 실행    
-                finally:
-                    try:
-                        _, log_s3_url = upload_file_to_s3(log_file, font_id + ".log", FONT_CREATE_LOG_BUCKET_NAME, logger)
-                        logger.info(f"로그 파일 업로드 완료: {log_s3_url}")
-                    except Exception as log_err:
-                        logger.error(f"로그 파일 업로드 실패: {log_err}")
-                    cleanup_intermediate_results(font_name, logger)
+            # 처리 중인 메시지가 다시 전달되면 새 작업을 만들지 않고, 처리 중인 작업이 최신 수신 핸들로 삭제하도록 교체
+            request_id = body.get(REQUEST_UUID_KEY)
+            with inflight_lock:
+                inflight = inflight_messages.get(request_id)
+                if inflight is not None:
+                    inflight["ReceiptHandle"] = msg["ReceiptHandle"]
+            if inflight is not None:
+                logging.info(f"[SQS] 처리 중인 요청의 메시지가 다시 전달되었습니다: {request_id}")
+                continue
+
+            # HTTP 요청과 같은 스케줄러에서 실행 (같은 폰트 이름의 작업은 결과 디렉토리를 공유하므로 동시에 실행하지 않음)
+            job = Job(request_id, body.get(FONT_NAME_KEY), "sqs", message_priority(msg, body))
+            future = submit_job(job, process_sqs_message, msg, body, exclusive=[f"font:{job.font_name}"])
+            heartbeat = VisibilityHeartbeat(msg)
+            with inflight_lock:
+                inflight_messages[request_id] = msg
+            heartbeat.start()
+            future.add_done_callback(lambda f, request_id=request_id, heartbeat=heartbeat: finish_sqs_job(f, request_id, heartbeat))
 
         except Exception as e:
             SQS_PROCESSING_ERRORS.inc() # 에러 발생 건수 증가
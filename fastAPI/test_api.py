@@ -1,36 +1,89 @@
+import os
+import shutil
+from fastAPI.config import JOB_RESULT_DIR, WRITTEN_DIR
 from fastAPI.script_utils import cleanup_intermediate_results
-from fastAPI.pipeline_runner import run_font_pipeline
+from fastAPI.pipeline_runner import run_font_pipeline, build_webfonts
 from fastAPI.logger_utils import setup_logger
+from fastAPI.profiling import start_request_profile
+from fastAPI.jobs import Job, JOB_STORE, submit_job
+from fastAPI.scheduler import SchedulerFull
 from fastapi import HTTPException, APIRouter
 from fastAPI.models import FontRequest
 
 router = APIRouter()
 
-# for test
-@router.post("/font")
-async def create_font(request: FontRequest):
+def process_font_request(job: Job, request: FontRequest):
+    """폰트 생성만 수행합니다 (S3 업로드 없음). 작업 풀에서 실행되며 결과 파일은 작업의 artifacts로 등록합니다.
+    결과 파일은 같은 폰트 이름의 다음 작업이 덮어쓰지 않도록 작업별 디렉토리(result/jobs/<job_id>/)에 둡니다."""
     font_name = request.font_name
     member_id = str(request.member_id)
     font_id = str(request.font_id)
-    request_id = request.request_uuid
-    author = request.author
-    
+    request_id = str(request.request_uuid)
+    written_dir = os.path.join(WRITTEN_DIR, job.id)
+
     logger, log_file = setup_logger(request_id, member_id, font_id, font_name)
-    logger.info(f"폰트 생성 요청 수신: {font_name})")
+    job.log_file = log_file
+    logger.info(f"폰트 생성 요청 수신: {font_name}")
+    profile = start_request_profile(request_id, logger, requested=request.profile)
     try:
-        result_ttf_path, result_woff_path = run_font_pipeline(font_name, request_id, logger)
+        result_ttf_path = run_font_pipeline(font_name, request.font_eng_name, request_id, logger, profile, job, written_dir)
+        job_dir = os.path.join(JOB_RESULT_DIR, job.id)
+        shutil.rmtree(job_dir, ignore_errors=True)
+        os.makedirs(job_dir)
+        ttf_path = shutil.move(result_ttf_path, os.path.join(job_dir, os.path.basename(result_ttf_path)))
+        job.set_stage("woff2")
+        files = [ttf_path] + [path for path, _ in build_webfonts(ttf_path, font_name, logger, profile, job_dir)]
+        for path in files:
+            name = os.path.basename(path)
+            job.add_artifact(name, f"/jobs/{job.id}/files/{name}", path)
         logger.info(f"폰트 '{font_name}' 생성 성공")
-        
-        return {
-            "message": f"폰트 '{font_name}' 생성 완료",
-            "request_id": request_id,
-            "log_file": log_file,
-            "output_ttf": result_ttf_path,
-            "output_woff": result_woff_path,
-        }
     except Exception as e:
-        error_message = f"폰트 '{font_name}' 생성 중 오류 발생: {str(e)}"
-        logger.error(error_message, exc_info=True)
-        raise HTTPException(status_code=500, detail=error_message)
+        logger.error(f"폰트 '{font_name}' 생성 중 오류 발생: {str(e)}", exc_info=True)
+        raise
     finally:
-        cleanup_intermediate_results(font_name, logger)
\ No newline at end of file
+        if profile:
+            profile_path = profile.archive()
+            name = os.path.basename(profile_path)
+            job.add_artifact("profile", f"/jobs/{job.id}/files/{name}", profile_path)
+        cleanup_intermediate_results(font_name, logger, written_dir)
+
+def take_templates(written_dir):
+    """written/ 바로 아래의 템플릿 이미지를 작업별 디렉토리로 옮깁니다. 작업이 대기하는 동안 다음 요청이 written/을 다시 채울 수 있습니다."""
+    files = [entry.path for entry in os.scandir(WRITTEN_DIR) if entry.is_file()] if os.path.isdir(WRITTEN_DIR) else []
+    if not files:
+        raise HTTPException(status_code=400, detail=f"{WRITTEN_DIR}에 템플릿 이미지가 없습니다")
+    os.makedirs(written_dir, exist_ok=True)
+    for path in files:
+        shutil.move(path, os.path.join(written_dir, os.path.basename(path)))
+
+def return_templates(written_dir):
+    """등록하지 못한 작업의 템플릿 이미지를 written/으로 되돌립니다."""
+    for entry in os.scandir(written_dir):
+        shutil.move(entry.path, os.path.join(WRITTEN_DIR, entry.name))
+    shutil.rmtree(written_dir, ignore_errors=True)
+
+# for test
+@router.post("/font", status_code=202)
+async def create_font(request: FontRequest):
+    """작업을 등록하고 바로 반환합니다. 진행 상황과 결과 파일은 GET /jobs/{job_id}로 조회합니다."""
+    job = Job(str(request.request_uuid), request.font_name, "http", request.priority)
+    existing = JOB_STORE.get(job.id)
+    if existing is not None and not existing.finished:
+        raise HTTPException(status_code=409, detail=f"이미 진행 중인 작업입니다: {job.id}")
+    # SQS 작업과 같이 템플릿을 작업별 디렉토리(written/<job_id>/)에서 읽으므로 폰트 이름이 다른 작업은 동시에 실행
+    written_dir = os.path.join(WRITTEN_DIR, job.id)
+    take_templates(written_dir)
+    try:
+        submit_job(job, process_font_request, request, exclusive=[f"font:{job.font_name}"])
+    except SchedulerFull as e:
+        return_templates(written_dir)
+        raise HTTPException(status_code=429, detail=str(e))
+    except ValueError as e:
+        return_templates(written_dir)
+        raise HTTPException(status_code=409, detail=str(e))
+    return {
+        "message": f"폰트 '{request.font_name}' 생성 작업 등록",
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/jobs/{job.id}",
+    }
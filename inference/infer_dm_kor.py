@@ -5,6 +5,11 @@ import logging
 from sconf import Config
 
 from DM.models import Generator
+from DM.export import compile_generator, checkpoint_fingerprint, source_fingerprint
+from DM.style_cache import StyleCache
+from DM.autotune import BatchSizeTuner, DEFAULT_BATCH_SIZE
+from DM.ref_loader import ReferenceLoader, load_glyph_arrays
+from DM.optimize import fold_generator, check_equivalence, ATOL as FOLD_ATOL
 from base.utils import load_reference
 from inference import infer_DM
 
@@ -16,31 +21,85 @@ logging.basicConfig(
 
 try:
     from korean_reference_chars import korean_chars as KOREAN_REF_CHARS
+    from stage_metrics import emit_started, emit_finished, install_log_rate_limit, start_profiling, ProgressReporter, PROFILE_DIR
 except ImportError as e:
-    logging.error(f"한글 참조 문자 가져오기 오류: {e}")
+    logging.error(f"공용 모듈(resource) 가져오기 오류: {e}")
     sys.exit(1)
+install_log_rate_limit()
 
+import contextlib
 import json
 import torch
 import time
 
+# 컨테이너에서는 /app/inference/resources (스크립트 위치 기준이므로 컨테이너 밖에서도 동작)
+RESOURCES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resources")
+# 프로젝트 루트 (컨테이너에서는 /app, 컨테이너 없이 실행할 때는 서버가 APP_BASE_PATH로 지정)
+APP_BASE_PATH = os.getenv("APP_BASE_PATH", "/app")
+
+def torch_profiler(device):
+    """STAGE_PROFILE_DIR가 설정된 경우 추론 구간을 기록할 torch profiler를, 아니면 빈 컨텍스트를 반환합니다."""
+    if not PROFILE_DIR:
+        return contextlib.nullcontext()
+    activities = [torch.profiler.ProfilerActivity.CPU]
+    if device.type == "cuda":
+        activities.append(torch.profiler.ProfilerActivity.CUDA)
+    return torch.profiler.profile(activities=activities)
+
+def save_torch_profile(prof):
+    """크롬 트레이스(inference.torch.json)와 연산자별 요약(inference.torch.txt)을 저장합니다."""
+    try:
+        prof.export_chrome_trace(os.path.join(PROFILE_DIR, "inference.torch.json"))
+        sort_by = "self_cuda_time_total" if torch.cuda.is_available() else "self_cpu_time_total"
+        with open(os.path.join(PROFILE_DIR, "inference.torch.txt"), "w", encoding="utf-8") as f:
+            f.write(prof.key_averages().table(sort_by=sort_by, row_limit=40))
+        logging.info(f"torch 프로파일 저장: {PROFILE_DIR}")
+    except Exception as e:
+        logging.warning(f"torch 프로파일 저장 실패: {e}")
+
+def setup_device(requested="auto", num_threads=None):
+    """추론 장치를 결정하고 CPU인 경우 intra-op 스레드 수를 조정합니다."""
+    if requested == "auto":
+        requested = "cuda" if torch.cuda.is_available() else "cpu"
+    elif requested == "cuda" and not torch.cuda.is_available():
+        logging.warning("CUDA를 사용할 수 없어 CPU로 대체합니다.")
+        requested = "cpu"
+    device = torch.device(requested)
+
+    if device.type == "cpu":
+        if not num_threads:
+            try:
+                num_threads = len(os.sched_getaffinity(0))
+            except AttributeError:
+                num_threads = os.cpu_count() or 1
+        torch.set_num_threads(num_threads)
+        try:
+            # 추론은 단일 그래프를 순차 실행하므로 inter-op 병렬성은 이득이 없습니다.
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            logging.debug("inter-op 스레드 수는 이미 설정되어 변경하지 않습니다.")
+        logging.info(f"CPU 스레드 설정: intra-op {torch.get_num_threads()}개")
+
+    return device
+
 def inference(args):
     try:
         # 리소스 경로 설정
-        app_base_path = "/app"
-        resources_base_path = os.path.join(app_base_path, "inference", "resources")
-        weight_path = os.path.join(resources_base_path, "checkpoints", "last.pth")
+        app_base_path = APP_BASE_PATH
+        resources_base_path = RESOURCES_DIR
+        weight_path = args.weight_path or os.path.join(resources_base_path, "checkpoints", "last.pth")
         decomposition_path = os.path.join(resources_base_path, "decomposition_DM.json")
-        gen_chars_path = os.path.join(resources_base_path, "gen_all_chars.json")
-        actual_reference_dir = os.path.join(args.reference_dir, args.font_name)
+        gen_chars_path = args.gen_chars_path or os.path.join(resources_base_path, "gen_all_chars.json")
+        font_names = args.font_name
+        actual_reference_dirs = [os.path.join(args.reference_dir, name) for name in font_names]
         
         # 모델 하이퍼파라미터
         n_heads = 3
         n_comps = 68
         
-        logging.info(f"추론 시작 - 폰트: {args.font_name}")
+        logging.info(f"추론 시작 - 폰트: {', '.join(font_names)}")
         logging.info(f"출력 디렉토리: {args.output_dir}")
-        logging.info(f"참조 이미지 디렉토리: {actual_reference_dir}")
+        logging.info(f"참조 이미지 디렉토리: {', '.join(actual_reference_dirs)}")
 
         # 분해 정보 로드
         if not os.path.exists(decomposition_path):
@@ -52,7 +111,7 @@ def inference(args):
         logging.debug(f"분해 정보 로드 완료: {len(decomposition)} 항목")
 
         # 장치 설정 및 모델 초기화
-        device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        device = setup_device(args.device, args.num_threads)
         logging.info(f"사용 장치: {device}")
         
         logging.debug(f"모델 초기화 - n_heads: {n_heads}, n_comps: {n_comps}")
@@ -83,21 +142,50 @@ def inference(args):
                 raise load_err
         
         logging.debug("모델 가중치 로드 완료")
+        weight_fingerprint = checkpoint_fingerprint(weight_path)
+
+        # 추론 전용 가중치 폴딩 (BN/weight norm/persistent memory hypernet)
+        folded = False
+        if args.fold:
+            folded_gen = fold_generator(gen)
+            diff = check_equivalence(gen, folded_gen, n_chars=2)
+            if diff > FOLD_ATOL:
+                logging.warning(f"폴딩된 모델 출력 차이가 허용치를 초과하여 원본 모델을 사용합니다: {diff:.3e}")
+            else:
+                gen = folded_gen
+                folded = True
+                logging.info(f"가중치 폴딩 적용 (최대 출력 차이: {diff:.3e})")
+
+        # encode/decode 그래프 컴파일 (체크포인트 옆에 캐시)
+        if args.compile:
+            # 폴딩 여부에 따라 그래프가 다르므로 캐시 키에 포함
+            if compile_generator(gen, weight_path, device, weight_fingerprint, folded):
+                logging.info("컴파일된 encode/decode 그래프 사용")
 
         # 참조 이미지 로드 설정
         extension = "jpg"
         ref_chars = KOREAN_REF_CHARS
         
-        logging.info(f"참조 이미지 로드: {actual_reference_dir}")
+        logging.info(f"참조 이미지 로드: {args.reference_dir}")
 
         # 참조 이미지 로드
         ref_dict, load_img = load_reference(args.reference_dir, extension, ref_chars)
         
-        if not ref_dict:
-            logging.error(f"참조 이미지를 로드할 수 없음. 참조 디렉토리 확인 필요.")
-            raise ValueError(f"참조 이미지를 로드할 수 없음. 참조 디렉토리 확인 필요.")
-        
-        logging.info(f"참조 이미지 로드 완료: {len(ref_dict[args.font_name])}개 문자")
+        # 참조 디렉토리에는 다른 요청의 폰트도 있을 수 있으므로 요청된 폰트만 추론
+        missing = [name for name in font_names if name not in ref_dict]
+        if missing:
+            logging.error(f"참조 이미지를 로드할 수 없음. 참조 디렉토리 확인 필요: {', '.join(missing)}")
+            raise ValueError(f"참조 이미지를 로드할 수 없음. 참조 디렉토리 확인 필요: {', '.join(missing)}")
+        ref_dict = {name: ref_dict[name] for name in font_names}
+
+        for name in font_names:
+            logging.info(f"참조 이미지 로드 완료 ({name}): {len(ref_dict[name])}개 문자")
+
+        # 크로퍼가 넘겨준 글리프 배열이 있으면 JPEG 디코딩 없이 사용
+        glyph_arrays = load_glyph_arrays(args.reference_dir, font_names)
+        if glyph_arrays:
+            logging.info(f"크로퍼 글리프 배열 사용: {', '.join(glyph_arrays)}")
+        ref_loader = ReferenceLoader(load_img, device, num_workers=args.loader_workers, arrays=glyph_arrays)
 
         # 생성할 문자 목록 로드
         if not os.path.exists(gen_chars_path):
@@ -108,18 +196,55 @@ def inference(args):
         gen_chars = json.load(open(gen_chars_path))
         logging.info(f"생성할 문자 총 개수: {len(gen_chars)}개")
 
-        # 추론 실행 설정
-        batch_size = 32
-        logging.debug(f"배치 크기: {batch_size}")
+        # 배치 크기 설정 (0이면 장치별로 측정한 값을 사용하고 OOM 시 줄여서 다시 저장)
+        batch_tuner = None
+        if args.batch_size > 0:
+            batch_size = decode_batch_size = args.batch_size
+            logging.info(f"배치 크기 고정: {batch_size}")
+        else:
+            batch_tuner = BatchSizeTuner(os.path.join(os.path.dirname(weight_path), "batch_sizes.json"),
+                                         device, max_batch_size=args.max_batch_size)
+            try:
+                sizes = batch_tuner.load_or_tune(gen)
+                batch_size, decode_batch_size = sizes["encode"], sizes["decode"]
+            except Exception as e:
+                logging.warning(f"배치 크기 자동 조정 실패, 기본값 {DEFAULT_BATCH_SIZE}을 사용합니다: {e}")
+                batch_size = decode_batch_size = DEFAULT_BATCH_SIZE
+                batch_tuner = None
+
+        # 스타일 메모리 스냅샷 캐시 (참조 이미지 + 모델 가중치 해시 기준)
+        style_cache = None
+        style_cache_dir = args.style_cache_dir or os.path.join(app_base_path, "result", "style_cache")
+        if args.style_cache_size_mb > 0:
+            model_key = f"{weight_fingerprint}:{source_fingerprint()}"
+            style_cache = StyleCache(style_cache_dir, model_key, max_bytes=args.style_cache_size_mb << 20)
+            logging.info(f"스타일 캐시: {style_cache_dir} (최대 {args.style_cache_size_mb}MB)")
         
         # 추론 실행
         logging.info(f"추론 시작. 출력 경로: {args.output_dir}")
         start_time = time.time()
-        infer_DM(gen, args.output_dir, gen_chars, ref_dict, load_img, decomposition, batch_size)
+        timings = {}
+        progress = ProgressReporter("inference", len(gen_chars) * len(font_names))
+        if device.type == "cuda":
+            torch.cuda.reset_peak_memory_stats(device)
+        with torch_profiler(device) as prof, torch.inference_mode():
+            infer_DM(gen, args.output_dir, gen_chars, ref_dict, load_img, decomposition, batch_size,
+                     device=device, style_cache=style_cache, decode_batch_size=decode_batch_size,
+                     on_backoff=batch_tuner.backoff if batch_tuner is not None else None,
+                     ref_loader=ref_loader, check_glyphs=bool(args.check_glyphs), timings=timings,
+                     on_progress=progress.update)
+        progress.report()
         end_time = time.time()
+        if prof is not None:
+            save_torch_profile(prof)
         elapsed_time = end_time - start_time
         logging.info(f"추론 완료: {elapsed_time:.2f}초 소요")
-        logging.info(f"생성된 이미지: {args.output_dir}/{args.font_name}/*.png")
+        peak_gpu_bytes = torch.cuda.max_memory_allocated(device) if device.type == "cuda" else None
+        emit_finished("inference_encode", timings["encode"])
+        emit_finished("inference_decode", timings["decode"], glyphs=timings["glyphs"], peak_gpu_bytes=peak_gpu_bytes)
+        emit_finished("inference", elapsed_time, glyphs=timings["glyphs"], peak_gpu_bytes=peak_gpu_bytes)
+        for name in font_names:
+            logging.info(f"생성된 이미지: {args.output_dir}/{name}/*.png")
 
         return args.output_dir
 
@@ -130,10 +255,38 @@ def inference(args):
         sys.exit(1)
 
 if __name__ == "__main__":
+    emit_started("inference")
+    start_profiling("inference")
     parser = argparse.ArgumentParser(description="한글 폰트 DM 추론 실행")
     parser.add_argument('--reference_dir', type=str, required=True, help='참조 이미지가 포함된 기본 디렉토리')
     parser.add_argument('--output_dir', type=str, required=True, help='생성된 이미지를 저장할 디렉토리')
-    parser.add_argument('--font_name', type=str, required=True, help='처리할 폰트 이름')
+    parser.add_argument('--font_name', type=str, nargs='+', required=True,
+                        help='처리할 폰트 이름 (여러 개를 주면 디코딩 배치를 공유하여 함께 추론)')
+    parser.add_argument('--weight_path', type=str, default=os.getenv("INFERENCE_WEIGHT_PATH", ""),
+                        help='생성기 체크포인트 경로 (기본값: inference/resources/checkpoints/last.pth)')
+    parser.add_argument('--gen_chars_path', type=str, default=os.getenv("INFERENCE_GEN_CHARS_PATH", ""),
+                        help='생성할 문자 목록 JSON 경로 (기본값: inference/resources/gen_all_chars.json)')
+    parser.add_argument('--device', type=str, default=os.getenv("INFERENCE_DEVICE", "auto"),
+                        choices=["auto", "cpu", "cuda"], help='추론 장치 (기본값: auto)')
+    parser.add_argument('--num_threads', type=int, default=int(os.getenv("INFERENCE_NUM_THREADS", "0")),
+                        help='CPU 추론 시 intra-op 스레드 수 (0이면 사용 가능한 코어 수)')
+    parser.add_argument('--compile', type=int, default=int(os.getenv("INFERENCE_COMPILE", "1")),
+                        help='TorchScript로 고정된 encode/decode 그래프 사용 여부 (1: 사용, 0: eager)')
+    parser.add_argument('--fold', type=int, default=int(os.getenv("INFERENCE_FOLD", "1")),
+                        help='추론 전용 가중치 폴딩 사용 여부 (1: 사용, 0: 원본 모델)')
+    parser.add_argument('--batch_size', type=int, default=int(os.getenv("INFERENCE_BATCH_SIZE", "0")),
+                        help='encode/decode 배치 크기 (0이면 장치별 자동 측정)')
+    parser.add_argument('--max_batch_size', type=int, default=int(os.getenv("INFERENCE_MAX_BATCH_SIZE", "256")),
+                        help='배치 크기 자동 측정 시 탐색할 최대값')
+    parser.add_argument('--loader_workers', type=int, default=int(os.getenv("INFERENCE_LOADER_WORKERS", "0")),
+                        help='참조 이미지 디코딩 스레드 수 (0이면 CPU 코어 수, 최대 8)')
+    parser.add_argument('--style_cache_dir', type=str, default=os.getenv("INFERENCE_STYLE_CACHE_DIR", ""),
+                        help='스타일 메모리 스냅샷 캐시 디렉토리 (기본값: $APP_BASE_PATH/result/style_cache)')
+    parser.add_argument('--style_cache_size_mb', type=int,
+                        default=int(os.getenv("INFERENCE_STYLE_CACHE_SIZE_MB", "2048")),
+                        help='스타일 캐시 최대 크기 (MB, 0이면 캐시 사용 안 함)')
+    parser.add_argument('--check_glyphs', type=int, default=int(os.getenv("INFERENCE_CHECK_GLYPHS", "1")),
+                        help='비어 있거나 과도하게 칠해진 생성 글리프 검사 및 재생성 여부 (1: 사용, 0: 사용 안 함)')
     
     args = parser.parse_args()
     inference(args)
\ No newline at end of file
@@ -0,0 +1,228 @@
+"""
+encode/decode 배치 크기 자동 조정.
+
+노드마다 GPU 메모리가 달라 고정된 배치 크기는 일부 장비에서는 자원을 놀리고 일부에서는
+OOM을 일으킵니다. 처음 실행할 때 인코더/디코더를 배치 크기를 두 배씩 늘려가며 실행해
+안전한 최대 배치 크기를 찾고, 장치별로 결과를 파일에 저장해 이후 실행에서 재사용합니다.
+추론 중 OOM이 발생하면 배치 크기를 절반으로 줄여 재시도하고 줄어든 값을 다시 저장합니다.
+"""
+import argparse
+import json
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import torch
+
+from .export import _example_inputs, source_fingerprint
+
+STAGES = ("encode", "decode")
+DEFAULT_BATCH_SIZE = 32
+# GPU 메모리 중 배치에 사용할 최대 비율 (나머지는 할당기 단편화/다른 프로세스 여유분)
+GPU_MEMORY_FRACTION = 0.8
+# 추론 프로세스 하나가 사용할 GPU 메모리 (MB, 0이면 GPU 전체의 GPU_MEMORY_FRACTION).
+# 파이프라인 서버는 GPU 하나에서 여러 추론을 동시에 실행하므로 스케줄러의 추론 슬롯 크기를 넘겨줍니다.
+GPU_MEMORY_BUDGET_MB = int(os.getenv("INFERENCE_GPU_MEMORY_MB", "0"))
+# CPU에서는 배치를 키웠을 때 개당 처리 시간이 최선값보다 이 비율 이상 나빠지면 탐색을 멈춤
+CPU_MAX_SLOWDOWN = 1.05
+
+
+def is_oom_error(e):
+    if isinstance(e, torch.cuda.OutOfMemoryError):
+        return True
+    msg = str(e)
+    return isinstance(e, RuntimeError) and ("out of memory" in msg or "can't allocate memory" in msg)
+
+
+def release_memory(device):
+    if torch.device(device).type == "cuda":
+        torch.cuda.empty_cache()
+
+
+def device_key(device):
+    """ 튜닝 결과를 구분할 장치 이름 (GPU 모델명 또는 CPU 스레드 수) """
+    device = torch.device(device)
+    if device.type == "cuda":
+        index = device.index if device.index is not None else torch.cuda.current_device()
+        return f"cuda:{torch.cuda.get_device_name(index)}"
+    return f"cpu:{torch.get_num_threads()}threads"
+
+
+def run_batched(fn, n_items, batch_size, stage, on_backoff=None):
+    """ fn(start, end)를 batch_size 단위로 실행하고 OOM이 나면 배치 크기를 절반으로 줄여 재시도합니다.
+
+    Returns:
+        마지막으로 사용한 배치 크기
+    """
+    start = 0
+    while start < n_items:
+        end = min(start + batch_size, n_items)
+        try:
+            fn(start, end)
+        except Exception as e:
+            if not is_oom_error(e) or batch_size == 1:
+                raise
+            batch_size = max(1, batch_size // 2)
+            logging.warning(f"{stage} 배치 OOM 발생, 배치 크기를 {batch_size}로 줄여 재시도합니다.")
+            if on_backoff is not None:
+                on_backoff(stage, batch_size)
+            continue
+        start = end
+    return batch_size
+
+
+class BatchSizeTuner:
+    def __init__(self, path, device, max_batch_size=256, memory_budget_mb=GPU_MEMORY_BUDGET_MB):
+        """
+        Args:
+            path: 장치별 튜닝 결과를 저장할 JSON 파일
+            device: 추론 장치
+            max_batch_size: 탐색할 최대 배치 크기
+            memory_budget_mb: GPU에서 이 프로세스가 사용할 메모리 (0이면 GPU 전체 기준)
+        """
+        self.path = Path(path)
+        self.device = torch.device(device)
+        self.max_batch_size = max_batch_size
+        self.memory_budget_mb = memory_budget_mb if self.device.type == "cuda" else 0
+        self.key = f"{device_key(self.device)}:{source_fingerprint()}"
+        if self.memory_budget_mb:
+            # 메모리 예산이 다르면 측정 결과도 달라지므로 따로 저장
+            self.key += f":{self.memory_budget_mb}MB"
+        self.sizes = {}
+
+    def _load_all(self):
+        if not self.path.exists():
+            return {}
+        try:
+            return json.loads(self.path.read_text())
+        except (OSError, ValueError) as e:
+            logging.warning(f"배치 크기 튜닝 결과를 읽을 수 없어 다시 측정합니다: {e}")
+            return {}
+
+    def save(self):
+        results = self._load_all()
+        results[self.key] = self.sizes
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # 같은 GPU의 여러 추론 프로세스가 동시에 저장할 수 있으므로 프로세스마다 다른 임시 파일에 쓴 뒤 교체
+        with tempfile.NamedTemporaryFile("w", dir=self.path.parent, prefix=self.path.stem, suffix=".tmp",
+                                         delete=False) as f:
+            f.write(json.dumps(results, indent=2, ensure_ascii=False))
+        Path(f.name).replace(self.path)
+
+    def backoff(self, stage, batch_size):
+        """ 추론 중 OOM으로 줄어든 배치 크기를 기록합니다. """
+        if self.sizes.get(stage, batch_size + 1) > batch_size:
+            self.sizes[stage] = batch_size
+            self.save()
+
+    def _probe(self, fn, batch_size):
+        """ 배치 크기 batch_size로 fn을 실행하여 (성공 여부, 소요 시간)을 반환합니다. """
+        release_memory(self.device)
+        if self.device.type == "cuda":
+            torch.cuda.reset_peak_memory_stats(self.device)
+            torch.cuda.synchronize(self.device)
+        try:
+            t0 = time.perf_counter()
+            fn(batch_size)
+            if self.device.type == "cuda":
+                torch.cuda.synchronize(self.device)
+            elapsed = time.perf_counter() - t0
+        except Exception as e:
+            if not is_oom_error(e):
+                raise
+            release_memory(self.device)
+            return False, None
+
+        if self.device.type == "cuda" and torch.cuda.max_memory_allocated(self.device) > self.memory_limit():
+            return False, None
+        return True, elapsed
+
+    def memory_limit(self):
+        """ 배치 탐색에 사용할 GPU 메모리 한도 (바이트) """
+        limit = torch.cuda.get_device_properties(self.device).total_memory * GPU_MEMORY_FRACTION
+        if self.memory_budget_mb:
+            limit = min(limit, self.memory_budget_mb * GPU_MEMORY_FRACTION * (1 << 20))
+        return limit
+
+    def search(self, fn, stage):
+        """ 배치 크기를 두 배씩 늘려가며 안전한 최대 배치 크기를 찾습니다.
+
+        GPU는 메모리 한도 내 최대값을, CPU는 개당 처리 시간이 나빠지기 직전의 값을 선택합니다.
+        """
+        fn(1)  # 워밍업 (그래프 최적화, 할당기 초기화)
+        best, best_per_item = 1, None
+        batch_size = 1
+        while batch_size <= self.max_batch_size:
+            ok, elapsed = self._probe(fn, batch_size)
+            if not ok:
+                break
+            per_item = elapsed / batch_size
+            logging.debug(f"{stage} 배치 {batch_size}: {per_item * 1000:.1f}ms/개")
+            if self.device.type == "cpu" and best_per_item is not None \
+                    and per_item > best_per_item * CPU_MAX_SLOWDOWN:
+                break
+            best, best_per_item = batch_size, min(per_item, best_per_item or per_item)
+            batch_size *= 2
+        release_memory(self.device)
+        return best
+
+    @torch.inference_mode()
+    def tune(self, gen):
+        gen = gen.eval()
+
+        def run_encode(batch_size):
+            imgs, _ = _example_inputs(gen, self.device, batch_size)
+            gen.comp_enc(imgs)
+
+        def run_decode(batch_size):
+            _, feats = _example_inputs(gen, self.device, batch_size)
+            gen.decoder(feats["last"], feats["skip"])
+
+        logging.info(f"배치 크기 자동 조정 시작 ({self.key.split(':')[0]}, 최대 {self.max_batch_size})")
+        self.sizes = {
+            "encode": self.search(run_encode, "encode"),
+            "decode": self.search(run_decode, "decode"),
+        }
+        self.save()
+        return self.sizes
+
+    def load_or_tune(self, gen):
+        """ 저장된 결과가 있으면 사용하고 없으면 측정합니다. """
+        sizes = self._load_all().get(self.key)
+        if sizes and all(stage in sizes for stage in STAGES):
+            self.sizes = sizes
+            logging.info(f"저장된 배치 크기 사용: {self.path}")
+        else:
+            self.tune(gen)
+        logging.info(f"배치 크기 - encode: {self.sizes['encode']}, decode: {self.sizes['decode']}")
+        return self.sizes
+
+
+def main():
+    from DM.models import Generator
+
+    parser = argparse.ArgumentParser(description="encode/decode 배치 크기 측정")
+    parser.add_argument("--weight", default=None, help="체크포인트 경로 (없으면 무작위 가중치)")
+    parser.add_argument("--output", required=True, help="튜닝 결과 JSON 경로")
+    parser.add_argument("--device", default="cuda" if torch.cuda.is_available() else "cpu")
+    parser.add_argument("--max_batch_size", type=int, default=256)
+    parser.add_argument("--memory_budget_mb", type=int, default=GPU_MEMORY_BUDGET_MB,
+                        help="추론 프로세스 하나가 사용할 GPU 메모리 (기본값: INFERENCE_GPU_MEMORY_MB, 0이면 GPU 전체)")
+    parser.add_argument("--n_heads", type=int, default=3)
+    parser.add_argument("--n_comps", type=int, default=68)
+    args = parser.parse_args()
+
+    device = torch.device(args.device)
+    gen = Generator(n_heads=args.n_heads, n_comps=args.n_comps).to(device).eval()
+    if args.weight:
+        weight = torch.load(args.weight, map_location=device, weights_only=False)
+        gen.load_state_dict(weight.get("generator_ema", weight.get("state_dict", weight)))
+    sizes = BatchSizeTuner(args.output, device, args.max_batch_size, args.memory_budget_mb).tune(gen)
+    logging.info(f"배치 크기 - encode: {sizes['encode']}, decode: {sizes['decode']}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    main()
@@ -0,0 +1,200 @@
+"""
+Generator 구성 요소 마이크로 벤치마크.
+
+무작위 초기화 가중치(또는 --weight 체크포인트)로 다음 경로의 처리량을 측정합니다.
+  * encode:      ComponentEncoder.forward          [B, 1, 128, 128]
+  * memory_read: Memory.read (last/skip 두 스케일)  컴포넌트당 저장된 특징 수(--refs_per_comp)별
+  * decode:      Decoder.forward                   read_memory 결과 입력
+  * read_decode: Generator.read_decode             메모리 읽기 + 디코딩
+
+배치 크기, CPU 스레드 수, dtype 조합마다 반복 실행하여 표와 JSON으로 출력하고,
+--profile_dir를 주면 조합마다 torch profiler 크롬 트레이스를 저장합니다.
+
+    python -m DM.benchmark --batch_sizes 1 8 32 --threads 1 4 --dtypes float32 bfloat16
+"""
+import argparse
+import itertools
+import json
+import logging
+import os
+import time
+
+import torch
+
+CASES = ("encode", "memory_read", "decode", "read_decode")
+DTYPES = {"float32": torch.float32, "bfloat16": torch.bfloat16, "float16": torch.float16}
+IMG_SHAPE = (1, 128, 128)
+
+
+def fill_memory(gen, n_comps, refs_per_comp, device, dtype, seed=0):
+    """ 스타일 0의 동적 메모리를 컴포넌트마다 refs_per_comp개의 무작위 특징으로 채웁니다. """
+    g = torch.Generator().manual_seed(seed)
+    gen.reset_dynamic_memory()
+    for _key, shape in gen.feat_shape.items():
+        snapshot = {c: torch.randn(refs_per_comp, *shape, generator=g).to(dtype) for c in range(n_comps)}
+        gen.memory[_key].restore_dynamic(0, snapshot, device)
+
+
+def make_case(gen, case, batch_size, n_comps, device, dtype, seed=0):
+    """ 측정할 함수(인자 없음)를 만듭니다. """
+    g = torch.Generator().manual_seed(seed)
+    n_heads = gen.comp_enc.n_heads
+    fids = [0] * batch_size
+    decs = torch.randint(0, n_comps, (batch_size, n_heads), generator=g).to(device)
+
+    if case == "encode":
+        imgs = torch.rand(batch_size, *IMG_SHAPE, generator=g).mul(2).sub(1).to(device, dtype)
+        return lambda: gen.comp_enc(imgs)
+    if case == "memory_read":
+        return lambda: gen.read_memory(fids, decs, reset_memory=False)
+    if case == "decode":
+        feats = gen.read_memory(fids, decs, reset_memory=False)
+        return lambda: gen.decoder(**feats)
+    if case == "read_decode":
+        return lambda: gen.read_decode(fids, decs, reset_memory=False)
+    raise ValueError(case)
+
+
+def synchronize(device):
+    if device.type == "cuda":
+        torch.cuda.synchronize(device)
+
+
+def measure(fn, device, warmup=2, iters=10, min_seconds=0.0):
+    """ 반복당 소요 시간 목록(초)을 반환합니다. min_seconds를 채울 때까지 iters 이상 반복합니다. """
+    for _ in range(warmup):
+        fn()
+    synchronize(device)
+    times = []
+    start = time.perf_counter()
+    while len(times) < iters or time.perf_counter() - start < min_seconds:
+        t0 = time.perf_counter()
+        fn()
+        synchronize(device)
+        times.append(time.perf_counter() - t0)
+    return times
+
+
+def profile(fn, device, trace_path, iters=3):
+    """ torch profiler로 fn을 실행하여 크롬 트레이스를 저장하고 연산자별 요약 표를 반환합니다. """
+    activities = [torch.profiler.ProfilerActivity.CPU]
+    if device.type == "cuda":
+        activities.append(torch.profiler.ProfilerActivity.CUDA)
+    with torch.profiler.profile(activities=activities, record_shapes=True) as prof:
+        for _ in range(iters):
+            fn()
+        synchronize(device)
+    prof.export_chrome_trace(trace_path)
+    return prof.key_averages().table(sort_by="self_cpu_time_total", row_limit=15)
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+@torch.no_grad()
+def run(gen, device, cases=CASES, batch_sizes=(1, 8, 32), threads=(0,), dtypes=("float32",),
+        refs_per_comp=(1, 4), n_comps=68, warmup=2, iters=10, min_seconds=0.0, profile_dir=None):
+    """ 모든 조합을 측정하여 결과 dict 목록을 반환합니다. """
+    results = []
+    base_state = {k: v.clone() for k, v in gen.state_dict().items()}
+    for dtype_name, n_threads in itertools.product(dtypes, threads):
+        dtype = DTYPES[dtype_name]
+        if device.type == "cpu":
+            torch.set_num_threads(n_threads or os.cpu_count() or 1)
+        gen.load_state_dict(base_state)
+        gen.to(dtype)
+        for case, batch_size, refs in itertools.product(cases, batch_sizes, refs_per_comp):
+            # 인코더는 메모리를 읽지 않으므로 refs_per_comp를 한 번만 측정
+            if case == "encode" and refs != refs_per_comp[0]:
+                continue
+            row = {"case": case, "batch_size": batch_size, "threads": torch.get_num_threads(),
+                   "dtype": dtype_name, "refs_per_comp": None if case == "encode" else refs}
+            try:
+                fill_memory(gen, n_comps, refs, device, dtype)
+                fn = make_case(gen, case, batch_size, n_comps, device, dtype)
+                times = measure(fn, device, warmup, iters, min_seconds)
+            except (RuntimeError, NotImplementedError) as e:
+                # 장치에서 지원하지 않는 dtype 연산 등
+                row["error"] = str(e).splitlines()[0]
+                logging.warning(f"{case} (batch {batch_size}, {dtype_name}) 측정 실패: {row['error']}")
+                results.append(row)
+                continue
+            median = percentile(times, 0.5)
+            row.update(iters=len(times), median_ms=round(median * 1e3, 3),
+                       p90_ms=round(percentile(times, 0.9) * 1e3, 3),
+                       items_per_sec=round(batch_size / median, 2))
+            if profile_dir:
+                os.makedirs(profile_dir, exist_ok=True)
+                name = f"{case}_b{batch_size}_t{row['threads']}_{dtype_name}" + \
+                       (f"_r{refs}" if row["refs_per_comp"] else "")
+                row["trace"] = os.path.join(profile_dir, name + ".json")
+                logging.info(f"--- {name} ---\n{profile(fn, device, row['trace'])}")
+            results.append(row)
+    gen.load_state_dict(base_state)
+    gen.to(torch.float32)
+    return results
+
+
+def format_table(results):
+    """ 결과를 고정 폭 표 문자열로 만듭니다. """
+    columns = ("case", "batch_size", "threads", "dtype", "refs_per_comp", "median_ms", "p90_ms", "items_per_sec")
+    rows = [[str(r.get(c) if r.get(c) is not None else "-") for c in columns] for r in results]
+    for r, row in zip(results, rows):
+        if "error" in r:
+            row[-3:] = ["error", "-", "-"]
+    widths = [max(len(c), *(len(row[i]) for row in rows)) for i, c in enumerate(columns)]
+    lines = ["  ".join(c.ljust(w) for c, w in zip(columns, widths)),
+             "  ".join("-" * w for w in widths)]
+    lines += ["  ".join(v.ljust(w) for v, w in zip(row, widths)) for row in rows]
+    return "\n".join(lines)
+
+
+def main():
+    from DM.models import Generator
+    from DM.optimize import fold_generator
+
+    parser = argparse.ArgumentParser(description="Generator encode/decode/메모리 읽기 마이크로 벤치마크")
+    parser.add_argument("--weight", default=None, help="체크포인트 경로 (없으면 무작위 가중치)")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=list(CASES))
+    parser.add_argument("--batch_sizes", nargs="+", type=int, default=[1, 8, 32])
+    parser.add_argument("--threads", nargs="+", type=int, default=[0], help="CPU 스레드 수 (0이면 코어 수)")
+    parser.add_argument("--dtypes", nargs="+", choices=list(DTYPES), default=["float32"])
+    parser.add_argument("--refs_per_comp", nargs="+", type=int, default=[1, 4],
+                        help="메모리에 저장된 컴포넌트당 참조 특징 수")
+    parser.add_argument("--fold", action="store_true", help="추론 전용 가중치 폴딩 모델로 측정")
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--iters", type=int, default=10)
+    parser.add_argument("--min_seconds", type=float, default=0.0, help="조합마다 최소 측정 시간")
+    parser.add_argument("--profile_dir", default=None, help="torch profiler 크롬 트레이스 저장 디렉토리")
+    parser.add_argument("--output", default=None, help="결과 JSON 경로")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--n_heads", type=int, default=3)
+    parser.add_argument("--n_comps", type=int, default=68)
+    args = parser.parse_args()
+
+    torch.manual_seed(args.seed)
+    device = torch.device(args.device)
+    gen = Generator(n_heads=args.n_heads, n_comps=args.n_comps).to(device).eval()
+    if args.weight:
+        weight = torch.load(args.weight, map_location=device, weights_only=False)
+        gen.load_state_dict(weight.get("generator_ema", weight.get("state_dict", weight)))
+    if args.fold:
+        gen = fold_generator(gen)
+
+    results = run(gen, device, args.cases, args.batch_sizes, args.threads, args.dtypes, args.refs_per_comp,
+                  args.n_comps, args.warmup, args.iters, args.min_seconds, args.profile_dir)
+    print(format_table(results))
+    if args.output:
+        meta = {"torch": torch.__version__, "device": str(device), "fold": args.fold,
+                "weight": args.weight or "random", "seed": args.seed}
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"meta": meta, "results": results}, f, ensure_ascii=False, indent=2)
+        logging.info(f"결과 저장: {args.output}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    main()
@@ -0,0 +1,192 @@
+"""
+DM Generator의 encode/decode 경로를 TorchScript 그래프로 고정(freeze)하고 디스크에 캐시합니다.
+
+컴파일된 그래프는 체크포인트(last.pth) 옆에 저장되며, 체크포인트 지문(fingerprint),
+모델 코드, torch 버전, 장치 종류, 가중치 폴딩 여부가 일치할 때만 재사용됩니다.
+"""
+import argparse
+import hashlib
+import logging
+import warnings
+from pathlib import Path
+
+import torch
+
+# 추론 입력 형태: 128x128 흑백 글리프
+IMG_SHAPE = (1, 128, 128)
+TRACE_BATCH = 4
+ATOL = 1e-4
+
+
+def checkpoint_fingerprint(weight_path, chunk_size=1 << 20):
+    """ 체크포인트 파일 내용의 sha256 해시 """
+    h = hashlib.sha256()
+    with open(weight_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def compiled_paths(weight_path, device):
+    weight_path = Path(weight_path)
+    stem = weight_path.with_suffix("")
+    dev = torch.device(device).type
+    return {
+        "enc": Path(f"{stem}.{dev}.enc.ts"),
+        "dec": Path(f"{stem}.{dev}.dec.ts"),
+    }
+
+
+def source_fingerprint():
+    """ 그래프에 포함되는 모델 코드(DM/models, base/modules)의 해시
+
+    모델 코드가 바뀌면 캐시된 그래프를 다시 생성하도록 캐시 키에 포함합니다.
+    """
+    resources_dir = Path(__file__).resolve().parents[1]
+    h = hashlib.sha256()
+    for src_dir in (resources_dir / "DM" / "models", resources_dir / "base" / "modules"):
+        for src in sorted(src_dir.glob("*.py")):
+            h.update(src.read_bytes())
+    return h.hexdigest()[:16]
+
+
+def cache_key(fingerprint, device, folded=False):
+    return f"{fingerprint}:{source_fingerprint()}:{torch.__version__}:{torch.device(device).type}:fold{int(folded)}"
+
+
+def _example_inputs(gen, device, batch_size=TRACE_BATCH):
+    imgs = torch.randn(batch_size, *IMG_SHAPE, device=device)
+    n_heads = gen.comp_enc.n_heads
+    feats = {
+        _key: torch.randn(batch_size, n_heads, *shape, device=device)
+        for _key, shape in gen.feat_shape.items()
+    }
+    return imgs, feats
+
+
+def _optimize(frozen):
+    """ conv-bn 폴딩 등 장치별 최적화를 적용합니다.
+
+    최적화된 그래프는 직렬화가 보장되지 않으므로 저장 후(로드 후)에 적용합니다.
+    """
+    try:
+        return torch.jit.optimize_for_inference(frozen)
+    except Exception as e:  # 백엔드(MKLDNN 등)에 따라 최적화가 지원되지 않을 수 있음
+        logging.debug(f"optimize_for_inference 건너뜀: {e}")
+        return frozen
+
+
+def _max_diff(a, b):
+    if isinstance(a, dict):
+        return max(_max_diff(a[k], b[k]) for k in a)
+    return (a - b).abs().max().item()
+
+
+@torch.no_grad()
+def trace_generator(gen, device):
+    """ 인코더와 디코더를 trace + freeze 하고 eager 출력과 수치를 비교합니다. """
+    gen = gen.eval()
+    imgs, feats = _example_inputs(gen, device)
+
+    with warnings.catch_warnings():
+        # shape assert 등에서 발생하는 TracerWarning은 아래 수치 검증으로 대체
+        warnings.simplefilter("ignore", torch.jit.TracerWarning)
+        enc = torch.jit.trace(gen.comp_enc, imgs, strict=False, check_trace=False)
+        dec = torch.jit.trace(gen.decoder, (feats["last"], feats["skip"]), check_trace=False)
+    enc = torch.jit.freeze(enc.eval())
+    dec = torch.jit.freeze(dec.eval())
+
+    # trace에 사용하지 않은 배치 크기로 검증하여 배치 크기에 대한 일반화를 확인
+    imgs, feats = _example_inputs(gen, device, batch_size=TRACE_BATCH + 1)
+    enc_diff = _max_diff(gen.comp_enc(imgs), enc(imgs))
+    dec_diff = _max_diff(gen.decoder(**feats), dec(feats["last"], feats["skip"]))
+    if enc_diff > ATOL or dec_diff > ATOL:
+        raise RuntimeError(f"컴파일된 그래프 출력 불일치 (enc: {enc_diff:.2e}, dec: {dec_diff:.2e})")
+
+    return enc, dec
+
+
+def export_generator(gen, weight_path, device, fingerprint=None, folded=False):
+    """ 컴파일된 그래프를 생성하여 체크포인트 옆에 저장합니다. folded는 gen이 fold_generator 결과인지 여부입니다. """
+    fingerprint = fingerprint or checkpoint_fingerprint(weight_path)
+    enc, dec = trace_generator(gen, device)
+
+    extra = {"cache_key": cache_key(fingerprint, device, folded)}
+    paths = compiled_paths(weight_path, device)
+    for name, module in (("enc", enc), ("dec", dec)):
+        tmp_path = paths[name].with_suffix(".tmp")
+        torch.jit.save(module, str(tmp_path), _extra_files=extra)
+        tmp_path.replace(paths[name])
+        logging.info(f"컴파일된 그래프 저장: {paths[name]}")
+
+    return enc, dec
+
+
+def load_compiled(weight_path, device, fingerprint=None, folded=False):
+    """ 캐시된 그래프를 불러옵니다. 캐시가 없거나 오래된 경우 None을 반환합니다. """
+    paths = compiled_paths(weight_path, device)
+    if not all(p.exists() for p in paths.values()):
+        return None
+
+    fingerprint = fingerprint or checkpoint_fingerprint(weight_path)
+    expected = cache_key(fingerprint, device, folded)
+    modules = []
+    for name in ("enc", "dec"):
+        extra = {"cache_key": ""}
+        module = torch.jit.load(str(paths[name]), map_location=device, _extra_files=extra)
+        key = extra["cache_key"]
+        if isinstance(key, bytes):
+            key = key.decode()
+        if key != expected:
+            logging.info(f"컴파일된 그래프가 현재 체크포인트와 맞지 않음: {paths[name]}")
+            return None
+        modules.append(module.eval())
+
+    return tuple(modules)
+
+
+def compile_generator(gen, weight_path, device, fingerprint=None, folded=False):
+    """ 캐시된 그래프를 불러오거나 새로 생성하여 Generator에 장착합니다.
+
+    실패하면 eager 모듈을 그대로 유지하고 False를 반환합니다.
+    """
+    try:
+        fingerprint = fingerprint or checkpoint_fingerprint(weight_path)
+        compiled = load_compiled(weight_path, device, fingerprint, folded)
+        if compiled is None:
+            logging.info("컴파일된 그래프 캐시 없음. 새로 생성합니다.")
+            compiled = export_generator(gen, weight_path, device, fingerprint, folded)
+        else:
+            logging.info("캐시된 컴파일 그래프 로드 완료")
+    except Exception as e:
+        logging.warning(f"그래프 컴파일 실패, eager 모드로 진행합니다: {e}")
+        return False
+
+    gen.comp_enc, gen.decoder = (_optimize(m) for m in compiled)
+    return True
+
+
+def main():
+    from DM.models import Generator
+    from DM.optimize import fold_generator
+
+    parser = argparse.ArgumentParser(description="DM Generator encode/decode 그래프 사전 컴파일")
+    parser.add_argument("--weight", required=True, help="체크포인트 경로 (last.pth)")
+    parser.add_argument("--device", default="cuda" if torch.cuda.is_available() else "cpu")
+    parser.add_argument("--n_heads", type=int, default=3)
+    parser.add_argument("--n_comps", type=int, default=68)
+    parser.add_argument("--fold", type=int, default=1, help="가중치 폴딩 후 컴파일 (INFERENCE_FOLD와 같은 값으로 지정, 기본값 1)")
+    args = parser.parse_args()
+
+    device = torch.device(args.device)
+    gen = Generator(n_heads=args.n_heads, n_comps=args.n_comps).to(device).eval()
+    weight = torch.load(args.weight, map_location=device, weights_only=False)
+    gen.load_state_dict(weight.get("generator_ema", weight.get("state_dict", weight)))
+    if args.fold:
+        gen = fold_generator(gen)
+    export_generator(gen, args.weight, device, folded=bool(args.fold))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    main()
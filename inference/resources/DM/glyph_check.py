@@ -0,0 +1,43 @@
+"""
+생성 글리프 검사.
+
+디코더 출력 중 거의 비어 있거나 전체가 검게 칠해진 글리프는 벡터화 후 빈 SVG가 되어
+폰트 조립 단계에서 실패합니다. 디코딩 배치 출력 텐서([N, 1, H, W], 값 범위 [-1, 1])에서
+잉크 비율과 잉크 영역의 크기를 한 번에 계산하여 이런 글리프를 골라냅니다.
+"""
+import torch
+
+# 잉크(검은 획) 판정 기준: 출력값 0 (픽셀 127.5) 미만
+INK_LEVEL = 0.0
+MIN_INK_RATIO = 0.005
+MAX_INK_RATIO = 0.6
+# 잉크 영역의 가로/세로가 이 픽셀 수보다 작으면 점이나 잡음으로 판단
+MIN_EXTENT = 4
+# 불량 글리프를 다시 생성할 때 차례로 시도할 메모리 reduction (기본 'mean' 다음)
+FALLBACK_REDUCTIONS = ("first", "sign")
+
+
+def glyph_stats(imgs, ink_level=INK_LEVEL):
+    """ 글리프별 (잉크 비율 [N], 잉크 영역 높이 [N], 잉크 영역 너비 [N]) """
+    if imgs.dim() == 4:
+        imgs = imgs.amin(dim=1)
+    ink = imgs < ink_level
+    ink_ratio = ink.flatten(1).float().mean(dim=1)
+
+    def extent(occupied):
+        # 잉크가 있는 행(열) 중 첫 번째와 마지막 사이의 길이
+        n = occupied.shape[1]
+        idx = torch.arange(n, device=occupied.device)
+        first = torch.where(occupied, idx, n).amin(dim=1)
+        last = torch.where(occupied, idx, -1).amax(dim=1)
+        return (last - first + 1).clamp(min=0)
+
+    height = extent(ink.any(dim=2))
+    width = extent(ink.any(dim=1))
+    return ink_ratio, height, width
+
+
+def degenerate_mask(imgs, min_ink=MIN_INK_RATIO, max_ink=MAX_INK_RATIO, min_extent=MIN_EXTENT):
+    """ 비어 있거나, 과도하게 칠해졌거나, 잉크 영역이 너무 작은 글리프를 True로 표시합니다. """
+    ink_ratio, height, width = glyph_stats(imgs)
+    return (ink_ratio < min_ink) | (ink_ratio > max_ink) | (height < min_extent) | (width < min_extent)
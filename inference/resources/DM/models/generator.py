@@ -3,6 +3,8 @@ DMFont
 Copyright (c) 2020-present NAVER Corp.
 MIT license
 """
+from itertools import chain
+import torch
 import torch.nn as nn
 from .comp_encoder import ComponentEncoder
 from .decoder import Decoder
@@ -22,10 +24,26 @@ class Generator(nn.Module):
 
         self.decoder = Decoder(self.feat_shape["last"][-1], n_heads=n_heads)
 
+    @property
+    def device(self):
+        # inference-only (folded / frozen) generators may keep weights as buffers only
+        for tensor in chain(self.parameters(), self.buffers()):
+            return tensor.device
+        return torch.device("cpu")
+
     def reset_dynamic_memory(self):
         for _key in self.feat_shape:
             self.memory[_key].reset_dynamic()
 
+    def snapshot_memory(self, style_id):
+        """ Export the dynamic (style) memory of a style for every feature scale """
+        return {_key: self.memory[_key].snapshot_dynamic(style_id) for _key in self.feat_shape}
+
+    def restore_memory(self, style_id, snapshot):
+        """ Restore a snapshot from `snapshot_memory` instead of running encode_write """
+        for _key in self.feat_shape:
+            self.memory[_key].restore_dynamic(style_id, snapshot[_key], self.device)
+
     def encode_write(self, fids, decs, imgs, reset_memory=True):
         if reset_memory:
             self.reset_dynamic_memory()
@@ -60,12 +78,13 @@ class Generator(nn.Module):
 
     def infer(self, ref_fids, ref_decs, ref_imgs, trg_fids, trg_decs, reduction="mean"):
 
-        ref_fids = ref_fids.cuda()
-        ref_decs = ref_decs.cuda()
-        ref_imgs = ref_imgs.cuda()
+        device = self.device
+        ref_fids = ref_fids.to(device)
+        ref_decs = ref_decs.to(device)
+        ref_imgs = ref_imgs.to(device)
 
-        trg_fids = trg_fids.cuda()
-        trg_decs = trg_decs.cuda()
+        trg_fids = trg_fids.to(device)
+        trg_decs = trg_decs.to(device)
 
         self.encode_write(ref_fids, ref_decs, ref_imgs)
         out = self.read_decode(trg_fids, trg_decs, reduction=reduction)
@@ -62,6 +62,20 @@ class DynamicMemory:
         feats = torch.stack(feats)
         return feats
 
+    def snapshot(self, style_id):
+        """ Export stored features of a style as {comp_id: [n_feats, *mem_shape]} on cpu """
+        return {
+            comp_id: torch.stack(sc_feats).cpu()
+            for comp_id, sc_feats in self.memory[int(style_id)].items()
+        }
+
+    def restore(self, style_id, snapshot, device=None):
+        """ Load features exported by `snapshot` into the given style slot """
+        self.memory[int(style_id)] = {
+            int(comp_id): list(sc_feats.to(device).unbind(0))
+            for comp_id, sc_feats in snapshot.items()
+        }
+
     def reset(self):
         self.memory = {}
 
@@ -120,7 +134,7 @@ class Memory(nn.Module):
         self.dynamic_memory.write(style_ids, comp_ids, sc_feats)
 
     def read(self, style_ids, comp_ids, reduction="mean"):
-        feats = self.dynamic_memory.read(style_ids, comp_ids, reduction).cuda()
+        feats = self.dynamic_memory.read(style_ids, comp_ids, reduction).to(comp_ids.device)
         if self.persistent:
             feats = self.persistent_memory(feats, comp_ids)
 
@@ -129,3 +143,9 @@ class Memory(nn.Module):
     def reset_dynamic(self):
         """ Reset dynamic memory """
         self.dynamic_memory.reset()
+
+    def snapshot_dynamic(self, style_id):
+        return self.dynamic_memory.snapshot(style_id)
+
+    def restore_dynamic(self, style_id, snapshot, device=None):
+        self.dynamic_memory.restore(style_id, snapshot, device)
@@ -0,0 +1,197 @@
+"""
+추론 전용 가중치 폴딩(folding) 패스.
+
+로드된 Generator를 복사하여 다음과 같이 다시 씁니다.
+  * spectral norm / weight norm 재매개변수화를 고정 가중치로 굽고 hook을 제거
+  * eval 모드 BatchNorm을 conv 가중치에 흡수하거나, 불가능하면 미리 계산된 채널 affine으로 교체
+  * PersistentMemory의 hypernet 출력을 컴포넌트별 테이블로 미리 계산
+
+결과 모듈은 학습이나 state_dict 로드에 사용할 수 없습니다.
+"""
+import argparse
+import copy
+import logging
+
+import torch
+import torch.nn as nn
+from torch.nn.utils import parametrize, remove_spectral_norm, remove_weight_norm
+from torch.nn.utils.fusion import fuse_conv_bn_eval
+from torch.nn.utils.spectral_norm import SpectralNorm
+from torch.nn.utils.weight_norm import WeightNorm
+
+from base.modules import ConvBlock
+from base.modules.cbam import BasicConv
+from .models.memory import PersistentMemory
+
+ATOL = 1e-4
+
+
+class ChannelAffine(nn.Module):
+    """ eval 모드 BatchNorm2d와 동일한 채널별 x * scale + shift """
+    def __init__(self, scale, shift):
+        super().__init__()
+        self.register_buffer("scale", scale.reshape(1, -1, 1, 1))
+        self.register_buffer("shift", shift.reshape(1, -1, 1, 1))
+
+    def forward(self, x):
+        return torch.addcmul(self.shift, x, self.scale)
+
+
+class FoldedPersistentMemory(nn.Module):
+    """ hypernet(bias)를 미리 계산한 PersistentMemory """
+    def __init__(self, persistent_memory):
+        super().__init__()
+        self.shape = persistent_memory.shape
+        self.register_buffer("table", persistent_memory.hypernet(persistent_memory.bias))
+
+    def read(self, comp_ids):
+        return self.table[comp_ids]
+
+    def forward(self, x, comp_ids):
+        return x + self.table[comp_ids]
+
+
+def bn_affine(bn):
+    scale = torch.rsqrt(bn.running_var + bn.eps)
+    if bn.affine:
+        scale = scale * bn.weight
+    shift = -bn.running_mean * scale
+    if bn.affine:
+        shift = shift + bn.bias
+    return scale, shift
+
+
+def strip_weight_norms(module):
+    """ spectral/weight norm hook과 parametrization을 현재 가중치로 굽습니다. """
+    n_stripped = 0
+    for m in module.modules():
+        for hook in list(m._forward_pre_hooks.values()):
+            if isinstance(hook, SpectralNorm):
+                remove_spectral_norm(m, hook.name)
+                n_stripped += 1
+            elif isinstance(hook, WeightNorm):
+                remove_weight_norm(m, hook.name)
+                n_stripped += 1
+        if parametrize.is_parametrized(m):
+            for name in list(m.parametrizations.keys()):
+                parametrize.remove_parametrizations(m, name, leave_parametrized=True)
+                n_stripped += 1
+    return n_stripped
+
+
+def _pad_is_affine_safe(block):
+    """ zero padding은 affine shift를 패딩 영역에 적용하지 않으므로 padding=0일 때만 안전 """
+    if not isinstance(block.pad, nn.ZeroPad2d):
+        return True
+    return all(p == 0 for p in block.pad.padding)
+
+
+@torch.no_grad()
+def fold_conv_block(block):
+    """ pre-activation ConvBlock의 BatchNorm을 폴딩합니다.
+
+    norm -> (activ 없음) -> conv 인 경우 conv 가중치에 흡수하고,
+    활성화 함수가 사이에 있으면 채널 affine으로 교체합니다.
+    """
+    norm = block.norm
+    if not isinstance(norm, nn.BatchNorm2d) or not norm.track_running_stats:
+        return False
+
+    scale, shift = bn_affine(norm)
+    conv = block.conv
+    if isinstance(block.activ, nn.Identity) and _pad_is_affine_safe(block):
+        # conv(scale * x + shift) = (W * scale) x + (b + sum(W * shift))
+        bias = conv.bias if conv.bias is not None else torch.zeros_like(conv.weight[:, 0, 0, 0])
+        bias = bias + (conv.weight * shift.reshape(1, -1, 1, 1)).sum(dim=(1, 2, 3))
+        conv.weight.copy_(conv.weight * scale.reshape(1, -1, 1, 1))
+        conv.bias = nn.Parameter(bias)
+        block.norm = nn.Identity()
+    else:
+        block.norm = ChannelAffine(scale, shift)
+    return True
+
+
+@torch.no_grad()
+def fold_generator(gen, inplace=False):
+    """ Generator를 추론 전용 모듈로 다시 씁니다. """
+    if not inplace:
+        gen = copy.deepcopy(gen)
+    gen = gen.eval()
+
+    stats = {"weight_norm": strip_weight_norms(gen), "conv_block": 0, "conv_bn": 0, "memory": 0}
+
+    for m in gen.modules():
+        if isinstance(m, ConvBlock):
+            stats["conv_block"] += fold_conv_block(m)
+        elif isinstance(m, BasicConv) and m.bn is not None:
+            m.conv = fuse_conv_bn_eval(m.conv, m.bn)
+            m.bn = None
+            stats["conv_bn"] += 1
+
+    for memory in gen.memory.values():
+        if isinstance(getattr(memory, "persistent_memory", None), PersistentMemory):
+            memory.persistent_memory = FoldedPersistentMemory(memory.persistent_memory)
+            stats["memory"] += 1
+
+    for p in gen.parameters():
+        p.requires_grad_(False)
+
+    logging.info(
+        f"가중치 폴딩 완료 - weight norm: {stats['weight_norm']}, BN(ConvBlock): {stats['conv_block']}, "
+        f"conv-BN: {stats['conv_bn']}, persistent memory: {stats['memory']}"
+    )
+    return gen
+
+
+@torch.no_grad()
+def check_equivalence(ref_gen, folded_gen, n_chars=8, n_comps=68, seed=0):
+    """ 동일한 무작위 입력에 대해 두 Generator의 encode_write -> read_decode 출력 최대 차이 """
+    device = ref_gen.device
+    g = torch.Generator().manual_seed(seed)
+    imgs = torch.rand(n_chars, 1, 128, 128, generator=g).mul(2).sub(1).to(device)
+    decs = torch.randint(0, n_comps, (n_chars, 3), generator=g).to(device)
+    fids = [0] * n_chars
+
+    outs = []
+    for gen in (ref_gen, folded_gen):
+        gen.encode_write(fids, decs, imgs)
+        outs.append(gen.read_decode(fids, decs))
+
+    return (outs[0] - outs[1]).abs().max().item()
+
+
+def main():
+    from DM.models import Generator
+
+    parser = argparse.ArgumentParser(description="Generator 가중치 폴딩 및 수치 동등성 확인")
+    parser.add_argument("--weight", default=None, help="체크포인트 경로 (없으면 무작위 가중치)")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--n_heads", type=int, default=3)
+    parser.add_argument("--n_comps", type=int, default=68)
+    args = parser.parse_args()
+
+    device = torch.device(args.device)
+    gen = Generator(n_heads=args.n_heads, n_comps=args.n_comps).to(device).eval()
+    if args.weight:
+        weight = torch.load(args.weight, map_location=device, weights_only=False)
+        gen.load_state_dict(weight.get("generator_ema", weight.get("state_dict", weight)))
+    else:
+        # 초기값(mean=0, var=1) 그대로면 BN 폴딩이 항등 변환이 되므로 통계를 흩트려 검증
+        with torch.no_grad():
+            for m in gen.modules():
+                if isinstance(m, nn.BatchNorm2d):
+                    m.running_mean.uniform_(-0.5, 0.5)
+                    m.running_var.uniform_(0.5, 2.0)
+                    m.weight.uniform_(0.5, 1.5)
+                    m.bias.uniform_(-0.3, 0.3)
+
+    folded = fold_generator(gen)
+    diff = check_equivalence(gen, folded, n_comps=args.n_comps)
+    logging.info(f"최대 출력 차이: {diff:.3e} (허용치 {ATOL:.0e})")
+    if diff > ATOL:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    main()
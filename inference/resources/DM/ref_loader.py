@@ -0,0 +1,125 @@
+"""
+참조 글리프 로더.
+
+참조 이미지를 스레드 풀로 병렬 디코딩하여 (CUDA인 경우 pinned) uint8 버퍼에 채우고,
+정규화는 장치로 옮긴 뒤 한 번에 수행합니다. 인코딩 중에는 다음 배치의 H2D 복사를
+별도 스트림에서 미리 시작하여 인코딩과 전송을 겹칩니다.
+
+크로퍼가 글리프 배열(glyphs.npz)을 함께 저장한 경우 JPEG 디코딩 없이 배열을 그대로 사용합니다.
+"""
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import torch
+from PIL import Image
+
+IMG_SIZE = 128
+GLYPH_ARRAY_FILE = "glyphs.npz"
+
+
+def load_glyph_arrays(reference_dir, keys):
+    """ 크로퍼가 저장한 {key: {char: uint8 [H, W]}} 배열을 불러옵니다. 파일이 없는 폰트는 제외됩니다. """
+    arrays = {}
+    for key in keys:
+        path = Path(reference_dir) / key / GLYPH_ARRAY_FILE
+        if not path.exists():
+            continue
+        try:
+            with np.load(path) as data:
+                arrays[key] = dict(zip(data["chars"].tolist(), data["glyphs"]))
+        except Exception as e:
+            logging.warning(f"글리프 배열 로드 실패, 이미지 파일을 사용합니다: {path} ({e})")
+    return arrays
+
+
+def to_glyph_array(img):
+    """ PIL 이미지를 TRANSFORM과 같은 크기의 흑백 uint8 배열로 변환합니다. """
+    if img.mode != "L":
+        img = img.convert("L")
+    if img.size != (IMG_SIZE, IMG_SIZE):
+        img = img.resize((IMG_SIZE, IMG_SIZE), Image.BILINEAR)
+    return np.asarray(img, dtype=np.uint8)
+
+
+def normalize(imgs):
+    """ uint8 [0, 255] -> float [-1, 1] (ToTensor + Normalize([0.5], [0.5])와 동일) """
+    return imgs.float().div_(127.5).sub_(1.0)
+
+
+class ReferenceLoader:
+    def __init__(self, load_img, device, num_workers=None, arrays=None):
+        """
+        Args:
+            load_img: (key, char) -> PIL 이미지
+            device: 모델 장치
+            num_workers: 디코딩 스레드 수 (기본값: CPU 코어 수, 최대 8)
+            arrays: load_glyph_arrays 결과. 있으면 이미지 파일 대신 사용
+        """
+        self.load_img = load_img
+        self.device = torch.device(device)
+        self.num_workers = num_workers or min(8, os.cpu_count() or 1)
+        self.arrays = arrays or {}
+
+    @property
+    def pin_memory(self):
+        return self.device.type == "cuda"
+
+    def _read(self, key, char):
+        glyph = self.arrays.get(key, {}).get(char)
+        if glyph is not None:
+            return glyph
+        with self.load_img(key, char) as img:
+            return to_glyph_array(img)
+
+    def load(self, key, chars):
+        """ 참조 문자들을 uint8 [N, 1, H, W] 호스트 텐서로 읽습니다. """
+        buf = torch.empty(len(chars), 1, IMG_SIZE, IMG_SIZE, dtype=torch.uint8, pin_memory=self.pin_memory)
+        out = buf.numpy()
+
+        def fill(i):
+            out[i, 0] = self._read(key, chars[i])
+
+        with ThreadPoolExecutor(self.num_workers) as pool:
+            list(pool.map(fill, range(len(chars))))
+        return buf
+
+    def prefetcher(self, imgs):
+        return DevicePrefetcher(imgs, self.device)
+
+
+class DevicePrefetcher:
+    """ 호스트 uint8 텐서의 구간을 장치로 옮겨 정규화하며, 다음 구간의 복사를 미리 시작합니다. """
+    def __init__(self, imgs, device):
+        self.imgs = imgs
+        self.device = torch.device(device)
+        self.stream = torch.cuda.Stream(self.device) if self.device.type == "cuda" else None
+        self.pending = {}
+
+    def _copy(self, start, end):
+        if self.stream is None:
+            return self.imgs[start:end]
+        with torch.cuda.stream(self.stream):
+            return self.imgs[start:end].to(self.device, non_blocking=True)
+
+    def get(self, start, end):
+        """ [start, end) 구간을 정규화된 장치 텐서로 반환하고 같은 크기의 다음 구간을 미리 복사합니다. """
+        batch = self.pending.pop((start, end), None)
+        # 배치 크기가 바뀌어(OOM 등) 쓰이지 않게 된 선행 복사는 버림
+        self.pending.clear()
+        if batch is None:
+            batch = self._copy(start, end)
+
+        if self.stream is not None:
+            current = torch.cuda.current_stream(self.device)
+            current.wait_stream(self.stream)
+            batch.record_stream(current)
+
+        n_items = len(self.imgs)
+        if end < n_items:
+            next_end = min(end + (end - start), n_items)
+            self.pending[(end, next_end)] = self._copy(end, next_end)
+
+        return normalize(batch)
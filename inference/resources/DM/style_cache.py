@@ -0,0 +1,93 @@
+"""
+참조 글리프로부터 인코딩된 스타일 메모리(DynamicMemory) 스냅샷의 디스크 캐시.
+
+스타일 메모리는 참조 이미지와 모델 가중치로 완전히 결정되므로, 두 값의 해시를 키로
+스냅샷을 저장해 두면 재시도/재전송/재생성 시 ComponentEncoder 실행을 건너뛸 수 있습니다.
+캐시는 전체 크기 상한을 넘으면 가장 오래 사용되지 않은 항목부터 삭제(LRU)합니다.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+import torch
+
+SNAPSHOT_SUFFIX = ".style.pt"
+
+
+class StyleCache:
+    def __init__(self, cache_dir, model_key, max_bytes=2 << 30):
+        """
+        Args:
+            cache_dir: 스냅샷 저장 디렉토리
+            model_key: 모델 가중치/코드 지문 (가중치가 바뀌면 캐시 키도 바뀌어야 함)
+            max_bytes: 캐시 전체 크기 상한
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.model_key = model_key
+        self.max_bytes = max_bytes
+
+    def key(self, ref_chars, ref_imgs):
+        """ 참조 문자 목록과 (전처리된) 참조 이미지 텐서로부터 캐시 키를 만듭니다.
+
+        참조 문자 목록의 순서는 실행마다 달라질 수 있으므로 문자 순으로 정렬해 해시합니다.
+        """
+        h = hashlib.sha256()
+        h.update(self.model_key.encode())
+        ref_imgs = ref_imgs.detach().cpu().contiguous()
+        for idx in sorted(range(len(ref_chars)), key=lambda i: ref_chars[i]):
+            h.update(ref_chars[idx].encode("utf-8"))
+            h.update(ref_imgs[idx].numpy().tobytes())
+        return h.hexdigest()
+
+    def path(self, key):
+        return self.cache_dir / f"{key}{SNAPSHOT_SUFFIX}"
+
+    def get(self, key):
+        path = self.path(key)
+        if not path.exists():
+            return None
+        try:
+            snapshot = torch.load(path, map_location="cpu", weights_only=True)
+        except Exception as e:
+            logging.warning(f"스타일 캐시 로드 실패, 항목을 삭제합니다: {path.name} ({e})")
+            path.unlink(missing_ok=True)
+            return None
+        # LRU 순서를 위해 마지막 사용 시각 갱신
+        os.utime(path)
+        return snapshot
+
+    def put(self, key, snapshot):
+        path = self.path(key)
+        # 여러 추론 프로세스가 같은 키를 동시에 저장할 수 있으므로 프로세스마다 다른 임시 파일에 쓴 뒤 교체
+        with tempfile.NamedTemporaryFile("wb", dir=path.parent, prefix=key, suffix=".tmp", delete=False) as f:
+            tmp_path = Path(f.name)
+            try:
+                torch.save(snapshot, f)
+            except BaseException:
+                f.close()
+                tmp_path.unlink(missing_ok=True)
+                raise
+        tmp_path.replace(path)
+        logging.debug(f"스타일 캐시 저장: {path.name} ({path.stat().st_size:,} 바이트)")
+        self.evict()
+
+    def evict(self):
+        """ 전체 크기가 상한을 넘으면 오래 사용되지 않은 스냅샷부터 삭제합니다. """
+        entries = []
+        for p in self.cache_dir.glob(f"*{SNAPSHOT_SUFFIX}"):
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, p in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            p.unlink(missing_ok=True)
+            total -= size
+            logging.debug(f"스타일 캐시 삭제(LRU): {p.name}")
@@ -9,6 +9,9 @@ import torch.nn.functional as F
 from .modules import split_dim
 from .blocks import w_norm_dispatch, ConvBlock, norm_dispatch
 
+# fused attention kernel (flash / memory-efficient) is available from torch 2.0
+HAS_SDPA = hasattr(F, 'scaled_dot_product_attention')
+
 
 class Attention(nn.Module):
     def __init__(self, C_in_q, C_in_kv, C_qk, C_v, w_norm='none', scale=False, n_heads=1,
@@ -68,18 +71,42 @@ class Attention(nn.Module):
         key = split_dim(key, 1, self.n_heads)
         value = split_dim(value, 1, self.n_heads)
 
-        attn_score = torch.einsum('bhcq,bhck->bhqk', query, key) # [B, n_heads, H*W, H*W]
-        if hasattr(self, 'rel_pos'):
-            attn_score += self.rel_pos(query)
-        if hasattr(self, 'scale'):
-            attn_score *= self.scale
-
-        attn_w = F.softmax(attn_score, dim=-1)
-        attn_out = torch.einsum('bhqk,bhck->bhcq', attn_w, value).reshape(B, C, H, W)
+        if HAS_SDPA:
+            attn_out = self.fused_attention(query, key, value).reshape(B, C, H, W)
+        else:
+            attn_score = torch.einsum('bhcq,bhck->bhqk', query, key) # [B, n_heads, H*W, H*W]
+            if hasattr(self, 'rel_pos'):
+                attn_score += self.rel_pos(query)
+            if hasattr(self, 'scale'):
+                attn_score *= self.scale
+
+            attn_w = F.softmax(attn_score, dim=-1)
+            attn_out = torch.einsum('bhqk,bhck->bhcq', attn_w, value).reshape(B, C, H, W)
         out = self.out(attn_out)
 
         return out
 
+    def fused_attention(self, query, key, value):
+        """ scaled_dot_product_attention (fused kernel) path
+
+        Args:
+            query, key, value: [B, n_heads, C, N] (split by heads)
+
+        return:
+            [B, n_heads, C_v, H*W]
+        """
+        scale = getattr(self, 'scale', 1.)
+        attn_bias = None
+        if hasattr(self, 'rel_pos'):
+            # (QK^T + S_rel) * scale == QK^T * scale + S_rel * scale
+            attn_bias = self.rel_pos(query) * scale
+
+        attn_out = F.scaled_dot_product_attention(
+            query.transpose(-1, -2), key.transpose(-1, -2), value.transpose(-1, -2),
+            attn_mask=attn_bias, scale=scale
+        )  # [B, n_heads, H*W, C_v]
+        return attn_out.transpose(-1, -2)
+
 
 class AttentionFFNBlock(nn.Module):
     """ Transformer-like attention + ffn block """
@@ -188,6 +215,16 @@ class RelativePositionalEmbedding2d(nn.Module):
         self.register_buffer('rel_y', rel_y)
         self.register_buffer('rel_x', rel_x)
 
+        # rel_y[i, j] only depends on the key row and rel_x[i, j] on the key column,
+        # so the [H*W, H*W] tables reduce to [H*W, H_k] / [H*W, W_k] gather indices
+        # (cached per (H, W)).
+        H_k, W_k = (H // 2, W // 2) if down_kv else (H, W)
+        self.k_shape = (H_k, W_k)
+        flat_y = self.flat_index(rel_y.view(-1, H_k, W_k)[:, :, 0], H*2-1)
+        flat_x = self.flat_index(rel_x.view(-1, H_k, W_k)[:, 0, :], W*2-1)
+        self.register_buffer('flat_y', flat_y, persistent=False)
+        self.register_buffer('flat_x', flat_x, persistent=False)
+
     def rel_grid(self):
         # rel_y in [-(H-1), (H-1)]
         # rel_x in [-(W-1), (W-1)]
@@ -213,6 +250,12 @@ class RelativePositionalEmbedding2d(nn.Module):
 
         return rel_y, rel_x
 
+    @staticmethod
+    def flat_index(rel, n_rel):
+        """ rel[i, j] -> i * n_rel + rel[i, j] """
+        rows = torch.arange(rel.size(0)).unsqueeze(1)
+        return rows * n_rel + rel
+
     def forward(self, query):
         """
         Args:
@@ -221,9 +264,16 @@ class RelativePositionalEmbedding2d(nn.Module):
         return:
             [B, n_heads, H*W, H*W]
         """
-        r_x = self.w_emb(self.rel_x)  # [H*W, H*W, C_qk]
-        r_y = self.h_emb(self.rel_y)  # [H*W, H*W, C_qk]
+        # Q * (R_x + R_y) without materializing [H*W, H*W, C_qk] embedding tables:
+        # project query onto each relative offset once, gather per key row / column,
+        # then broadcast-add to the [H_k, W_k] key grid.
+        query = query.transpose(-1, -2)  # [B, n_heads, H*W, C_qk]
+        s_x = torch.matmul(query, self.w_emb.weight.t())  # [B, n_heads, H*W, 2W-1]
+        s_y = torch.matmul(query, self.h_emb.weight.t())  # [B, n_heads, H*W, 2H-1]
+
+        s_x = s_x.flatten(2)[..., self.flat_x]  # [B, n_heads, H*W, W_k]
+        s_y = s_y.flatten(2)[..., self.flat_y]  # [B, n_heads, H*W, H_k]
 
-        S_rel = torch.einsum('bhci,ijc->bhij', query, r_x + r_y)
+        S_rel = (s_y.unsqueeze(-1) + s_x.unsqueeze(-2)).flatten(-2)
         return S_rel
 
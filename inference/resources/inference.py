@@ -10,13 +10,18 @@ from pathlib import Path
 from itertools import chain
 from sconf import Config
 from PIL import Image
+import math
 import random
+import time
 
 import torch
 from torchvision import transforms
 
 from base.dataset import render, read_font, get_filtered_chars, sample
 from base.utils import save_tensor_to_image, load_reference, load_primals, load_decomposition
+from DM.autotune import run_batched
+from DM.ref_loader import ReferenceLoader, DevicePrefetcher
+from DM.glyph_check import degenerate_mask, FALLBACK_REDUCTIONS
 
 logging.basicConfig(
     level=logging.INFO,
@@ -103,59 +108,148 @@ def setup_eval_config(args, left_argv={}):
     return args, cfg, Generator, infer_func, infer_args
 
 
-def infer_DM(gen, save_dir, gen_chars, key_ref_dict, load_img, decomposition, batch_size=32, return_img=False):
+def encode_references(gen, ref_chars, ref_imgs, decomposition, batch_size=32, fid=0, on_backoff=None, device=None):
+    """ Encode reference glyphs in batches and write them to the dynamic memory of style `fid`
+
+    `ref_imgs` is a uint8 [N, 1, H, W] host tensor (see `ReferenceLoader.load`); each batch is copied
+    to `device` while the previous one is being encoded.
+    Returns the batch size in use at the end, which is smaller than `batch_size` after an OOM backoff.
+    """
+    device = torch.device(device) if device is not None else gen.device
+    prefetcher = DevicePrefetcher(ref_imgs, device)
+    logging.debug(f"배치 수: {math.ceil(len(ref_chars) / batch_size)}개")
+
+    def encode(start, end):
+        rchars = ref_chars[start:end]
+        decs = torch.LongTensor([decomposition[c] for c in rchars]).to(device)
+        fids = [fid] * len(decs)
+        gen.encode_write(fids, decs, prefetcher.get(start, end), reset_memory=False)
+        logging.debug(f"참조 문자 {start + 1}~{end}/{len(ref_chars)} 인코딩 완료")
+
+    logging.info(f"참조 문자 인코딩 시작")
+    batch_size = run_batched(encode, len(ref_chars), batch_size, "encode", on_backoff)
+    logging.info(f"참조 문자 인코딩 완료: 총 {len(ref_imgs)}개 문자")
+    return batch_size
+
+
+def interleave_targets(key_gen_dict, key_fid_dict):
+    """ Interleave target characters of every font in round-robin order as (key, fid, char) """
+    queues = [[(key, key_fid_dict[key], c) for c in gchars] for key, gchars in key_gen_dict.items()]
+    items = []
+    for i in range(max((len(q) for q in queues), default=0)):
+        items.extend(q[i] for q in queues if i < len(q))
+    return items
+
+
+def infer_DM(gen, save_dir, gen_chars, key_ref_dict, load_img, decomposition, batch_size=32, return_img=False,
+             device=None, style_cache=None, decode_batch_size=None, on_backoff=None, ref_loader=None,
+             check_glyphs=True, timings=None, on_progress=None):
+    """ Generate `gen_chars` for every font in `key_ref_dict`
+
+    Each font is written to its own style id of the dynamic memory, and target characters of all
+    fonts are interleaved into shared decode batches of `decode_batch_size` (default: `batch_size`).
+    Both batch sizes are halved on OOM; `on_backoff(stage, batch_size)` is called when that happens.
+    References are read through `ref_loader` (default: a `ReferenceLoader` over `load_img`).
+    With `check_glyphs`, degenerate outputs (blank, saturated or tiny) are decoded again with the
+    `FALLBACK_REDUCTIONS` of the memory; glyphs that still fail are not saved so that the font
+    assembly step falls back to the base font.
+    If `timings` is a dict, the elapsed seconds of the "encode" and "decode" phases and the number of
+    saved glyphs ("glyphs") are stored in it.
+    `on_progress(done, total)` is called after every decode batch instead of logging progress.
+    """
     save_dir = Path(save_dir)
     save_dir.mkdir(parents=True, exist_ok=True)
+    device = torch.device(device) if device is not None else gen.device
+    decode_batch_size = decode_batch_size or batch_size
+    ref_loader = ref_loader or ReferenceLoader(load_img, device)
 
     key_gen_dict = {k: gen_chars for k in key_ref_dict}
+    key_fid_dict = {k: fid for fid, k in enumerate(key_ref_dict)}
     logging.debug(f"추론 키 목록: {list(key_ref_dict.keys())}")
 
-    outs = {}
+    gen.reset_dynamic_memory()
+    logging.debug(f"동적 메모리 초기화 완료")
+    encode_start = time.time()
 
-    for key, gchars in key_gen_dict.items():
-        logging.info(f"폰트 '{key}' 처리 시작")
+    for key, fid in key_fid_dict.items():
+        logging.info(f"폰트 '{key}' 스타일 인코딩 시작 (style id: {fid})")
         (save_dir / key).mkdir(parents=True, exist_ok=True)
-        gen.reset_dynamic_memory()
-        logging.debug(f"동적 메모리 초기화 완료")
 
         ref_chars = key_ref_dict[key]
         logging.debug(f"참조 문자 수: {len(ref_chars)}개")
         logging.debug(f"참조 문자 로드 시작")
-        ref_imgs = torch.stack([TRANSFORM(load_img(key, c)) for c in ref_chars]).cuda()
-        ref_batches = torch.split(ref_imgs, batch_size)
-        ref_chars = [ref_chars[i:i+batch_size] for i in range(0, len(ref_chars), batch_size)]
-        logging.debug(f"배치 수: {len(ref_batches)}개")
-
-        logging.info(f"참조 문자 인코딩 시작")
-        batch_count = 0
-        for batch, rchars in zip(ref_batches, ref_chars):
-            batch_count += 1
-            decs = torch.LongTensor([decomposition[c] for c in rchars]).cuda()
-            fids = [0] * len(decs)  # This is okay because now we are playing with only one font.
-            gen.encode_write(fids, decs, batch, reset_memory=False)
-            logging.debug(f"배치 {batch_count}/{len(ref_batches)} 인코딩 완료: {len(rchars)}개 문자")
-        logging.info(f"참조 문자 인코딩 완료: 총 {len(ref_chars)}개 문자")
-
-        logging.info(f"새 글리프 생성 시작: {len(gchars)}개")
-        char_count = 0
-        for char in gchars:
-            char_count += 1
-            if char_count % 100 == 0:
-                logging.info(f"글리프 생성 진행: {char_count}/{len(gchars)}")
-                
-            dec = torch.LongTensor([decomposition[char]]).cuda()
-            fid = [0]
-            out = gen.read_decode(fid, dec, reset_memory=False)[0].detach().cpu()
-            if return_img:
-                outs.setdefault(key, []).append(out)
-
-            path = save_dir / key / f"{char}.png"
-            save_tensor_to_image(out, path)
-            
-            if char_count % 1000 == 0:
-                logging.debug(f"글리프 저장 진행 중: {char_count}개 완료")
+        ref_imgs = ref_loader.load(key, ref_chars)
+
+        snapshot_key = style_cache.key(ref_chars, ref_imgs) if style_cache is not None else None
+        snapshot = style_cache.get(snapshot_key) if style_cache is not None else None
+        if snapshot is not None:
+            gen.restore_memory(fid, snapshot)
+            logging.info(f"스타일 캐시 적중: 참조 문자 인코딩 생략 ({snapshot_key[:12]})")
+        else:
+            batch_size = encode_references(gen, ref_chars, ref_imgs, decomposition, batch_size,
+                                           fid=fid, on_backoff=on_backoff, device=device)
+            if style_cache is not None:
+                style_cache.put(snapshot_key, gen.snapshot_memory(fid))
+
+    encode_seconds = time.time() - encode_start
+    targets = interleave_targets(key_gen_dict, key_fid_dict)
+    logging.info(f"새 글리프 생성 시작: 폰트 {len(key_gen_dict)}개, 총 {len(targets)}개 (디코딩 배치 크기: {decode_batch_size})")
 
+    outs = {}
+    char_counts = {key: 0 for key in key_gen_dict}
+    n_done = 0
+
+    def decode_items(items, reduction="mean", log_progress=False):
+        """ Decode `items` and save the valid glyphs; returns the items rejected by the check """
+        rejected = []
+
+        def decode(start, end):
+            nonlocal n_done
+            batch = items[start:end]
+            fids = [fid for _, fid, _ in batch]
+            decs = torch.LongTensor([decomposition[c] for _, _, c in batch]).to(device)
+            out_batch = gen.read_decode(fids, decs, reset_memory=False, reduction=reduction).detach()
+            bad = degenerate_mask(out_batch).tolist() if check_glyphs else [False] * len(batch)
+            out_batch = out_batch.cpu()
+
+            for item, out, is_bad in zip(batch, out_batch, bad):
+                if is_bad:
+                    rejected.append(item)
+                    continue
+                key, _, char = item
+                if return_img:
+                    outs.setdefault(key, []).append(out)
+
+                path = save_dir / key / f"{char}.png"
+                save_tensor_to_image(out, path)
+                char_counts[key] += 1
+
+            if log_progress and on_progress is not None:
+                on_progress(n_done + len(batch), len(targets))
+            # 100개 단위 경계를 지날 때마다 진행 상황 출력
+            elif log_progress and (n_done + len(batch)) // 100 > n_done // 100:
+                logging.info(f"글리프 생성 진행: {n_done + len(batch)}/{len(targets)}")
+            n_done += len(batch)
+
+        run_batched(decode, len(items), decode_batch_size, "decode", on_backoff)
+        return rejected
+
+    decode_start = time.time()
+    rejected = decode_items(targets, log_progress=True)
+    for reduction in FALLBACK_REDUCTIONS:
+        if not rejected:
+            break
+        logging.warning(f"불량 글리프 {len(rejected)}개를 '{reduction}' reduction으로 다시 생성합니다: "
+                        f"{''.join(c for _, _, c in rejected[:20])}")
+        rejected = decode_items(rejected, reduction)
+    if rejected:
+        logging.warning(f"다시 생성해도 불량인 글리프 {len(rejected)}개는 저장하지 않습니다 (기본 폰트로 대체): "
+                        f"{''.join(c for _, _, c in rejected)}")
+
+    for key, char_count in char_counts.items():
         logging.info(f"폰트 '{key}' 처리 완료: {char_count}개 글리프 생성")
+    if timings is not None:
+        timings.update(encode=encode_seconds, decode=time.time() - decode_start, glyphs=sum(char_counts.values()))
 
     return outs
 
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 추론 컨테이너와 같이 inference/resources를 모듈 경로에 추가 (DM, base 패키지)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "resources"))
@@ -0,0 +1,34 @@
+import pytest
+import torch
+import torch.nn as nn
+
+from DM.models import Generator
+from DM.optimize import fold_generator, check_equivalence, ATOL
+
+
+@pytest.fixture(scope="module")
+def generator():
+    torch.manual_seed(0)
+    gen = Generator(n_heads=3, n_comps=68).eval()
+    # 초기값(mean=0, var=1) 그대로면 BN 폴딩이 항등 변환이 되므로 통계를 흩트려 검증
+    with torch.no_grad():
+        for m in gen.modules():
+            if isinstance(m, nn.BatchNorm2d):
+                m.running_mean.uniform_(-0.5, 0.5)
+                m.running_var.uniform_(0.5, 2.0)
+                m.weight.uniform_(0.5, 1.5)
+                m.bias.uniform_(-0.3, 0.3)
+    return gen
+
+
+def test_folded_generator_matches_original(generator):
+    folded = fold_generator(generator)
+    assert check_equivalence(generator, folded, n_chars=4) <= ATOL
+
+
+def test_fold_keeps_original_generator(generator):
+    before = {k: v.clone() for k, v in generator.state_dict().items()}
+    fold_generator(generator)
+    after = generator.state_dict()
+    assert before.keys() == after.keys()
+    assert all(torch.equal(before[k], after[k]) for k in before)
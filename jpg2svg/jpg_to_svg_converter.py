@@ -3,7 +3,10 @@ import sys
 import glob
 import subprocess
 import logging
+import numpy as np
 from PIL import Image
+from binarize import BINARIZE_MODES, DEFAULT_THRESHOLD, binarize, to_bitmap
+from stage_metrics import emit_started, emit_finished, install_log_rate_limit, start_profiling, ProgressReporter
 
 
 logging.basicConfig(
@@ -11,9 +14,19 @@ logging.basicConfig(
     format='%(message)s',
     handlers=[logging.StreamHandler()]
 )
+install_log_rate_limit()
 
 # Potrace 명령어 설정
 POTRACE_COMMAND = "potrace"
+# 외곽선 최적화 파라미터 (potrace 기본값과 동일)
+#   turdsize: 이 면적(픽셀) 이하의 얼룩 제거, alphamax: 모서리 판정 기준 (클수록 곡선이 매끄럽고 점이 적음),
+#   opttolerance: 곡선 병합 허용 오차 (클수록 점이 적음)
+POTRACE_TURDSIZE = int(os.getenv("POTRACE_TURDSIZE", "2"))
+POTRACE_ALPHAMAX = float(os.getenv("POTRACE_ALPHAMAX", "1.0"))
+POTRACE_OPTTOLERANCE = float(os.getenv("POTRACE_OPTTOLERANCE", "0.2"))
+# 이진화 방식: fixed(고정 임계값) | otsu(글리프별) | adaptive(폰트 전체 히스토그램 기준)
+BINARIZE_MODE = os.getenv("BINARIZE_MODE", "fixed")
+BINARIZE_THRESHOLD = int(os.getenv("BINARIZE_THRESHOLD", str(DEFAULT_THRESHOLD)))
 
 def create_directory_if_not_exists(directory):
     """지정된 디렉토리가 없으면 생성합니다."""
@@ -25,36 +38,44 @@ def create_directory_if_not_exists(directory):
             logging.error(f"디렉토리 생성 실패: {e}")
             sys.exit(1)
 
-def convert_to_bmp(input_path, temp_path):
+def load_ink_masks(image_paths):
+    """모든 이미지를 흑백 배열로 읽어 크기별 묶음 단위로 한 번에 이진화합니다.
+
+    Returns:
+        {이미지 경로: 잉크 마스크 bool [H, W]} (읽지 못한 이미지는 제외)
+    """
+    groups = {}
+    for path in image_paths:
+        try:
+            with Image.open(path) as img:
+                array = np.asarray(img.convert('L'), dtype=np.uint8)
+            groups.setdefault(array.shape, []).append((path, array))
+        except Exception as e:
+            logging.error(f"'{path}' 이미지 로드 실패: {e}")
+
+    masks = {}
+    for shape, items in groups.items():
+        stack = np.stack([array for _, array in items])
+        logging.debug(f"이진화 처리: {len(items)}개 ({shape[1]}x{shape[0]}), 방식: {BINARIZE_MODE}")
+        for (path, _), mask in zip(items, binarize(stack, BINARIZE_MODE, BINARIZE_THRESHOLD)):
+            masks[path] = mask
+    return masks
+
+def convert_to_bmp(mask, temp_path):
     try:
-        logging.debug(f"이미지 로드 시작: {input_path}")
-        with Image.open(input_path) as img:
-            # 원본 이미지 정보 기록
-            width, height = img.size
-            mode = img.mode
-            logging.debug(f"원본 이미지 크기: {width}x{height}, 모드: {mode}")
-            
-            # 흑백으로 변환
-            logging.debug(f"흑백(L) 모드로 변환 중")
-            img = img.convert('L')
-            
-            # 임계값 적용 (128)하여 이진화
-            logging.debug(f"이진화 처리 시작 (임계값: 128)")
-            img = img.point(lambda x: 0 if x < 128 else 255, '1')
-            
-            # BMP로 저장
-            logging.debug(f"BMP 파일 저장: {temp_path}")
-            img.save(temp_path, 'BMP')
-            
-            # 저장된 파일 크기 확인
-            bmp_size = os.path.getsize(temp_path)
-            logging.debug(f"BMP 파일 생성 완료: {bmp_size:,} 바이트, 크기: {width}x{height}")
+        # BMP로 저장
+        logging.debug(f"BMP 파일 저장: {temp_path}")
+        to_bitmap(mask).save(temp_path, 'BMP')
+
+        # 저장된 파일 크기 확인
+        bmp_size = os.path.getsize(temp_path)
+        logging.debug(f"BMP 파일 생성 완료: {bmp_size:,} 바이트, 크기: {mask.shape[1]}x{mask.shape[0]}")
         return True
     except Exception as e:
-        logging.error(f"'{input_path}' BMP 변환 실패: {e}")
+        logging.error(f"'{temp_path}' BMP 변환 실패: {e}")
         return False
 
-def convert_image(input_path, output_path):
+def convert_image(input_path, output_path, mask):
     # 임시 BMP 파일 경로
     temp_bmp = os.path.splitext(output_path)[0] + '.bmp'
     
@@ -63,9 +84,9 @@ def convert_image(input_path, output_path):
         input_size = os.path.getsize(input_path)
         logging.debug(f"변환 시작: '{os.path.basename(input_path)}' ({input_size:,} 바이트) → '{os.path.basename(output_path)}'")
         
-        # 이미지를 흑백 BMP로 변환
+        # 이진화된 마스크를 BMP로 저장
         logging.debug(f"단계 1/3: BMP 변환 시작")
-        if not convert_to_bmp(input_path, temp_bmp):
+        if not convert_to_bmp(mask, temp_bmp):
             logging.error(f"변환 실패: BMP 변환 단계에서 실패")
             return False
         
@@ -78,6 +99,9 @@ def convert_image(input_path, output_path):
         command = [
             POTRACE_COMMAND,
             '-s',          # SVG 출력
+            '-t', str(POTRACE_TURDSIZE),
+            '-a', str(POTRACE_ALPHAMAX),
+            '-O', str(POTRACE_OPTTOLERANCE),
             '-o', output_path,  # 출력 파일
             temp_bmp       # 입력 파일
         ]
@@ -174,11 +198,15 @@ def process_images(input_dir, output_dir):
     total_files = len(image_paths)
     logging.info(f"변환 준비: 총 {total_files}개 이미지 파일 발견")
     
+    # 전체 이미지를 한 번에 이진화
+    ink_masks = load_ink_masks(image_paths)
+
     # 변환 통계
     processed_count = 0
     failed_count = 0
     total_input_size = 0
     total_output_size = 0
+    progress = ProgressReporter("svg", total_files)
 
     # 각 이미지 처리
     for index, img_path in enumerate(image_paths, 1):
@@ -189,20 +217,21 @@ def process_images(input_dir, output_dir):
         input_size = os.path.getsize(img_path)
         total_input_size += input_size
         
-        if index % 100 == 0:
-                logging.info(f"이미지 처리 진행: {index}/{total_files}")
         logging.debug(f"이미지 처리 [{index}/{total_files}]: '{os.path.basename(img_path)}' ({input_size:,} 바이트)")
         
-        if convert_image(img_path, output_path):
+        if img_path in ink_masks and convert_image(img_path, output_path, ink_masks[img_path]):
             output_size = os.path.getsize(output_path)
             total_output_size += output_size
             compression_ratio = (input_size / output_size) if output_size > 0 else 0
             
             logging.debug(f"변환 성공: '{os.path.basename(output_path)}' 생성 완료 ({output_size:,} 바이트, 압축비: {compression_ratio:.2f}x)")
             processed_count += 1
+            progress.advance()
         else:
             logging.error(f"변환 실패: '{os.path.basename(img_path)}'")
             failed_count += 1
+            progress.fail(base_filename, "SVG 변환 실패")
+    progress.report()
 
     # 실행 시간 계산
     elapsed_time = time.time() - start_time
@@ -217,9 +246,12 @@ def process_images(input_dir, output_dir):
         logging.info(f"크기: 입력: {total_input_size:,} 바이트 | 출력: {total_output_size:,} 바이트 | 평균 압축비: {avg_compression:.2f}x")
     
     logging.info(f"시간: 총 {elapsed_time:.2f}초 | 평균 {avg_time_per_file:.2f}초/파일")
+    emit_finished("svg", elapsed_time, glyphs=processed_count)
     logging.info("--------------------------")
 
 if __name__ == "__main__":
+    emit_started("svg")
+    start_profiling("svg")
     if len(sys.argv) != 3:
         print("사용법: python jpg_to_svg_converter.py <입력_이미지_디렉토리> <출력_svg_디렉토리>")
         sys.exit(1)
@@ -230,5 +262,10 @@ if __name__ == "__main__":
     logging.info(f"JPG/PNG → SVG 변환 시작")
     logging.info(f"입력 디렉토리: {input_directory}")
     logging.info(f"출력 디렉토리: {output_directory}")
+    if BINARIZE_MODE not in BINARIZE_MODES:
+        logging.error(f"지원하지 않는 BINARIZE_MODE: {BINARIZE_MODE} ({' | '.join(BINARIZE_MODES)})")
+        sys.exit(1)
+    logging.info(f"이진화 방식: {BINARIZE_MODE} (고정 임계값: {BINARIZE_THRESHOLD})")
+    logging.info(f"Potrace 파라미터: turdsize={POTRACE_TURDSIZE}, alphamax={POTRACE_ALPHAMAX}, opttolerance={POTRACE_OPTTOLERANCE}")
     
     process_images(input_directory, output_directory) 
\ No newline at end of file
@@ -0,0 +1,231 @@
+"""
+파이프라인 단계 측정값 보고
+
+각 단계 스크립트(크롭, 추론, JPG → SVG, SVG → TTF)는 표준 출력에 접두어가 붙은 JSON 한 줄로
+측정값을 보고하고, 파이프라인 서버(fastAPI/script_utils.run_script)가 이를 읽어 Prometheus
+메트릭으로 기록합니다.
+
+    @@metric {"stage": "crop", "event": "started", "started_at": 1714000000.0}
+    @@metric {"stage": "crop", "event": "progress", "done": 120, "total": 2350, "failed": 0, "elapsed": 2.0}
+    @@metric {"stage": "crop", "event": "error", "item": "가", "message": "..."}
+    @@metric {"stage": "crop", "event": "finished", "duration": 3.2, "glyphs": 220, "peak_rss_bytes": ...}
+
+글리프 단위 진행 상황은 ProgressReporter로 일정 간격마다 progress 이벤트 하나로 보고하고,
+사람이 읽는 로그는 install_log_rate_limit()으로 호출 위치마다 초당 줄 수를 제한합니다.
+
+서버가 프로파일링할 요청에 STAGE_PROFILE_DIR을 넘기면 start_profiling()이 단계 프로세스의
+cProfile 통계와 flamegraph용 스택 표본을 그 디렉토리에 저장합니다.
+"""
+
+import atexit
+import collections
+import json
+import logging
+import os
+import resource
+import sys
+import threading
+import time
+
+METRIC_PREFIX = "@@metric "
+# 프로세스(컨테이너) 시작 시각: 서버가 스크립트를 실행한 시각과의 차이로 컨테이너 기동 지연을 계산
+STARTED_AT = time.time()
+# progress 이벤트 최소 간격(초)
+PROGRESS_INTERVAL = float(os.getenv("STAGE_PROGRESS_INTERVAL", "2.0"))
+# 단계마다 개별 error 이벤트로 보고할 최대 개수 (나머지는 progress의 failed 수로만 집계)
+MAX_ERROR_EVENTS = int(os.getenv("STAGE_MAX_ERROR_EVENTS", "20"))
+# 호출 위치(파일, 줄)마다 LOG_RATE_INTERVAL초 동안 통과시킬 최대 로그 수 (0이면 제한 없음)
+LOG_RATE_LIMIT = int(os.getenv("STAGE_LOG_RATE_LIMIT", "10"))
+LOG_RATE_INTERVAL = float(os.getenv("STAGE_LOG_RATE_INTERVAL", "1.0"))
+# 요청별 프로파일 저장 디렉토리 (비어 있으면 프로파일링하지 않음)와 스택 표본 추출 간격(초)
+PROFILE_DIR = os.getenv("STAGE_PROFILE_DIR", "")
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("STAGE_PROFILE_INTERVAL", "0.005"))
+
+
+def peak_rss_bytes():
+    # 작업 프로세스 풀을 쓰는 단계가 있으므로 자식 프로세스 중 최대값도 함께 고려 (Linux의 ru_maxrss 단위는 KB)
+    peak_kb = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                  resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return peak_kb * 1024
+
+
+def emit(stage, event, **values):
+    values = {key: value for key, value in values.items() if value is not None}
+    line = json.dumps({"stage": stage, "event": event, **values}, ensure_ascii=False)
+    sys.stdout.write(METRIC_PREFIX + line + "\n")
+    sys.stdout.flush()
+
+
+def emit_started(stage):
+    emit(stage, "started", started_at=STARTED_AT)
+
+
+def emit_finished(stage, duration, glyphs=None, **values):
+    emit(stage, "finished", duration=round(duration, 4), glyphs=glyphs, peak_rss_bytes=peak_rss_bytes(), **values)
+
+
+def emit_progress(stage, done, total, **values):
+    emit(stage, "progress", done=done, total=total, **values)
+
+
+def emit_error(stage, message, item=None):
+    emit(stage, "error", item=item, message=str(message))
+
+
+class ProgressReporter:
+    """글리프 단위 진행 상황을 모아 interval초마다 progress 이벤트 하나로 보고합니다.
+
+    실패 항목은 처음 MAX_ERROR_EVENTS개만 error 이벤트로 보내고 나머지는 failed 수로만 집계합니다.
+    """
+    def __init__(self, stage, total, interval=PROGRESS_INTERVAL):
+        self.stage = stage
+        self.total = total
+        self.interval = interval
+        self.done = 0
+        self.failed = 0
+        self._start = time.monotonic()
+        self._last_report = self._start
+
+    def advance(self, count=1):
+        self.done += count
+        self._maybe_report()
+
+    def update(self, done, total=None):
+        """완료 수를 직접 지정합니다 (콜백으로 진행 상황을 받는 경우)."""
+        self.done = done
+        if total is not None:
+            self.total = total
+        self._maybe_report()
+
+    def fail(self, item, message):
+        self.failed += 1
+        if self.failed <= MAX_ERROR_EVENTS:
+            emit_error(self.stage, message, item=item)
+        self._maybe_report()
+
+    def _maybe_report(self):
+        if time.monotonic() - self._last_report >= self.interval:
+            self.report()
+
+    def report(self):
+        self._last_report = time.monotonic()
+        emit_progress(self.stage, self.done, self.total, failed=self.failed,
+                      elapsed=round(self._last_report - self._start, 2))
+
+
+class RateLimitFilter(logging.Filter):
+    """호출 위치마다 interval초 동안 limit개의 로그만 통과시킵니다. ERROR 이상은 제한하지 않습니다.
+
+    생략된 수는 같은 위치의 다음 로그에 덧붙이고, 끝까지 남은 수는 summary()로 보고합니다.
+    """
+    def __init__(self, limit=LOG_RATE_LIMIT, interval=LOG_RATE_INTERVAL):
+        super().__init__()
+        self.limit = limit
+        self.interval = interval
+        self.total_suppressed = 0
+        self._windows = {}  # (pathname, lineno) -> [창 시작 시각, 통과 수, 생략 수]
+
+    def filter(self, record):
+        if self.limit <= 0 or record.levelno >= logging.ERROR:
+            return True
+        key = (record.pathname, record.lineno)
+        now = time.monotonic()
+        window = self._windows.get(key)
+        if window is None or now - window[0] >= self.interval:
+            suppressed = window[2] if window else 0
+            window = self._windows[key] = [now, 0, 0]
+            if suppressed:
+                record.msg = f"{record.getMessage()} (같은 위치의 로그 {suppressed}개 생략)"
+                record.args = None
+        if window[1] >= self.limit:
+            window[2] += 1
+            self.total_suppressed += 1
+            return False
+        window[1] += 1
+        return True
+
+    def summary(self):
+        if self.total_suppressed:
+            logging.info(f"반복 로그 {self.total_suppressed}개를 생략했습니다 (STAGE_LOG_RATE_LIMIT={self.limit})")
+
+
+def install_log_rate_limit(logger=None):
+    """로거(기본값: 루트 로거)의 모든 핸들러에 RateLimitFilter를 붙입니다."""
+    logger = logger or logging.getLogger()
+    rate_limit = RateLimitFilter()
+    for handler in logger.handlers:
+        handler.addFilter(rate_limit)
+    atexit.register(rate_limit.summary)
+    return rate_limit
+
+
+class StackSampler:
+    """대상 스레드(기본값: 메인 스레드)의 호출 스택을 interval초마다 표본 추출합니다.
+
+    결과는 flamegraph.pl, speedscope 등에서 바로 읽을 수 있는 접힌 스택(folded) 형식으로 저장합니다.
+    """
+    def __init__(self, interval=PROFILE_SAMPLE_INTERVAL, thread_id=None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.main_thread().ident
+        self.counts = collections.Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.counts[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def write(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.counts.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def start_profiling(stage, profile_dir=PROFILE_DIR):
+    """profile_dir가 설정되어 있으면 프로세스가 끝날 때까지 프로파일링하고 다음 파일을 저장합니다.
+      * <stage>.prof:   cProfile 통계 (snakeviz, pstats로 열람)
+      * <stage>.txt:    누적 시간 기준 상위 함수 요약
+      * <stage>.folded: 스택 표본 (flamegraph)
+    작업 프로세스 풀을 쓰는 단계는 메인 프로세스만 프로파일링합니다. 저장 함수(또는 None)를 반환합니다."""
+    if not profile_dir:
+        return None
+    import cProfile
+    import pstats
+
+    os.makedirs(profile_dir, exist_ok=True)
+    profiler = cProfile.Profile()
+    sampler = StackSampler().start()
+    profiler.enable()
+
+    def save():
+        profiler.disable()
+        sampler.stop()
+        base = os.path.join(profile_dir, stage)
+        try:
+            profiler.dump_stats(base + ".prof")
+            with open(base + ".txt", "w", encoding="utf-8") as f:
+                pstats.Stats(profiler, stream=f).sort_stats("cumulative").print_stats(50)
+            sampler.write(base + ".folded")
+        except Exception as e:
+            # 프로파일 저장 실패로 단계 결과가 바뀌지 않도록 경고만 남김
+            logging.warning(f"프로파일 저장 실패 ({stage}): {e}")
+
+    # sys.exit으로 끝나는 실패 경로도 프로파일을 남기도록 종료 시 저장
+    atexit.register(save)
+    logging.info(f"프로파일링 활성화: {profile_dir}")
+    return save
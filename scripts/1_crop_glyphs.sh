@@ -15,7 +15,8 @@ fi
 CROPPER_IMAGE_NAME="fontory-cropper"
 PROJECT_ROOT=$(dirname "$0")/..
 HOST_OUTPUT_DIR="$PROJECT_ROOT/result/1_cropped/$FONT_NAME"
-HOST_WRITTEN_DIR="$PROJECT_ROOT/written"
+# 요청별 템플릿 디렉토리 (파이프라인 서버가 작업마다 written/<requestUUID>를 지정)
+HOST_WRITTEN_DIR="${CROP_INPUT_DIR:-$PROJECT_ROOT/written}"
 HOST_DEBUG_DIR="$HOST_OUTPUT_DIR/debug"
 
 # 출력 및 디버그 디렉토리 생성
@@ -34,6 +35,13 @@ else
     echo "크로퍼 Docker 이미지를 찾았습니다. 빌드를 건너니다."
 fi
 
+# 요청별 프로파일링: 서버가 STAGE_PROFILE_DIR을 넘긴 경우 컨테이너에 마운트하여 프로파일을 저장
+PROFILE_ARGS=()
+if [ -n "$STAGE_PROFILE_DIR" ]; then
+    mkdir -p "$STAGE_PROFILE_DIR"
+    PROFILE_ARGS=(-v "$(realpath "$STAGE_PROFILE_DIR")":/app/profile -e STAGE_PROFILE_DIR=/app/profile)
+fi
+
 echo "크로퍼 컨테이너를 실행합니다..."
 
 # 컨테이너 실행
@@ -41,6 +49,7 @@ docker run --rm \
     -v "$(realpath "$HOST_WRITTEN_DIR")":/app/written \
     -v "$(realpath "$HOST_OUTPUT_DIR")":/app/cropped \
     -v "$(realpath "$HOST_DEBUG_DIR")":/app/debug_output \
+    "${PROFILE_ARGS[@]}" \
     $CROPPER_IMAGE_NAME /app/glyph_cropper.py /app/written /app/cropped
 
 # 실행 결과 확인
@@ -2,13 +2,13 @@
 
 set -e
 
-# 인자 처리
+# 인자 처리 (폰트 이름을 여러 개 주면 한 번의 추론에서 디코딩 배치를 공유합니다)
 if [ -z "$1" ]; then
-    FONT_NAME="default_font_name"
+    FONT_NAMES=("default_font_name")
     echo "폰트 이름이 주어지지 않았습니다. 기본값 'default_font_name'을 사용합니다."
 else
-    FONT_NAME="$1"
-    echo "폰트 이름: '$FONT_NAME'을(를) 사용합니다."
+    FONT_NAMES=("$@")
+    echo "폰트 이름: '${FONT_NAMES[*]}'을(를) 사용합니다."
 fi
 
 # 경로 설정
@@ -19,12 +19,27 @@ CONTAINER_WORK_DIR="/app"
 CONTAINER_REF_DIR="$CONTAINER_WORK_DIR/result/1_cropped"
 CONTAINER_OUTPUT_DIR="$CONTAINER_WORK_DIR/result/2_inference"
 BUILD_CONTEXT="$PROJECT_ROOT/inference"
+INFERENCE_DEVICE="${INFERENCE_DEVICE:-auto}"
+INFERENCE_NUM_THREADS="${INFERENCE_NUM_THREADS:-0}"
+INFERENCE_COMPILE="${INFERENCE_COMPILE:-1}"
+INFERENCE_FOLD="${INFERENCE_FOLD:-1}"
+INFERENCE_STYLE_CACHE_SIZE_MB="${INFERENCE_STYLE_CACHE_SIZE_MB:-2048}"
+INFERENCE_BATCH_SIZE="${INFERENCE_BATCH_SIZE:-0}"
+INFERENCE_MAX_BATCH_SIZE="${INFERENCE_MAX_BATCH_SIZE:-256}"
+INFERENCE_LOADER_WORKERS="${INFERENCE_LOADER_WORKERS:-0}"
+INFERENCE_CHECK_GLYPHS="${INFERENCE_CHECK_GLYPHS:-1}"
+# 추론 프로세스 하나의 GPU 메모리 예산 (MB, 0이면 GPU 전체). 파이프라인 서버는 추론 슬롯 크기를 넘겨줍니다.
+INFERENCE_GPU_MEMORY_MB="${INFERENCE_GPU_MEMORY_MB:-0}"
+# 배치 크기가 장치별로 달라지므로 고정 크기 분할 대신 확장 가능한 세그먼트로 단편화를 줄입니다
+PYTORCH_CUDA_ALLOC_CONF="${PYTORCH_CUDA_ALLOC_CONF:-expandable_segments:True}"
 
 # 입력 디렉토리 확인
-if [ ! -d "$PROJECT_ROOT/result/1_cropped/$FONT_NAME" ]; then
-  echo "오류: 참조 디렉토리 '$PROJECT_ROOT/result/1_cropped/$FONT_NAME'가 존재하지 않습니다."
-  exit 1
-fi
+for FONT_NAME in "${FONT_NAMES[@]}"; do
+  if [ ! -d "$PROJECT_ROOT/result/1_cropped/$FONT_NAME" ]; then
+    echo "오류: 참조 디렉토리 '$PROJECT_ROOT/result/1_cropped/$FONT_NAME'가 존재하지 않습니다."
+    exit 1
+  fi
+done
 
 # Docker 이미지 빌드 (필요시)
 if ! docker image inspect "$IMAGE_NAME":latest > /dev/null 2>&1; then
@@ -35,22 +50,56 @@ else
 fi
 
 # 출력 디렉토리 생성
-mkdir -p "$PROJECT_ROOT/result/2_inference/$FONT_NAME"
+for FONT_NAME in "${FONT_NAMES[@]}"; do
+  mkdir -p "$PROJECT_ROOT/result/2_inference/$FONT_NAME"
+done
+
+# 장치 설정 (GPU가 없는 노드에서는 --gpus 옵션 없이 CPU로 실행)
+GPU_ARGS=()
+if [ "$INFERENCE_DEVICE" != "cpu" ] && command -v nvidia-smi > /dev/null 2>&1 && nvidia-smi > /dev/null 2>&1; then
+  GPU_ARGS=(--gpus all)
+elif [ "$INFERENCE_DEVICE" = "cuda" ]; then
+  echo "오류: INFERENCE_DEVICE=cuda 이지만 GPU를 찾을 수 없습니다."
+  exit 1
+else
+  INFERENCE_DEVICE="cpu"
+fi
+
+# 요청별 프로파일링: 서버가 STAGE_PROFILE_DIR을 넘긴 경우 컨테이너에 마운트하여 프로파일을 저장
+PROFILE_ARGS=()
+if [ -n "$STAGE_PROFILE_DIR" ]; then
+  mkdir -p "$STAGE_PROFILE_DIR"
+  PROFILE_ARGS=(-v "$(realpath "$STAGE_PROFILE_DIR")":/app/profile -e STAGE_PROFILE_DIR=/app/profile)
+fi
 
 echo "추론 컨테이너를 실행합니다..."
 echo "Pipeline 마운트: $PROJECT_ROOT -> $CONTAINER_WORK_DIR"
+echo "추론 장치: $INFERENCE_DEVICE"
 
 # 컨테이너 실행
 docker run \
-  --gpus all \
+  "${GPU_ARGS[@]}" \
   --rm \
   --shm-size=16gb \
   -v "$PROJECT_ROOT":"$CONTAINER_WORK_DIR" \
   -e PYTHONPATH="$CONTAINER_WORK_DIR:$CONTAINER_WORK_DIR/inference/resources:$CONTAINER_WORK_DIR/resources:/app/resource" \
-  -e PYTORCH_CUDA_ALLOC_CONF=max_split_size_mb:32 \
+  -e PYTORCH_CUDA_ALLOC_CONF="$PYTORCH_CUDA_ALLOC_CONF" \
+  -e INFERENCE_GPU_MEMORY_MB="$INFERENCE_GPU_MEMORY_MB" \
+  "${PROFILE_ARGS[@]}" \
   "$IMAGE_NAME" \
   --reference_dir "$CONTAINER_REF_DIR" \
   --output_dir "$CONTAINER_OUTPUT_DIR" \
-  --font_name "$FONT_NAME"
+  --font_name "${FONT_NAMES[@]}" \
+  --device "$INFERENCE_DEVICE" \
+  --num_threads "$INFERENCE_NUM_THREADS" \
+  --compile "$INFERENCE_COMPILE" \
+  --fold "$INFERENCE_FOLD" \
+  --batch_size "$INFERENCE_BATCH_SIZE" \
+  --max_batch_size "$INFERENCE_MAX_BATCH_SIZE" \
+  --loader_workers "$INFERENCE_LOADER_WORKERS" \
+  --check_glyphs "$INFERENCE_CHECK_GLYPHS" \
+  --style_cache_size_mb "$INFERENCE_STYLE_CACHE_SIZE_MB"
 
-echo "추론 완료. 출력은 '$PROJECT_ROOT/result/2_inference/$FONT_NAME'에 저장되어야 합니다."
\ No newline at end of file
+for FONT_NAME in "${FONT_NAMES[@]}"; do
+  echo "추론 완료. 출력은 '$PROJECT_ROOT/result/2_inference/$FONT_NAME'에 저장되어야 합니다."
+done
\ No newline at end of file
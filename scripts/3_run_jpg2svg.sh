@@ -35,11 +35,18 @@ mkdir -p "$HOST_OUTPUT_DIR"
 # Docker 이미지 빌드 (필요시)
 if ! docker image inspect "$IMAGE_NAME":latest > /dev/null 2>&1; then
   echo "이미지 '$IMAGE_NAME:latest'를 찾을 수 없습니다. 컨텍스트 '$BUILD_CONTEXT'에서 빌드를 시작합니다..."
-  docker build -t "$IMAGE_NAME" "$BUILD_CONTEXT"
+  docker build -t "$IMAGE_NAME" -f "$BUILD_CONTEXT/Dockerfile" "$PROJECT_ROOT"
 else
   echo "이미지 '$IMAGE_NAME:latest'가 이미 존재합니다. 빌드를 건너뛰니다."
 fi
 
+# 요청별 프로파일링: 서버가 STAGE_PROFILE_DIR을 넘긴 경우 컨테이너에 마운트하여 프로파일을 저장
+PROFILE_ARGS=()
+if [ -n "$STAGE_PROFILE_DIR" ]; then
+  mkdir -p "$STAGE_PROFILE_DIR"
+  PROFILE_ARGS=(-v "$(realpath "$STAGE_PROFILE_DIR")":/app/profile -e STAGE_PROFILE_DIR=/app/profile)
+fi
+
 echo "JPG to SVG 변환 컨테이너를 실행합니다..."
 echo "  호스트 입력 디렉토리:  $HOST_INPUT_DIR"
 echo "  호스트 출력 디렉토리: $HOST_OUTPUT_DIR"
@@ -48,6 +55,12 @@ echo "  호스트 출력 디렉토리: $HOST_OUTPUT_DIR"
 docker run --rm \
   -v "$(realpath "$HOST_INPUT_DIR")":"$CONTAINER_INPUT_DIR":ro \
   -v "$(realpath "$HOST_OUTPUT_DIR")":"$CONTAINER_OUTPUT_DIR" \
+  -e BINARIZE_MODE="${BINARIZE_MODE:-fixed}" \
+  -e BINARIZE_THRESHOLD="${BINARIZE_THRESHOLD:-128}" \
+  -e POTRACE_TURDSIZE="${POTRACE_TURDSIZE:-2}" \
+  -e POTRACE_ALPHAMAX="${POTRACE_ALPHAMAX:-1.0}" \
+  -e POTRACE_OPTTOLERANCE="${POTRACE_OPTTOLERANCE:-0.2}" \
+  "${PROFILE_ARGS[@]}" \
   "$IMAGE_NAME" \
   "$CONTAINER_INPUT_DIR" "$CONTAINER_OUTPUT_DIR"
 
@@ -9,12 +9,13 @@ usage() {
   echo "  -e, --font-eng-name  폰트 영어 이름 (필수, 공백 없음)"
   echo "  -F, --family-name     폰트 패밀리 이름 (기본값: '<폰트_이름> FONT')"
   echo "  -S, --style-name      폰트 스타일 이름 (기본값: 'Regular')"
+  echo "  -W, --no-woff2        WOFF2를 생성하지 않고 TTF만 생성합니다 (웹폰트는 svg2ttf/webfont.py로 별도 생성)"
   echo "  -h, --help            이 도움말 메시지를 표시합니다"
   exit 1
 }
 
-TEMP=$(getopt -o hf:e:F:S: \
-             --long help,font-name:,font-eng-name:,family-name:,style-name: \
+TEMP=$(getopt -o hf:e:F:S:W \
+             --long help,font-name:,font-eng-name:,family-name:,style-name:,no-woff2 \
              -n "$0" -- "$@")
 if [ $? != 0 ]; then usage; fi
 eval set -- "$TEMP"
@@ -24,6 +25,7 @@ while true; do
     -e|--font-eng-name)   FONT_ENG_NAME="$2";   shift 2 ;;
     -F|--family-name)     FAMILY_NAME="$2";     shift 2 ;;
     -S|--style-name)      STYLE_NAME="$2";      shift 2 ;;
+    -W|--no-woff2)        SVG2TTF_WOFF2=0;      shift ;;
     -h|--help)            usage ;;
     --)                   shift; break ;;
     *)                    break ;;
@@ -36,6 +38,9 @@ if [ -z "$FONT_NAME" ] || [ -z "$FONT_ENG_NAME" ]; then
 fi
 : ${FAMILY_NAME:="${FONT_NAME}"}
 : ${STYLE_NAME:="Regular"}
+# WOFF2 생성 여부(1/0)와 brotli 압축 품질(0~11, 낮을수록 빠르고 파일이 큼)
+: ${SVG2TTF_WOFF2:=1}
+: ${WOFF2_QUALITY:=11}
 
 echo "폰트 이름:    ${FONT_NAME}"
 echo "영어 이름:    ${FONT_ENG_NAME}"
@@ -83,16 +88,64 @@ if [ $? -ne 0 ]; then
   exit 1
 fi
 
+# 폰트 조립 백엔드: fontforge (기본값) | fonttools (fontforge 없이 fontTools로 직접 조립)
+SVG2TTF_BACKEND="${SVG2TTF_BACKEND:-fontforge}"
+ENTRYPOINT_ARGS=()
+if [ "$SVG2TTF_BACKEND" = "fonttools" ]; then
+  ENTRYPOINT_ARGS=(--entrypoint python3)
+elif [ "$SVG2TTF_BACKEND" != "fontforge" ]; then
+  echo "오류: 지원하지 않는 SVG2TTF_BACKEND '$SVG2TTF_BACKEND' (fontforge | fonttools)" >&2
+  exit 1
+fi
+echo "폰트 조립 백엔드: $SVG2TTF_BACKEND"
+
+# 상주 폰트 조립 워커가 실행 중이면 워커로 요청 (scripts/svg2ttf_worker.sh start)
+SVG2TTF_WORKER_SOCKET="${SVG2TTF_WORKER_SOCKET:-$PROJECT_ROOT/result/.svg2ttf_worker/worker.sock}"
+if [ "$SVG2TTF_BACKEND" = "fontforge" ] && [ -S "$SVG2TTF_WORKER_SOCKET" ]; then
+  echo "상주 폰트 조립 워커로 변환합니다: $SVG2TTF_WORKER_SOCKET"
+  WORKER_EXIT=0
+  WORKER_ARGS=()
+  if [ "$SVG2TTF_WOFF2" = "0" ]; then
+    WORKER_ARGS=(--no_woff2)
+  fi
+  python3 "$PROJECT_ROOT/svg2ttf/worker_client.py" --socket "$SVG2TTF_WORKER_SOCKET" "${WORKER_ARGS[@]}" \
+    "/app/result/3_svg/$FONT_NAME" \
+    "/app/result/4_fonts/$OUTPUT_TTF_FILENAME" \
+    "$FONT_NAME" \
+    "$FONT_ENG_NAME" \
+    "$FAMILY_NAME" \
+    "$STYLE_NAME" || WORKER_EXIT=$?
+  if [ $WORKER_EXIT -eq 0 ]; then
+    echo "---------------------------------"
+    echo "폰트 생성 성공!"
+    echo "출력 파일(.ttf, .woff)은 '$HOST_OUTPUT_DIR' 디렉토리에 저장되었습니다."
+    echo "--- SVG to TTF/WOFF 변환 완료 ---"
+    exit 0
+  elif [ $WORKER_EXIT -ne 2 ]; then
+    echo "오류: 워커 폰트 생성 실패 (종료 코드: $WORKER_EXIT)." >&2
+    exit $WORKER_EXIT
+  fi
+  echo "경고: 워커에 연결할 수 없어 일회용 컨테이너로 변환합니다."
+fi
+
 # Docker 이미지 빌드 (필요시)
 if ! docker image inspect "$IMAGE_NAME":latest > /dev/null 2>&1; then
   echo "로컬 이미지 '$IMAGE_NAME:latest'를 찾을 수 없습니다. 컨텍스트 '$BUILD_CONTEXT'에서 빌드를 시작합니다..."
-  docker build -t "$IMAGE_NAME" "$BUILD_CONTEXT"
+  docker build -t "$IMAGE_NAME" -f "$BUILD_CONTEXT/Dockerfile" "$PROJECT_ROOT"
 else
   echo "로컬 이미지 '$IMAGE_NAME:latest'가 이미 존재합니다. 빌드를 건너뛰니다."
 fi
 
+# 요청별 프로파일링: 서버가 STAGE_PROFILE_DIR을 넘긴 경우 컨테이너에 마운트하여 프로파일을 저장
+PROFILE_ARGS=()
+if [ -n "$STAGE_PROFILE_DIR" ]; then
+  mkdir -p "$STAGE_PROFILE_DIR"
+  PROFILE_ARGS=(-v "$(realpath "$STAGE_PROFILE_DIR")":/app/profile -e STAGE_PROFILE_DIR=/app/profile)
+fi
+
 # Docker 실행
-CONTAINER_NAME="fontforge-svg2ttf-$(date +%s)"
+# 여러 작업이 동시에 변환할 수 있으므로 프로세스 ID를 붙여 이름 충돌 방지
+CONTAINER_NAME="fontforge-svg2ttf-$(date +%s)-$$"
 echo "SVG to TTF/WOFF 변환 컨테이너를 실행합니다..."
 echo "  빌드된 이미지:          $IMAGE_NAME:latest"
 echo "  입력 SVG 디렉토리 (호스트): $(realpath "$HOST_INPUT_DIR")"
@@ -107,7 +160,14 @@ docker run --rm --name "$CONTAINER_NAME" \
   -v "$(realpath "$HOST_INPUT_DIR")":"$CONTAINER_INPUT_DIR":ro \
   -v "$(realpath "$HOST_OUTPUT_DIR")":"$CONTAINER_OUTPUT_DIR":rw \
   -v "$(realpath "$HOST_BASE_FONT")":"$CONTAINER_BASE_FONT":ro \
+  -e SVG2TTF_WOFF2="$SVG2TTF_WOFF2" \
+  -e WOFF2_QUALITY="$WOFF2_QUALITY" \
+  -e GLYPH_POINT_BUDGET="${GLYPH_POINT_BUDGET:-0}" \
+  -e GLYPH_SIMPLIFY_REPORT_SIZE="${GLYPH_SIMPLIFY_REPORT_SIZE:-0}" \
+  "${PROFILE_ARGS[@]}" \
+  "${ENTRYPOINT_ARGS[@]}" \
   "$IMAGE_NAME" \
+  ${ENTRYPOINT_ARGS[@]:+/app/ttf_builder.py} \
   "$CONTAINER_INPUT_DIR" \
   "$CONTAINER_OUTPUT_TTF_PATH" \
   "$FONT_NAME" \
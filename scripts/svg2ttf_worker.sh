@@ -0,0 +1,57 @@
+#!/bin/bash
+
+# 상주 FontForge 폰트 조립 워커 컨테이너를 시작/중지하는 스크립트
+# 워커가 실행 중이면 4_run_svg2ttf.sh는 요청마다 컨테이너를 띄우지 않고 워커 소켓으로 요청합니다.
+
+set -e
+
+ACTION="${1:-start}"
+
+# 경로 설정
+IMAGE_NAME="fontory-svg2ttf"
+CONTAINER_NAME="fontory-svg2ttf-worker"
+PROJECT_ROOT="$(cd "$(dirname "$0")/.." && pwd)"
+BUILD_CONTEXT="$PROJECT_ROOT/svg2ttf"
+HOST_RESULT_DIR="$PROJECT_ROOT/result"
+HOST_BASE_FONT="$PROJECT_ROOT/resource/UhBee-dami.ttf"
+HOST_SOCKET_DIR="$HOST_RESULT_DIR/.svg2ttf_worker"
+CONTAINER_RESULT_DIR="/app/result"
+CONTAINER_SOCKET="$CONTAINER_RESULT_DIR/.svg2ttf_worker/worker.sock"
+CONTAINER_BASE_FONT="/app/base_font.ttf"
+
+case "$ACTION" in
+  start)
+    if docker ps --format '{{.Names}}' | grep -qx "$CONTAINER_NAME"; then
+      echo "워커 '$CONTAINER_NAME'가 이미 실행 중입니다."
+      exit 0
+    fi
+    docker rm -f "$CONTAINER_NAME" > /dev/null 2>&1 || true
+
+    # Docker 이미지 빌드 (필요시)
+    if ! docker image inspect "$IMAGE_NAME":latest > /dev/null 2>&1; then
+      echo "로컬 이미지 '$IMAGE_NAME:latest'를 찾을 수 없습니다. 컨텍스트 '$BUILD_CONTEXT'에서 빌드를 시작합니다..."
+      docker build -t "$IMAGE_NAME" -f "$BUILD_CONTEXT/Dockerfile" "$PROJECT_ROOT"
+    fi
+
+    mkdir -p "$HOST_SOCKET_DIR"
+    echo "폰트 조립 워커를 시작합니다... (소켓: $HOST_SOCKET_DIR/worker.sock)"
+    docker run -d --name "$CONTAINER_NAME" --restart unless-stopped \
+      -v "$HOST_RESULT_DIR":"$CONTAINER_RESULT_DIR":rw \
+      -v "$HOST_BASE_FONT":"$CONTAINER_BASE_FONT":ro \
+      -e WOFF2_QUALITY="${WOFF2_QUALITY:-11}" \
+      -e GLYPH_POINT_BUDGET="${GLYPH_POINT_BUDGET:-0}" \
+      -e GLYPH_SIMPLIFY_REPORT_SIZE="${GLYPH_SIMPLIFY_REPORT_SIZE:-0}" \
+      --entrypoint python3 \
+      "$IMAGE_NAME" \
+      /app/font_worker.py --socket "$CONTAINER_SOCKET" --base_font "$CONTAINER_BASE_FONT"
+    ;;
+  stop)
+    echo "폰트 조립 워커를 중지합니다..."
+    docker rm -f "$CONTAINER_NAME" > /dev/null 2>&1 || true
+    rm -f "$HOST_SOCKET_DIR/worker.sock"
+    ;;
+  *)
+    echo "사용법: $0 [start|stop]"
+    exit 1
+    ;;
+esac
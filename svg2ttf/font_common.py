@@ -0,0 +1,95 @@
+"""
+FontForge 백엔드(svg_to_ttf_converter.py)와 fontTools 백엔드(ttf_builder.py)가
+함께 사용하는 폰트 속성과 헬퍼 함수입니다. fontforge 없이도 import할 수 있어야 합니다.
+"""
+
+import os
+import logging
+
+from webfont import compress_woff2, woff2_quality
+
+
+# 기본 폰트 속성
+DEFAULT_EM_SIZE = 1024  # 일반적인 EM 크기
+DEFAULT_ASCENT = 920    # 위 여백
+DEFAULT_DESCENT = 230   # 아래 여백
+BASELINE_ADJUST = 50    # 베이스라인을 위로 이동시키는 오프셋 (단위: 폰트 유닛)
+
+# 글리프 스케일링
+GLYPH_HEIGHT_SCALE = 1.05  # 글자 높이 대비 확대 비율
+MAX_WIDTH_RATIO = 0.98     # EM 대비 최대 글자 폭
+COMPLEX_GLYPH_POINTS = 200 # 복잡한 글리프로 기록할 점 개수 기준
+
+# 외곽선 단순화: 점 개수가 예산을 넘는 글리프는 허용 오차(폰트 유닛)를 단계적으로 늘려 단순화 (기본값 0 = 사용 안 함)
+GLYPH_POINT_BUDGET = int(os.getenv("GLYPH_POINT_BUDGET", "0"))
+# 1이면 단순화하지 않은 TTF를 한 번 더 생성해 단순화 전후 파일 크기를 비교 (TTF 생성 시간이 두 배가 되므로 측정할 때만 사용)
+GLYPH_SIMPLIFY_REPORT_SIZE = os.getenv("GLYPH_SIMPLIFY_REPORT_SIZE", "0") == "1"
+SIMPLIFY_TOLERANCES = (1.0, 2.0, 4.0, 8.0)
+
+# 기본 폰트 병합 시 그룹별 스케일
+GROUP_SCALE = {
+    'Jamo':   0.80,   # 자모
+    'Latin':  1.20,   # 영문
+    'Punct':  1.00,   # 구두점·기호
+}
+MIDLINE_CODES = {ord(c) for c in ('~', '-', '`')}
+QUOTE_CODES = {ord(c) for c in ('"', "'", '“', '”', '‘', '’', '^')}
+PUNCT_CODES = [0x2C, 0x2E, 0x3F, 0x21, 0x28, 0x29, 0x27, 0x22, 0x60]
+
+# 파일 이름에서 해당 글리프의 문자 또는 유니코드 포인트를 추출합니다.
+def get_char_from_filename(filename):
+    base = os.path.splitext(os.path.basename(filename))[0]
+    try:
+        # 파일 이름이 단일 문자인 경우
+        if len(base) == 1:
+            return base
+        # U+XXXX 형식인 경우
+        elif base.startswith("U+") and len(base) == 6:
+            return chr(int(base[2:], 16))
+    except Exception as e:
+        logging.warning(f"파일 이름 '{filename}'에서 문자를 추출할 수 없습니다: {e}")
+    return None
+
+# 기본 폰트 글리프의 그룹별 스케일을 반환합니다.
+def base_glyph_scale(uv, base_scale):
+    if 0x1100 <= uv <= 0x11FF:
+        return base_scale * GROUP_SCALE['Jamo']
+    elif (0x0041 <= uv <= 0x005A) or (0x0061 <= uv <= 0x007A):
+        return base_scale * GROUP_SCALE['Latin']
+    return base_scale * GROUP_SCALE.get('Punct', 0.95)
+
+# 외곽선 단순화 결과(점 개수)를 로그로 남깁니다.
+def log_simplify_summary(points_before, points_after, simplified_count):
+    if not simplified_count:
+        return
+    reduction = (1 - points_after / points_before) * 100 if points_before else 0
+    logging.info(f"외곽선 단순화: {simplified_count}개 글리프, 점 {points_before:,}개 → {points_after:,}개 ({reduction:.1f}% 감소, 예산 {GLYPH_POINT_BUDGET}개)")
+
+
+def unsimplified_ttf_path(ttf_path):
+    """단순화 전 크기를 재기 위해 임시로 생성하는 TTF 경로"""
+    return os.path.splitext(ttf_path)[0] + ".unsimplified.ttf"
+
+
+def log_simplify_size(reference_path, ttf_path):
+    """단순화하지 않은 TTF(reference_path)와 비교한 파일 크기를 로그로 남기고 임시 TTF를 지웁니다."""
+    try:
+        size_before = os.path.getsize(reference_path)
+    finally:
+        if os.path.exists(reference_path):
+            os.remove(reference_path)
+    size_after = os.path.getsize(ttf_path)
+    reduction = (1 - size_after / size_before) * 100 if size_before else 0
+    logging.info(f"외곽선 단순화 파일 크기: TTF {size_before:,} 바이트 → {size_after:,} 바이트 ({reduction:.1f}% 감소)")
+
+
+def woff2_enabled():
+    """SVG2TTF_WOFF2=0이면 WOFF2 생성을 건너뜁니다 (파이프라인 서버가 TTF 업로드와 병렬로 생성하는 경우)."""
+    return os.getenv("SVG2TTF_WOFF2", "1") != "0"
+
+
+"""
+TTF 파일에서 WOFF2 파일을 생성하고 경로와 크기를 반환합니다.
+"""
+def generate_woff2(ttf_path, output_woff2):
+    return compress_woff2(ttf_path, output_woff2, woff2_quality())
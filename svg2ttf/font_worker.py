@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+FontForge를 상주시켜 폰트 조립 요청을 처리하는 워커입니다.
+
+요청마다 fontforge를 새로 띄우고 기본 폰트를 다시 스케일링·병합하는 대신,
+시작할 때 기본 폰트 글리프가 병합된 스켈레톤 폰트(.sfd)를 한 번 만들어 두고
+요청마다 스켈레톤을 열어 메타데이터 설정과 SVG 글리프 가져오기만 수행합니다.
+
+요청은 Unix 소켓으로 받은 JSON 한 줄이며, 처리 중 로그는 {"log": ...} 줄로,
+결과는 마지막 줄에 {"ok": ..., "files": [[경로, 크기], ...]} 형태로 응답합니다.
+글리프는 input_dir(SVG 디렉토리) 또는 glyphs({파일 이름: SVG 문자열})로 전달할 수 있습니다.
+"woff2": false이면 TTF만 생성합니다.
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import socketserver
+import tempfile
+import time
+
+import fontforge
+import svg_to_ttf_converter as converter
+
+
+class ConnectionLogHandler(logging.Handler):
+    """요청 처리 중 발생한 로그를 클라이언트로 전달합니다."""
+    def __init__(self, wfile):
+        super().__init__()
+        self.wfile = wfile
+
+    def emit(self, record):
+        try:
+            line = json.dumps({"log": self.format(record), "level": record.levelname}, ensure_ascii=False)
+            self.wfile.write(line.encode("utf-8") + b"\n")
+            self.wfile.flush()
+        except Exception:
+            # 클라이언트가 먼저 연결을 끊어도 폰트 생성은 계속 진행
+            pass
+
+
+def build_skeleton(base_font_path, skeleton_path):
+    """기본 메트릭과 병합된 기본 폰트 글리프만 가진 스켈레톤 폰트를 저장합니다."""
+    start_time = time.time()
+    font = converter.create_base_font(converter.DEFAULT_EM_SIZE, converter.DEFAULT_ASCENT, converter.DEFAULT_DESCENT)
+    if base_font_path and os.path.exists(base_font_path):
+        converter.merge_base_font(font, base_font_path)
+    else:
+        logging.warning(f"기본 폰트 파일을 찾을 수 없어 빈 스켈레톤을 사용합니다: {base_font_path}")
+    font.save(skeleton_path)
+    font.close()
+    logging.info(f"스켈레톤 폰트 생성 완료: {skeleton_path} ({time.time() - start_time:.2f}초)")
+
+
+def write_glyphs(glyphs):
+    """IPC로 받은 SVG 외곽선을 임시 디렉토리에 기록하고 경로를 반환합니다."""
+    glyph_dir = tempfile.mkdtemp(prefix="glyphs_")
+    for name, svg in glyphs.items():
+        with open(os.path.join(glyph_dir, f"{name}.svg"), "w", encoding="utf-8") as f:
+            f.write(svg)
+    return glyph_dir
+
+
+def assemble(skeleton_path, request):
+    """스켈레톤을 복제하여 요청의 글리프로 TTF/WOFF2를 생성합니다."""
+    original_dir = os.getcwd()
+    glyph_dir = write_glyphs(request["glyphs"]) if request.get("glyphs") else None
+    input_dir = glyph_dir or request["input_dir"]
+    output_ttf = request["output_ttf"]
+    font_name = request["font_name"]
+    font_eng_name = request["font_eng_name"]
+
+    converter.log_initial_info(input_dir, output_ttf)
+    font = fontforge.open(skeleton_path)
+    try:
+        converter.setup_metadata(font, font_name, font_eng_name,
+                                 request.get("family_name") or font_name, request.get("style_name") or "Regular")
+        svg_files = converter.load_svg_files(input_dir)
+        imported_count, _, _, _, originals = converter.process_glyphs(font, svg_files, skeleton_path=skeleton_path)
+        output_dir, output_basename = converter.ensure_output_directory(output_ttf, original_dir)
+
+        generated_files = []
+        ttf_path, ttf_size = converter.generate_ttf(font, os.path.join(output_dir, output_basename + ".ttf"))
+        generated_files.append((ttf_path, ttf_size))
+        converter.report_simplify_size(font, originals, ttf_path)
+        if request.get("woff2", True):
+            woff2_path, woff2_size = converter.generate_woff2(ttf_path, os.path.join(output_dir, output_basename + ".woff2"))
+            generated_files.append((woff2_path, woff2_size))
+    finally:
+        font.close()
+        os.chdir(original_dir)
+        if glyph_dir:
+            shutil.rmtree(glyph_dir, ignore_errors=True)
+
+    converter.finalize_generation(generated_files, imported_count, original_dir)
+    return generated_files, imported_count
+
+
+class AssemblyHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return
+
+        log_handler = ConnectionLogHandler(self.wfile)
+        log_handler.setFormatter(logging.Formatter('%(message)s'))
+        root_logger = logging.getLogger()
+        root_logger.addHandler(log_handler)
+        start_time = time.time()
+        try:
+            request = json.loads(line)
+            files, imported_count = assemble(self.server.skeleton_path, request)
+            response = {"ok": True, "files": files, "imported": imported_count}
+            logging.info(f"요청 처리 완료: {request.get('font_name')} ({time.time() - start_time:.2f}초)")
+        except (Exception, SystemExit) as e:
+            # 변환 함수는 오류 시 sys.exit를 호출하므로 워커가 종료되지 않도록 함께 처리
+            logging.error(f"폰트 조립 실패: {type(e).__name__}: {e}")
+            response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        finally:
+            root_logger.removeHandler(log_handler)
+
+        self.wfile.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+
+
+class AssemblyServer(socketserver.UnixStreamServer):
+    # FontForge는 스레드 안전하지 않으므로 요청을 순서대로 하나씩 처리
+    def __init__(self, socket_path, skeleton_path):
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        os.makedirs(os.path.dirname(socket_path), exist_ok=True)
+        super().__init__(socket_path, AssemblyHandler)
+        # 호스트의 다른 사용자(파이프라인 서버)도 접속할 수 있도록 권한 부여
+        os.chmod(socket_path, 0o666)
+        self.skeleton_path = skeleton_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="상주 FontForge 폰트 조립 워커")
+    parser.add_argument("--socket", required=True, help="요청을 받을 Unix 소켓 경로")
+    parser.add_argument("--base_font", default="/app/base_font.ttf", help="병합할 기본 폰트 경로")
+    parser.add_argument("--skeleton", default="/tmp/fontory_skeleton.sfd", help="스켈레톤 폰트 저장 경로")
+    args = parser.parse_args()
+
+    build_skeleton(args.base_font, args.skeleton)
+    server = AssemblyServer(args.socket, args.skeleton)
+    logging.info(f"폰트 조립 워커 대기 중: {args.socket}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(args.socket):
+            os.remove(args.socket)
+
+
+if __name__ == '__main__':
+    main()
@@ -10,7 +10,15 @@ import glob
 import fontforge
 import logging
 import psMat
-from fontTools.ttLib.woff2 import compress
+import time
+from stage_metrics import emit_started, emit_finished, install_log_rate_limit, start_profiling, ProgressReporter
+from font_common import (
+    DEFAULT_EM_SIZE, DEFAULT_ASCENT, DEFAULT_DESCENT, BASELINE_ADJUST,
+    GLYPH_HEIGHT_SCALE, MAX_WIDTH_RATIO, COMPLEX_GLYPH_POINTS, GLYPH_POINT_BUDGET, GLYPH_SIMPLIFY_REPORT_SIZE, SIMPLIFY_TOLERANCES,
+    MIDLINE_CODES, QUOTE_CODES, PUNCT_CODES,
+    get_char_from_filename, base_glyph_scale, generate_woff2, woff2_enabled, log_simplify_summary,
+    unsimplified_ttf_path, log_simplify_size,
+)
 
 
 """
@@ -95,24 +103,59 @@ def load_svg_files(input_dir_abs):
 
 """
 SVG 외곽선을 폰트에 가져와 각 글리프를 스케일 및 최적화합니다.
-반환값: (가져온 개수, 건너뛴 개수, 복잡 글리프 목록, 단순 글리프 목록).
+반환값: (가져온 개수, 건너뛴 개수, 복잡 글리프 목록, 단순 글리프 목록,
+        {코드: 단순화 전 외곽선 레이어} (GLYPH_SIMPLIFY_REPORT_SIZE=1인 경우에만 채움)).
 """
 # 글리프 처리 헬퍼 함수
-def process_glyphs(font, svg_files):
+def count_points(glyph):
+    return sum(len(contour) for contour in glyph.layers[glyph.activeLayer])
+
+
+def simplify_to_budget(glyph, budget):
+    """점 개수가 예산 이하가 될 때까지 허용 오차를 늘려가며 외곽선을 단순화하고 단순화 후 점 개수를 반환합니다."""
+    point_count = count_points(glyph)
+    for tolerance in SIMPLIFY_TOLERANCES:
+        if point_count <= budget:
+            break
+        glyph.simplify(tolerance, ('mergelines', 'setstarttoextremum', 'removesingletonpoints'))
+        glyph.round()
+        point_count = count_points(glyph)
+    return point_count
+
+
+def restore_skeleton_glyph(font, glyph, skeleton, unicode_val):
+    """가져오기에 실패한 글리프를 스켈레톤의 기본 폰트 글리프로 되돌립니다. 스켈레톤에 없는 글리프는 제거합니다."""
+    if unicode_val not in skeleton:
+        font.removeGlyph(glyph)
+        return
+    source = skeleton[unicode_val]
+    # glyphPen은 기존 외곽선을 지우고 새로 그림
+    pen = glyph.glyphPen()
+    source.draw(pen)
+    pen = None
+    glyph.width = source.width
+    logging.info(f"글리프 U+{unicode_val:04X}를 기본 폰트 글리프로 되돌림")
+
+
+def process_glyphs(font, svg_files, progress=None, skeleton_path=None):
+    """skeleton_path가 주어지면(상주 워커) 실패한 글리프를 지우지 않고 스켈레톤의 기본 폰트 글리프로 되돌립니다."""
     imported_count = 0
     skipped_count = 0
     complex_glyphs = []
     simple_glyphs = []
+    points_before, points_after, simplified_count = 0, 0, 0
+    originals = {}
+    skeleton = None
 
     for svg_index, svg_filename in enumerate(svg_files, 1):
-        if svg_index % 100 == 0:
-            logging.info(f"SVG 처리 진행: {svg_index}/{len(svg_files)}")
         logging.debug(f"SVG 처리 [{svg_index}/{len(svg_files)}]: '{svg_filename}' 분석 중")
 
         char = get_char_from_filename(svg_filename)
         if char is None:
             logging.warning(f"건너뜀 '{svg_filename}': 파일 이름에서 문자를 추출할 수 없습니다")
             skipped_count += 1
+            if progress is not None:
+                progress.fail(svg_filename, "파일 이름에서 문자를 추출할 수 없습니다")
             continue
 
         glyph = None
@@ -121,19 +164,22 @@ def process_glyphs(font, svg_files):
             unicode_val = ord(char)
             logging.debug(f"글리프 처리 시작: '{svg_filename}' -> 문자 '{char}' (U+{unicode_val:04X})")
             glyph = font.createChar(unicode_val)
+            # 미리 병합된 기본 폰트 글리프가 있는 경우(상주 워커의 스켈레톤) 외곽선을 덮어씀
+            glyph.clear()
             glyph.importOutlines(svg_filename)
 
             # 스케일링 처리
             xmin, ymin, xmax, ymax = glyph.boundingBox()
             current_height = ymax - ymin
             current_width = xmax - xmin
+            if current_height <= 0 or current_width <= 0:
+                raise ValueError("외곽선이 비어 있습니다")
 
             target_height = font.ascent + abs(font.descent)
             target_width = font.em
-            scale = (target_height / current_height) * 1.05
-            max_width_ratio = 0.98
-            if current_width * scale > target_width * max_width_ratio:
-                scale = (target_width * max_width_ratio) / current_width
+            scale = (target_height / current_height) * GLYPH_HEIGHT_SCALE
+            if current_width * scale > target_width * MAX_WIDTH_RATIO:
+                scale = (target_width * MAX_WIDTH_RATIO) / current_width
 
             glyph.transform(psMat.scale(scale))
             # 기본 베이스라인 오프셋으로 위치 조정
@@ -144,39 +190,68 @@ def process_glyphs(font, svg_files):
             glyph.correctDirection()
             glyph.addExtrema()
 
+            # 점 예산을 넘는 외곽선 단순화
+            original_points = count_points(glyph)
+            original_layer = None
+            if GLYPH_POINT_BUDGET and original_points > GLYPH_POINT_BUDGET:
+                # 파일 크기 비교용으로 단순화 전 외곽선 보관 (foreground는 복사본을 반환)
+                if GLYPH_SIMPLIFY_REPORT_SIZE:
+                    original_layer = glyph.foreground
+                simplified_points = simplify_to_budget(glyph, GLYPH_POINT_BUDGET)
+                points_before += original_points
+                points_after += simplified_points
+                simplified_count += 1
+                logging.debug(f"외곽선 단순화 '{char}': 점 {original_points}개 → {simplified_points}개")
+
             xmin2, ymin2, xmax2, ymax2 = glyph.boundingBox()
             new_width = xmax2 - xmin2
             glyph.transform(psMat.translate(-xmin2, 0))
             glyph.width = int(new_width)
+            if original_layer is not None:
+                original_layer.transform(psMat.translate(-xmin2, 0))
+                originals[unicode_val] = original_layer
 
-            # 글리프 복잡도 기록
-            contour_count, point_count = 0, 0
-            for contour in glyph.layers[glyph.activeLayer]:
-                contour_count += 1
-                point_count += len(contour)
-            if point_count > 200:
+            # 글리프 복잡도 기록 (단순화 후에도 기준을 넘는 글리프)
+            point_count = count_points(glyph)
+            if point_count > COMPLEX_GLYPH_POINTS:
                 complex_glyphs.append((char, point_count))
             else:
                 simple_glyphs.append((char, point_count))
 
             imported_count += 1
+            if progress is not None:
+                progress.advance()
 
         except Exception as e:
-            logging.error(f"오류: 글리프 '{char}' (U+{unicode_val:04X if unicode_val!=-1 else 'N/A'}) 처리 오류: {e}")
+            code = f"{unicode_val:04X}" if unicode_val != -1 else "N/A"
+            logging.error(f"오류: 글리프 '{char}' (U+{code}) 처리 오류: {e}")
             skipped_count += 1
+            if progress is not None:
+                progress.fail(char, e)
             if glyph is not None and unicode_val != -1 and unicode_val in font:
                 try:
-                    font.removeGlyph(glyph)
-                except:
-                    pass
+                    if skeleton_path:
+                        if skeleton is None:
+                            skeleton = fontforge.open(skeleton_path)
+                        restore_skeleton_glyph(font, glyph, skeleton, unicode_val)
+                    else:
+                        font.removeGlyph(glyph)
+                except Exception as restore_err:
+                    logging.warning(f"글리프 U+{code} 정리 실패: {restore_err}")
+
+    if skeleton is not None:
+        skeleton.close()
+    if progress is not None:
+        progress.report()
 
     # 요약 로깅
+    log_simplify_summary(points_before, points_after, simplified_count)
     if complex_glyphs:
         complex_chars = ''.join(char for char, _ in complex_glyphs[:10])
         logging.info(f"복잡한 글리프(상위 10개): {complex_chars} (총 {len(complex_glyphs)}개)")
     logging.info(f"가져오기 결과: 총 {len(svg_files)}개 중 {imported_count}개 성공, {skipped_count}개 실패")
 
-    return imported_count, skipped_count, complex_glyphs, simple_glyphs
+    return imported_count, skipped_count, complex_glyphs, simple_glyphs, originals
 
 """
 기본 폰트의 글리프를 메인 폰트에 병합하고, 그룹별 스케일링 및 기준선 조정을 적용합니다.
@@ -185,33 +260,20 @@ def merge_base_font(font, base_font_path):
     logging.info(f"기본 폰트 병합 시작 : {base_font_path}")
     base = fontforge.open(base_font_path)
     base_scale = font.em / base.em
-    GROUP_SCALE = {
-        'Jamo':   0.80,   # 자모
-        'Latin':  1.20,   # 영문
-        'Punct':  1.00,   # 구두점·기호
-    }
-    punct_scale = base_scale * GROUP_SCALE.get('Punct', 0.95)
     for g in base.glyphs():
         uv = g.unicode
         if uv is None or uv < 0:
             continue
         # 1) 형태 스케일링
-        if 0x1100 <= uv <= 0x11FF:
-            s = base_scale * GROUP_SCALE['Jamo']
-        elif (0x0041 <= uv <= 0x005A) or (0x0061 <= uv <= 0x007A):
-            s = base_scale * GROUP_SCALE['Latin']
-        else:
-            s = punct_scale
+        s = base_glyph_scale(uv, base_scale)
         g.transform(psMat.scale(s))
         # 2) 기준선 정렬 및 특수 글리프 처리
         x0, y0, x1, y1 = g.boundingBox()
-        midline_codes = {ord(c) for c in ('~', '-', '`')}
-        quote_codes = {ord(c) for c in ('"', "'", '“', '”', '‘', '’', '^')}
-        if uv in midline_codes:
+        if uv in MIDLINE_CODES:
             # 중간선 기준으로 수평 정렬
             midline = (font.ascent + abs(font.descent)) / 2
             g.transform(psMat.translate(0, midline - y0))
-        elif uv in quote_codes:
+        elif uv in QUOTE_CODES:
             # 따옴표는 ascent 위치로 이동
             target_y = font.ascent
             g.transform(psMat.translate(0, target_y - y0))
@@ -234,8 +296,7 @@ def merge_base_font(font, base_font_path):
     # 공백 및 기본 구두점 폭 조정
     if 0x20 in font:
         font[0x20].width = int(font.em * 0.5)
-    punct_chars = [0x2C, 0x2E, 0x3F, 0x21, 0x28, 0x29, 0x27, 0x22, 0x60]
-    for code in punct_chars:
+    for code in PUNCT_CODES:
         if code in font:
             g = font[code]
             xmin, ymin, xmax, ymax = g.boundingBox()
@@ -277,15 +338,17 @@ def generate_ttf(font, output_ttf):
     return output_ttf, file_size
 
 
-"""
-TTF 파일에서 WOFF2 파일을 생성하고 경로와 크기를 반환합니다.
-"""
-def generate_woff2(ttf_path, output_woff2):
-    logging.info(f"WOFF2 파일 생성 시작: {output_woff2}")
-    compress(ttf_path, output_woff2)
-    file_size = os.path.getsize(output_woff2)
-    logging.info(f"WOFF2 파일 생성 완료: {file_size:,} 바이트")
-    return output_woff2, file_size
+def report_simplify_size(font, originals, ttf_path):
+    """단순화한 글리프를 원래 외곽선으로 되돌린 TTF를 임시로 생성해 단순화 전후 파일 크기를 로그로 남깁니다.
+    GLYPH_SIMPLIFY_REPORT_SIZE=1일 때만 originals가 채워집니다. TTF를 생성한 뒤에 호출합니다 (폰트의 외곽선이 바뀝니다)."""
+    if not originals:
+        return
+    for unicode_val, layer in originals.items():
+        font[unicode_val].foreground = layer
+    reference_path = unsimplified_ttf_path(ttf_path)
+    font.generate(reference_path, flags=())
+    log_simplify_size(reference_path, ttf_path)
+
 
 """
 작업 디렉토리를 복원하고 요약을 기록하거나 실패 시 종료합니다.
@@ -308,28 +371,9 @@ logging.basicConfig(
     format='%(message)s',
     handlers=[logging.StreamHandler()]
 )
+install_log_rate_limit()
 
 
-# 기본 폰트 속성
-DEFAULT_EM_SIZE = 1024  # 일반적인 EM 크기
-DEFAULT_ASCENT = 920    # 위 여백
-DEFAULT_DESCENT = 230   # 아래 여백
-BASELINE_ADJUST = 50    # 베이스라인을 위로 이동시키는 오프셋 (단위: 폰트 유닛)
-
-# 파일 이름에서 해당 글리프의 문자 또는 유니코드 포인트를 추출합니다.
-def get_char_from_filename(filename):
-    base = os.path.splitext(os.path.basename(filename))[0]
-    try:
-        # 파일 이름이 단일 문자인 경우
-        if len(base) == 1:
-            return base
-        # U+XXXX 형식인 경우
-        elif base.startswith("U+") and len(base) == 6:
-            return chr(int(base[2:], 16))
-    except Exception as e:
-        logging.warning(f"파일 이름 '{filename}'에서 문자를 추출할 수 없습니다: {e}")
-    return None
-
 def main(input_dir_abs, output_ttf_abs, font_name, font_eng_name, family_name, style_name, base_font_path):
     # 메인 워크플로우: 입력 디렉토리에서 SVG를 읽어 폰트를 생성하고 출력합니다.
     # 작업 디렉토리 기록 및 입력/출력 정보 로깅
@@ -345,7 +389,7 @@ def main(input_dir_abs, output_ttf_abs, font_name, font_eng_name, family_name, s
     svg_files = load_svg_files(input_dir_abs)
 
     # 글리프 가져오기 및 처리
-    imported_count, skipped_count, complex_glyphs, simple_glyphs = process_glyphs(font, svg_files)
+    imported_count, skipped_count, complex_glyphs, simple_glyphs, originals = process_glyphs(font, svg_files, ProgressReporter("ttf", len(svg_files)))
 
     # 출력 디렉토리 확인 및 생성
     output_dir, output_basename = ensure_output_directory(output_ttf_abs, original_dir)
@@ -358,13 +402,18 @@ def main(input_dir_abs, output_ttf_abs, font_name, font_eng_name, family_name, s
     # TTF 생성
     ttf_path, ttf_size = generate_ttf(font, os.path.join(output_dir, output_basename + ".ttf"))
     generated_files.append((ttf_path, ttf_size))
+    report_simplify_size(font, originals, ttf_path)
     # WOFF2 생성
-    woff2_path, woff2_size = generate_woff2(ttf_path, os.path.join(output_dir, output_basename + ".woff2"))
-    generated_files.append((woff2_path, woff2_size))
+    if woff2_enabled():
+        woff2_path, woff2_size = generate_woff2(ttf_path, os.path.join(output_dir, output_basename + ".woff2"))
+        generated_files.append((woff2_path, woff2_size))
 
     finalize_generation(generated_files, imported_count, original_dir)
+    return imported_count
 
 if __name__ == '__main__':
+    emit_started("ttf")
+    start_profiling("ttf")
     if len(sys.argv) != 8:
         print("사용법: fontforge -script svg_to_ttf_converter.py <입력_svg_디렉토리> <출력_ttf_경로> <폰트_이름> <패밀리_이름> <스타일_이름> <기본_폰트_경로>")
         sys.exit(1)
@@ -383,6 +432,8 @@ if __name__ == '__main__':
     logging.info(f"설정 - 폰트명: {fontname}, 패밀리: {familyname}, 스타일: {stylename}")
     
     # 메인 함수 호출
-    main(input_dir, output_ttf, fontname, font_eng_name, familyname, stylename, base_font)
+    start_time = time.time()
+    imported_count = main(input_dir, output_ttf, fontname, font_eng_name, familyname, stylename, base_font)
+    emit_finished("ttf", time.time() - start_time, glyphs=imported_count)
     
     logging.info("변환 완료")
\ No newline at end of file
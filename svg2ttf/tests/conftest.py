@@ -0,0 +1,7 @@
+import os
+import sys
+
+# 폰트 조립 컨테이너와 같이 svg2ttf와 resource(stage_metrics)를 모듈 경로에 추가
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(ROOT, "resource"))
+sys.path.insert(0, os.path.join(ROOT, "svg2ttf"))
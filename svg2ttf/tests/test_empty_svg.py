@@ -0,0 +1,43 @@
+"""
+외곽선이 없는 SVG(예: 추론 결과가 빈 이미지)는 해당 글리프만 건너뛰고 폰트 생성을 계속하는지 확인합니다.
+"""
+
+import pytest
+
+SQUARE_SVG = ('<svg xmlns="http://www.w3.org/2000/svg" width="100" height="100">'
+              '<path d="M10 10 L90 10 L90 90 L10 90 Z"/></svg>')
+EMPTY_SVG = '<svg xmlns="http://www.w3.org/2000/svg" width="100" height="100"></svg>'
+
+
+@pytest.fixture
+def svg_files(tmp_path):
+    paths = []
+    for name, content in {"가": SQUARE_SVG, "나": EMPTY_SVG}.items():
+        path = tmp_path / f"{name}.svg"
+        path.write_text(content, encoding="utf-8")
+        paths.append(str(path))
+    return paths
+
+
+def test_fontforge_skips_empty_svg(svg_files):
+    pytest.importorskip("fontforge")
+    converter = pytest.importorskip("svg_to_ttf_converter")
+    font = converter.create_base_font(converter.DEFAULT_EM_SIZE, converter.DEFAULT_ASCENT, converter.DEFAULT_DESCENT)
+    imported, skipped, _, _, _ = converter.process_glyphs(font, svg_files)
+    assert (imported, skipped) == (1, 1)
+    assert ord("가") in font
+    assert ord("나") not in font
+    font.close()
+
+
+def test_fonttools_skips_empty_svg(svg_files, tmp_path):
+    pytest.importorskip("pathops")
+    ttf_builder = pytest.importorskip("ttf_builder")
+    from fontTools.ttLib import TTFont
+
+    output_ttf = str(tmp_path / "out.ttf")
+    _, _, imported = ttf_builder.build_font(svg_files, output_ttf, "테스트", "Test", "테스트", workers=1)
+    assert imported == 1
+    cmap = TTFont(output_ttf).getBestCmap()
+    assert ord("가") in cmap
+    assert ord("나") not in cmap
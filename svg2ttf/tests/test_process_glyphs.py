@@ -0,0 +1,65 @@
+"""
+FontForge 백엔드의 글리프 가져오기 실패 처리 테스트.
+외곽선을 가져올 수 없는 SVG가 있어도 빌드가 계속되고, 실패한 글리프는 지워지거나(일회용 실행)
+스켈레톤의 기본 폰트 글리프로 되돌아가는지(상주 워커) 확인합니다. fontforge가 없으면 건너뜁니다.
+"""
+
+import pytest
+
+fontforge = pytest.importorskip("fontforge")
+converter = pytest.importorskip("svg_to_ttf_converter")
+
+SQUARE_SVG = ('<svg xmlns="http://www.w3.org/2000/svg" width="100" height="100">'
+              '<path d="M10 10 L90 10 L90 90 L10 90 Z"/></svg>')
+INVALID_SVG = "this is not an svg"
+
+
+def write_svgs(directory, svgs):
+    paths = []
+    for name, content in svgs.items():
+        path = directory / f"{name}.svg"
+        path.write_text(content, encoding="utf-8")
+        paths.append(str(path))
+    return paths
+
+
+def new_font():
+    return converter.create_base_font(converter.DEFAULT_EM_SIZE, converter.DEFAULT_ASCENT, converter.DEFAULT_DESCENT)
+
+
+def build_skeleton(path):
+    """'나'에 기본 폰트 글리프(삼각형)가 병합된 스켈레톤을 저장합니다."""
+    font = new_font()
+    glyph = font.createChar(ord("나"))
+    pen = glyph.glyphPen()
+    pen.moveTo((0, 0))
+    pen.lineTo((500, 0))
+    pen.lineTo((250, 500))
+    pen.closePath()
+    pen = None
+    glyph.width = 600
+    font.save(str(path))
+    font.close()
+
+
+def test_invalid_svg_is_removed_and_build_continues(tmp_path):
+    svg_files = write_svgs(tmp_path, {"가": SQUARE_SVG, "나": INVALID_SVG})
+    font = new_font()
+    imported, skipped, _, _, _ = converter.process_glyphs(font, svg_files)
+    assert (imported, skipped) == (1, 1)
+    assert ord("가") in font
+    assert ord("나") not in font
+    font.close()
+
+
+def test_invalid_svg_restores_skeleton_glyph_in_worker(tmp_path):
+    skeleton_path = tmp_path / "skeleton.sfd"
+    build_skeleton(skeleton_path)
+    svg_files = write_svgs(tmp_path, {"가": SQUARE_SVG, "나": INVALID_SVG})
+    font = fontforge.open(str(skeleton_path))
+    imported, skipped, _, _, _ = converter.process_glyphs(font, svg_files, skeleton_path=str(skeleton_path))
+    assert (imported, skipped) == (1, 1)
+    restored = font[ord("나")]
+    assert converter.count_points(restored) == 3
+    assert restored.width == 600
+    font.close()
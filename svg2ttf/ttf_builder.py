@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+fontTools로 SVG 외곽선에서 TTF를 직접 조립하는 FontForge 대체 백엔드입니다.
+
+svg_to_ttf_converter.py와 같은 인자를 받아 같은 스케일링·기본 폰트 병합 규칙으로
+glyf/cmap/hmtx 등 테이블을 직접 만듭니다. 겹침 제거와 방향 보정은 skia-pathops로,
+곡선은 cu2qu로 TrueType 2차 곡선으로 변환합니다. fontforge 프로세스가 필요 없으므로
+파이썬 프로세스 안에서 호출할 수 있고, 글리프 외곽선 처리는 여러 프로세스에서 병렬로 수행합니다.
+"""
+
+import os
+import re
+import sys
+import glob
+import logging
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+from xml.etree import ElementTree
+
+import pathops
+from fontTools.fontBuilder import FontBuilder
+from fontTools.misc.transform import Transform, Identity
+from fontTools.pens.boundsPen import BoundsPen
+from fontTools.pens.cu2quPen import Cu2QuPen
+from fontTools.pens.recordingPen import RecordingPen, DecomposingRecordingPen
+from fontTools.pens.transformPen import TransformPen
+from fontTools.pens.ttGlyphPen import TTGlyphPen
+from fontTools.svgLib.path import parse_path
+from fontTools.ttLib import TTFont
+from stage_metrics import emit_started, emit_finished, install_log_rate_limit, start_profiling, ProgressReporter
+
+from font_common import (
+    DEFAULT_EM_SIZE, DEFAULT_ASCENT, DEFAULT_DESCENT, BASELINE_ADJUST,
+    GLYPH_HEIGHT_SCALE, MAX_WIDTH_RATIO, COMPLEX_GLYPH_POINTS, GLYPH_POINT_BUDGET, GLYPH_SIMPLIFY_REPORT_SIZE, SIMPLIFY_TOLERANCES,
+    MIDLINE_CODES, QUOTE_CODES, PUNCT_CODES,
+    get_char_from_filename, base_glyph_scale, generate_woff2, woff2_enabled, log_simplify_summary,
+    unsimplified_ttf_path, log_simplify_size,
+)
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(message)s',
+    handlers=[logging.StreamHandler()]
+)
+install_log_rate_limit()
+
+# 3차 곡선 -> 2차 곡선 변환 허용 오차 (폰트 유닛)
+CU2QU_MAX_ERR = 1.0
+
+_TRANSFORM_RE = re.compile(r"(matrix|translate|scale|rotate|skewX|skewY)\s*\(([^)]*)\)")
+
+
+def parse_transform(value):
+    """SVG transform 속성을 fontTools Transform으로 변환합니다."""
+    transform = Identity
+    for name, args in _TRANSFORM_RE.findall(value or ""):
+        v = [float(x) for x in re.split(r"[\s,]+", args.strip()) if x]
+        if name == "matrix":
+            t = Transform(*v)
+        elif name == "translate":
+            t = Identity.translate(v[0], v[1] if len(v) > 1 else 0)
+        elif name == "scale":
+            t = Identity.scale(v[0], v[1] if len(v) > 1 else v[0])
+        elif name == "rotate":
+            t = Identity.rotate(v[0] * 3.141592653589793 / 180)
+        elif name == "skewX":
+            t = Identity.skew(v[0] * 3.141592653589793 / 180, 0)
+        else:
+            t = Identity.skew(0, v[0] * 3.141592653589793 / 180)
+        transform = transform.transform(t)
+    return transform
+
+
+def draw_svg(svg_data, pen):
+    """SVG의 path 요소를 그룹 transform까지 적용하여 pen에 그립니다 (potrace 출력 형식)."""
+    def walk(element, transform):
+        transform = transform.transform(parse_transform(element.get("transform")))
+        if element.tag.rsplit("}", 1)[-1] == "path" and element.get("d"):
+            parse_path(element.get("d"), TransformPen(pen, transform))
+        for child in element:
+            walk(child, transform)
+
+    walk(ElementTree.fromstring(svg_data), Identity)
+
+
+def glyph_bounds(recording):
+    pen = BoundsPen(None)
+    recording.replay(pen)
+    return pen.bounds or (0, 0, 0, 0)
+
+
+def transformed(recording, transform):
+    out = RecordingPen()
+    recording.replay(TransformPen(out, transform))
+    return out
+
+
+def remove_overlap(recording):
+    """겹침 제거 및 외곽선 방향 보정 (TrueType: 바깥 윤곽 시계 방향)"""
+    path = pathops.Path()
+    recording.replay(path.getPen())
+    path = pathops.simplify(path, fix_winding=True, clockwise=True)
+    out = RecordingPen()
+    path.draw(out)
+    return out
+
+
+def to_quadratic(recording, max_err=CU2QU_MAX_ERR):
+    out = RecordingPen()
+    recording.replay(Cu2QuPen(out, max_err, reverse_direction=False))
+    return out
+
+
+def point_count(recording):
+    return sum(len(args) for op, args in recording.value if op not in ("closePath", "endPath"))
+
+
+def quadratic_to_budget(recording, budget):
+    """2차 곡선 변환 허용 오차를 늘려가며 점 개수가 예산 이하인 외곽선을 찾습니다.
+
+    Returns:
+        (외곽선, 점 개수, 단순화 전 외곽선, 단순화 전 점 개수)
+    """
+    original = outline = to_quadratic(recording)
+    original_points = n_points = point_count(outline)
+    for tolerance in SIMPLIFY_TOLERANCES:
+        if not budget or n_points <= budget:
+            break
+        if tolerance <= CU2QU_MAX_ERR:
+            continue
+        outline = to_quadratic(recording, tolerance)
+        n_points = point_count(outline)
+    return outline, n_points, original, original_points
+
+
+def process_svg(svg_path):
+    """SVG 하나를 글리프 외곽선으로 변환합니다 (병렬 작업 단위).
+
+    점 개수가 GLYPH_POINT_BUDGET을 넘으면 2차 곡선 근사 오차를 늘려 점 개수를 줄입니다.
+
+    Returns:
+        (문자, 2차 곡선 외곽선 RecordingPen.value, advance width, 점 개수, 단순화 전 점 개수,
+         GLYPH_SIMPLIFY_REPORT_SIZE=1이고 단순화했으면 단순화 전 외곽선 RecordingPen.value 아니면 None)
+        또는 실패 시 (문자, None, 오류, 0, 0, None)
+    """
+    char = get_char_from_filename(svg_path)
+    try:
+        with open(svg_path, "rb") as f:
+            outline = RecordingPen()
+            draw_svg(f.read(), outline)
+
+        # 스케일링 처리 (process_glyphs와 동일한 규칙)
+        xmin, ymin, xmax, ymax = glyph_bounds(outline)
+        current_height = ymax - ymin
+        current_width = xmax - xmin
+        if current_height <= 0 or current_width <= 0:
+            raise ValueError("외곽선이 비어 있습니다")
+        target_height = DEFAULT_ASCENT + abs(DEFAULT_DESCENT)
+        target_width = DEFAULT_EM_SIZE
+        scale = (target_height / current_height) * GLYPH_HEIGHT_SCALE
+        if current_width * scale > target_width * MAX_WIDTH_RATIO:
+            scale = (target_width * MAX_WIDTH_RATIO) / current_width
+
+        # 기본 베이스라인 오프셋으로 위치 조정
+        transform = Identity.translate(0, -ymin * scale + abs(DEFAULT_DESCENT) - BASELINE_ADJUST).scale(scale)
+        outline = remove_overlap(transformed(outline, transform))
+
+        xmin2, _, xmax2, _ = glyph_bounds(outline)
+        outline, n_points, original, original_points = quadratic_to_budget(
+            transformed(outline, Identity.translate(-xmin2, 0)), GLYPH_POINT_BUDGET)
+        original_value = original.value if GLYPH_SIMPLIFY_REPORT_SIZE and n_points < original_points else None
+        return char, outline.value, int(xmax2 - xmin2), n_points, original_points, original_value
+    except Exception as e:
+        return char, None, str(e), 0, 0, None
+
+
+def glyph_name(uv):
+    return f"uni{uv:04X}" if uv <= 0xFFFF else f"u{uv:05X}"
+
+
+def tt_glyph(value):
+    """RecordingPen.value 외곽선으로 TrueType 글리프를 만듭니다."""
+    pen = TTGlyphPen(None)
+    outline = RecordingPen()
+    outline.value = value
+    outline.replay(pen)
+    return pen.glyph()
+
+
+def load_base_glyphs(base_font_path, em_size, ascent, descent):
+    """기본 폰트의 글리프를 merge_base_font와 같은 규칙으로 스케일·정렬하여 {코드: (외곽선, 폭)}을 반환합니다."""
+    logging.info(f"기본 폰트 병합 시작 : {base_font_path}")
+    base = TTFont(base_font_path)
+    glyph_set = base.getGlyphSet()
+    base_scale = em_size / base["head"].unitsPerEm
+    glyphs = {}
+    for uv, name in base.getBestCmap().items():
+        outline = DecomposingRecordingPen(glyph_set)
+        glyph_set[name].draw(outline)
+        # 1) 형태 스케일링
+        outline = transformed(outline, Identity.scale(base_glyph_scale(uv, base_scale)))
+        # 2) 기준선 정렬 및 특수 글리프 처리
+        x0, y0, x1, y1 = glyph_bounds(outline)
+        if uv in MIDLINE_CODES:
+            midline = (ascent + abs(descent)) / 2
+            outline = transformed(outline, Identity.translate(0, midline - y0))
+        elif uv in QUOTE_CODES:
+            outline = transformed(outline, Identity.translate(0, ascent - y0))
+        else:
+            outline = transformed(outline, Identity.translate(0, -y0 + abs(descent)))
+        # 3) 왼쪽 정렬 및 폭 설정
+        x0, y0, x1, y1 = glyph_bounds(outline)
+        outline = transformed(outline, Identity.translate(-x0, 0))
+        glyphs[uv] = (outline.value, int(x1 - x0))
+    base.close()
+    return glyphs
+
+
+def adjust_punctuation(glyphs, em_size):
+    """공백 및 기본 구두점 폭 조정 (merge_base_font와 동일)"""
+    if 0x20 in glyphs:
+        glyphs[0x20] = (glyphs[0x20][0], int(em_size * 0.5))
+    for code in PUNCT_CODES:
+        if code not in glyphs:
+            continue
+        value, _ = glyphs[code]
+        outline = RecordingPen()
+        outline.value = value
+        xmin, _, xmax, _ = glyph_bounds(outline)
+        target_width = int(em_size * 0.45)
+        padding = (target_width - (xmax - xmin)) / 2
+        glyphs[code] = (transformed(outline, Identity.translate(-xmin + padding, 0)).value, target_width)
+
+
+def font_name_strings(font_name, font_eng_name, family_name):
+    """setup_metadata와 같은 이름 테이블 항목 (영어/한국어)"""
+    ko_style, en_style = "손글씨", "Handwriting"
+    ko_family, en_family = f"폰토리 {font_name}", f"Fontory {font_eng_name}"
+    psname = font_eng_name.replace(" ", "")
+    version = "1.0"
+    return {
+        "familyName": {"en": en_family, "ko": ko_family},
+        "styleName": {"en": en_style, "ko": ko_style},
+        "fullName": {"en": f"{en_family} {en_style}", "ko": f"{ko_family} {ko_style}"},
+        "psName": psname,
+        "uniqueFontIdentifier": f"{psname} {version}",
+        "version": f"Version {version}",
+        "copyright": "Generated by Fontory",
+    }
+
+
+def build_font(svg_files, output_ttf, font_name, font_eng_name, family_name, base_font_path=None, workers=None):
+    """SVG 파일들로 TTF를 생성하고 (경로, 크기, 가져온 글리프 수)를 반환합니다."""
+    glyphs = {}
+    imported_count, skipped_count, complex_glyphs = 0, 0, []
+    points_before, points_after, simplified_count = 0, 0, 0
+    originals = {}
+    progress = ProgressReporter("ttf", len(svg_files))
+
+    logging.info(f"SVG 파일 {len(svg_files)}개 발견, 글리프 처리 시작 (프로세스 {workers or os.cpu_count()}개)")
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(process_svg, svg_files, chunksize=64)
+        for svg_index, (char, value, width, n_points, original_points, original_value) in enumerate(results, 1):
+            if char is None or value is None:
+                logging.error(f"오류: 글리프 '{char}' 처리 오류: {width}")
+                skipped_count += 1
+                progress.fail(char, width)
+                continue
+            glyphs[ord(char)] = (value, width)
+            progress.advance()
+            if original_value is not None:
+                originals[ord(char)] = original_value
+            if n_points < original_points:
+                points_before += original_points
+                points_after += n_points
+                simplified_count += 1
+            if n_points > COMPLEX_GLYPH_POINTS:
+                complex_glyphs.append((char, n_points))
+            imported_count += 1
+    progress.report()
+
+    log_simplify_summary(points_before, points_after, simplified_count)
+    if complex_glyphs:
+        complex_chars = ''.join(char for char, _ in complex_glyphs[:10])
+        logging.info(f"복잡한 글리프(상위 10개): {complex_chars} (총 {len(complex_glyphs)}개)")
+    logging.info(f"가져오기 결과: 총 {len(svg_files)}개 중 {imported_count}개 성공, {skipped_count}개 실패")
+
+    # 기본 폰트 병합: 생성된 글리프가 없는 코드 포인트만 추가
+    if base_font_path and os.path.exists(base_font_path):
+        base_glyphs = load_base_glyphs(base_font_path, DEFAULT_EM_SIZE, DEFAULT_ASCENT, DEFAULT_DESCENT)
+        added = {uv: g for uv, g in base_glyphs.items() if uv not in glyphs}
+        glyphs.update(added)
+        logging.info(f"병합 완료: {len(added)}개 글리프 추가 (총 {len(glyphs) + 1}개)")
+    adjust_punctuation(glyphs, DEFAULT_EM_SIZE)
+
+    logging.info(f"TTF 파일 생성 시작: {output_ttf}")
+    glyph_order = [".notdef"] + [glyph_name(uv) for uv in sorted(glyphs)]
+    glyf, metrics = {".notdef": TTGlyphPen(None).glyph()}, {".notdef": (DEFAULT_EM_SIZE // 2, 0)}
+    for uv in sorted(glyphs):
+        value, width = glyphs[uv]
+        glyf[glyph_name(uv)] = tt_glyph(value)
+        metrics[glyph_name(uv)] = (width, 0)
+
+    fb = FontBuilder(DEFAULT_EM_SIZE, isTTF=True)
+    fb.setupGlyphOrder(glyph_order)
+    fb.setupCharacterMap({uv: glyph_name(uv) for uv in glyphs})
+    fb.setupGlyf(glyf)
+    # lsb는 glyf 경계 상자로 다시 계산
+    glyf_table = fb.font["glyf"]
+    fb.setupHorizontalMetrics({
+        name: (width, getattr(glyf_table[name], "xMin", 0)) for name, (width, _) in metrics.items()
+    })
+    fb.setupHorizontalHeader(ascent=DEFAULT_ASCENT, descent=-DEFAULT_DESCENT)
+    fb.setupNameTable(font_name_strings(font_name, font_eng_name, family_name))
+    fb.setupOS2(sTypoAscender=DEFAULT_ASCENT, sTypoDescender=-DEFAULT_DESCENT, sTypoLineGap=0,
+                usWinAscent=DEFAULT_ASCENT, usWinDescent=DEFAULT_DESCENT, usWeightClass=400)
+    fb.setupPost()
+    fb.font["head"].fontRevision = 1.0
+    fb.save(output_ttf)
+
+    file_size = os.path.getsize(output_ttf)
+    logging.info(f"TTF 파일 생성 완료: {file_size:,} 바이트")
+
+    # GLYPH_SIMPLIFY_REPORT_SIZE=1: 단순화한 글리프를 원래 외곽선으로 되돌린 TTF를 임시로 생성해 단순화 전후 파일 크기 비교
+    if originals:
+        for uv, value in originals.items():
+            glyf_table[glyph_name(uv)] = tt_glyph(value)
+        reference_path = unsimplified_ttf_path(output_ttf)
+        fb.save(reference_path)
+        log_simplify_size(reference_path, output_ttf)
+    return output_ttf, file_size, imported_count
+
+
+def main(input_dir_abs, output_ttf_abs, font_name, font_eng_name, family_name, style_name, base_font_path,
+         workers=None):
+    logging.info(f"입력 SVG 디렉토리: {input_dir_abs}")
+    logging.info(f"출력 TTF 경로: {output_ttf_abs}")
+
+    svg_files = sorted(glob.glob(os.path.join(input_dir_abs, "*.svg")))
+    if not svg_files:
+        logging.error(f"{input_dir_abs}에서 SVG 파일을 찾을 수 없습니다.")
+        sys.exit(1)
+
+    output_dir = os.path.dirname(output_ttf_abs)
+    output_basename = os.path.splitext(os.path.basename(output_ttf_abs))[0]
+    os.makedirs(output_dir, exist_ok=True)
+
+    generated_files = []
+    ttf_path, ttf_size, imported_count = build_font(svg_files, os.path.join(output_dir, output_basename + ".ttf"),
+                                                    font_name, font_eng_name, family_name, base_font_path, workers)
+    generated_files.append((ttf_path, ttf_size))
+    if woff2_enabled():
+        woff2_path, woff2_size = generate_woff2(ttf_path, os.path.join(output_dir, output_basename + ".woff2"))
+        generated_files.append((woff2_path, woff2_size))
+
+    file_list = ', '.join(f"{os.path.basename(path)} ({size:,} 바이트)" for path, size in generated_files)
+    logging.info(f"폰트 생성 완료: {file_list}")
+    logging.info(f"총 {imported_count}개 글리프 포함됨")
+    return imported_count
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="fontTools 기반 SVG → TTF/WOFF2 변환")
+    parser.add_argument("input_dir", help="입력 SVG 디렉토리")
+    parser.add_argument("output_ttf", help="출력 TTF 경로")
+    parser.add_argument("font_name")
+    parser.add_argument("font_eng_name")
+    parser.add_argument("family_name")
+    parser.add_argument("style_name")
+    parser.add_argument("base_font", help="병합할 기본 폰트 경로")
+    parser.add_argument("--workers", type=int, default=None, help="글리프 처리 프로세스 수 (기본값: CPU 코어 수)")
+    args = parser.parse_args()
+
+    emit_started("ttf")
+    start_profiling("ttf")
+    logging.info(f"SVG → TTF/WOFF 변환 시작 (fontTools 백엔드)")
+    start_time = time.time()
+    imported_count = main(args.input_dir, args.output_ttf, args.font_name, args.font_eng_name, args.family_name,
+                          args.style_name, args.base_font, args.workers)
+    emit_finished("ttf", time.time() - start_time, glyphs=imported_count)
+    logging.info("변환 완료")
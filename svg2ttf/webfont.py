@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+TTF로부터 웹폰트(WOFF2, 선택적으로 WOFF 및 unicode-range 서브셋)를 만드는 패키징 단계입니다.
+
+  * brotli 압축 품질(0~11)을 지정할 수 있습니다. 11은 가장 작지만 가장 느립니다.
+  * 서브셋은 KS X 1001 완성형 2,350자와 한글 외 문자를 담은 common 파일,
+    나머지 한글 음절을 담은 rest 파일로 나뉘어 브라우저가 작은 common 파일을 먼저 받을 수 있습니다.
+  * 각 출력은 스레드 풀에서 병렬로 생성됩니다.
+
+fontTools와 brotli만 사용하므로 fontforge 컨테이너 밖(파이프라인 서버)에서도 실행할 수 있습니다.
+"""
+
+import os
+import sys
+import json
+import logging
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import brotli
+from fontTools import subset
+from fontTools.ttLib import TTFont
+from fontTools.ttLib import woff2 as woff2_lib
+
+DEFAULT_WOFF2_QUALITY = 11
+HANGUL_SYLLABLES = range(0xAC00, 0xD7A4)
+# KS X 1001 완성형 한글 2,350자 (EUC-KR 2바이트로 표현되는 음절)
+KSX1001_SYLLABLES = frozenset(
+    cp for cp in HANGUL_SYLLABLES if len(chr(cp).encode("euc_kr", errors="ignore")) == 2
+)
+
+# fontTools의 woff2 모듈은 brotli 품질을 지정할 수 없어, 스레드별 품질을 적용하는 래퍼로 모듈 참조를 바꿉니다
+_brotli_options = threading.local()
+
+
+class _BrotliWithQuality:
+    def compress(self, data, **kwargs):
+        kwargs.setdefault("quality", getattr(_brotli_options, "quality", DEFAULT_WOFF2_QUALITY))
+        return brotli.compress(data, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(brotli, name)
+
+
+woff2_lib.brotli = _BrotliWithQuality()
+
+
+def woff2_quality():
+    return int(os.getenv("WOFF2_QUALITY", str(DEFAULT_WOFF2_QUALITY)))
+
+
+def save_webfont(font, output_path, flavor, quality=DEFAULT_WOFF2_QUALITY):
+    font.flavor = flavor
+    _brotli_options.quality = quality
+    font.save(output_path)
+    return output_path, os.path.getsize(output_path)
+
+
+def compress_woff2(ttf_path, output_woff2, quality=DEFAULT_WOFF2_QUALITY):
+    logging.info(f"WOFF2 파일 생성 시작: {output_woff2} (brotli 품질 {quality})")
+    with TTFont(ttf_path, lazy=True) as font:
+        path, file_size = save_webfont(font, output_woff2, "woff2", quality)
+    logging.info(f"WOFF2 파일 생성 완료: {file_size:,} 바이트")
+    return path, file_size
+
+
+def compress_woff(ttf_path, output_woff):
+    logging.info(f"WOFF 파일 생성 시작: {output_woff}")
+    with TTFont(ttf_path, lazy=True) as font:
+        path, file_size = save_webfont(font, output_woff, "woff")
+    logging.info(f"WOFF 파일 생성 완료: {file_size:,} 바이트")
+    return path, file_size
+
+
+def unicode_range(codepoints):
+    """코드 포인트 집합을 CSS unicode-range 문자열로 변환합니다."""
+    ranges = []
+    for cp in sorted(codepoints):
+        if ranges and cp == ranges[-1][1] + 1:
+            ranges[-1][1] = cp
+        else:
+            ranges.append([cp, cp])
+    return ", ".join(f"U+{lo:X}" if lo == hi else f"U+{lo:X}-{hi:X}" for lo, hi in ranges)
+
+
+def subset_codepoints(ttf_path):
+    """폰트의 코드 포인트를 common(KS X 1001 + 한글 외 문자)과 rest(나머지 한글 음절)로 나눕니다."""
+    with TTFont(ttf_path, lazy=True) as font:
+        codepoints = set(font.getBestCmap())
+    rest = {cp for cp in codepoints if cp in HANGUL_SYLLABLES and cp not in KSX1001_SYLLABLES}
+    return {"common": codepoints - rest, "rest": rest}
+
+
+def make_subset(ttf_path, output_path, codepoints, quality=DEFAULT_WOFF2_QUALITY):
+    options = subset.Options()
+    options.layout_features = ["*"]
+    options.name_IDs = ["*"]
+    options.name_languages = ["*"]
+    options.notdef_outline = True
+    font = subset.load_font(ttf_path, options)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=codepoints)
+    subsetter.subset(font)
+    path, file_size = save_webfont(font, output_path, "woff2", quality)
+    font.close()
+    logging.info(f"서브셋 생성 완료: {os.path.basename(path)} ({len(codepoints)}자, {file_size:,} 바이트)")
+    return path, file_size
+
+
+def package_webfonts(ttf_path, output_dir=None, quality=None, woff=False, subsets=False, workers=None, basename=None):
+    """TTF로부터 웹폰트 파일들을 병렬로 생성합니다.
+
+    출력 파일 이름은 basename(기본값: TTF 파일 이름)에 확장자를 붙여 만듭니다.
+
+    Returns:
+        {"woff2": (경로, 크기), "woff": ..., "subsets": [{"name", "path", "size", "unicode_range"}]}
+    """
+    quality = woff2_quality() if quality is None else quality
+    output_dir = output_dir or os.path.dirname(ttf_path)
+    basename = basename or os.path.splitext(os.path.basename(ttf_path))[0]
+    os.makedirs(output_dir, exist_ok=True)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {"woff2": pool.submit(compress_woff2, ttf_path, os.path.join(output_dir, f"{basename}.woff2"), quality)}
+        if woff:
+            futures["woff"] = pool.submit(compress_woff, ttf_path, os.path.join(output_dir, f"{basename}.woff"))
+        subset_futures = []
+        if subsets:
+            for name, codepoints in subset_codepoints(ttf_path).items():
+                if not codepoints:
+                    continue
+                path = os.path.join(output_dir, f"{basename}.{name}.woff2")
+                subset_futures.append((name, codepoints, pool.submit(make_subset, ttf_path, path, codepoints, quality)))
+
+        result = {key: future.result() for key, future in futures.items()}
+        if subset_futures:
+            result["subsets"] = []
+            for name, codepoints, future in subset_futures:
+                path, size = future.result()
+                result["subsets"].append({"name": name, "path": path, "size": size,
+                                          "unicode_range": unicode_range(codepoints)})
+
+    if subsets:
+        manifest_path = os.path.join(output_dir, f"{basename}.subsets.json")
+        manifest = [{"file": os.path.basename(s["path"]), "unicode_range": s["unicode_range"]}
+                    for s in result.get("subsets", [])]
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        result["manifest"] = (manifest_path, os.path.getsize(manifest_path))
+    return result
+
+
+def generated_files(result):
+    """package_webfonts 결과를 (경로, 크기) 목록으로 펼칩니다."""
+    files = [result[key] for key in ("woff2", "woff", "manifest") if key in result]
+    files += [(s["path"], s["size"]) for s in result.get("subsets", [])]
+    return files
+
+
+if __name__ == '__main__':
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(message)s',
+        handlers=[logging.StreamHandler()]
+    )
+    parser = argparse.ArgumentParser(description="TTF → WOFF2/WOFF/서브셋 웹폰트 패키징")
+    parser.add_argument("ttf_path", help="입력 TTF 경로")
+    parser.add_argument("--output_dir", default=None, help="출력 디렉토리 (기본값: TTF와 같은 디렉토리)")
+    parser.add_argument("--quality", type=int, default=None, help="brotli 품질 0~11 (기본값: WOFF2_QUALITY 또는 11)")
+    parser.add_argument("--woff", action="store_true", help="WOFF 파일도 생성")
+    parser.add_argument("--subsets", action="store_true", help="unicode-range 서브셋(common/rest) 생성")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.ttf_path):
+        logging.error(f"TTF 파일을 찾을 수 없습니다: {args.ttf_path}")
+        sys.exit(1)
+    files = generated_files(package_webfonts(args.ttf_path, args.output_dir, args.quality, args.woff, args.subsets))
+    logging.info("웹폰트 생성 완료: " + ', '.join(f"{os.path.basename(p)} ({s:,} 바이트)" for p, s in files))
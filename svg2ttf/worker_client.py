@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+상주 폰트 조립 워커(font_worker.py)에 요청을 보내는 클라이언트입니다.
+표준 라이브러리만 사용하므로 fontforge가 없는 호스트에서도 실행할 수 있습니다.
+
+종료 코드: 0 성공, 1 폰트 생성 실패, 2 워커에 연결할 수 없음
+"""
+
+import argparse
+import json
+import socket
+import sys
+
+EXIT_FAILED = 1
+EXIT_UNAVAILABLE = 2
+
+
+def send_request(socket_path, request, timeout=None):
+    """요청을 보내고 워커 로그를 출력한 뒤 최종 응답을 반환합니다."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+        sock.sendall(json.dumps(request, ensure_ascii=False).encode("utf-8") + b"\n")
+        with sock.makefile("r", encoding="utf-8") as reader:
+            for line in reader:
+                message = json.loads(line)
+                if "log" in message:
+                    print(message["log"], flush=True)
+                    continue
+                return message
+    raise ConnectionError("워커가 응답 없이 연결을 종료했습니다.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="상주 폰트 조립 워커 클라이언트")
+    parser.add_argument("--socket", required=True, help="워커 Unix 소켓 경로")
+    parser.add_argument("--timeout", type=float, default=None, help="응답 대기 시간 (초)")
+    parser.add_argument("--no_woff2", action="store_true", help="WOFF2를 생성하지 않고 TTF만 생성")
+    parser.add_argument("input_dir", help="워커 기준 입력 SVG 디렉토리")
+    parser.add_argument("output_ttf", help="워커 기준 출력 TTF 경로")
+    parser.add_argument("font_name")
+    parser.add_argument("font_eng_name")
+    parser.add_argument("family_name")
+    parser.add_argument("style_name")
+    args = parser.parse_args()
+
+    request = {
+        "input_dir": args.input_dir,
+        "output_ttf": args.output_ttf,
+        "font_name": args.font_name,
+        "font_eng_name": args.font_eng_name,
+        "family_name": args.family_name,
+        "style_name": args.style_name,
+        "woff2": not args.no_woff2,
+    }
+    try:
+        response = send_request(args.socket, request, args.timeout)
+    except (OSError, ConnectionError) as e:
+        print(f"워커에 연결할 수 없습니다: {e}", file=sys.stderr)
+        sys.exit(EXIT_UNAVAILABLE)
+
+    if not response.get("ok"):
+        print(f"워커 폰트 생성 실패: {response.get('error')}", file=sys.stderr)
+        sys.exit(EXIT_FAILED)
+    for path, size in response.get("files", []):
+        print(f"생성된 파일: {path} ({size:,} 바이트)")
+
+
+if __name__ == '__main__':
+    main()
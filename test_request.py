@@ -2,6 +2,7 @@ import fastAPI.config as config
 import requests
 import json
 import sys
+import uuid
 
 def send_font_request(font_name: str = "TestFont"):
     """FastAPI 서버의 /font 엔드포인트에 POST 요청을 보냅니다."""
@@ -11,9 +12,10 @@ def send_font_request(font_name: str = "TestFont"):
         config.FONT_ID_KEY: 2313,
         config.MEMBER_ID_KEY: 213123,
         config.FONT_NAME_KEY: font_name,
+        config.FONT_ENG_NAME: "TestFontEng",
         config.TEMPLATE_URL_KEY: "https://....",
         config.AUTHOR_KEY: "author",
-        config.REQUEST_UUID_KEY: "sadsadsa"
+        config.REQUEST_UUID_KEY: str(uuid.uuid4())
     }
     # payload = {"font_name": font_name}
 